@@ -8,7 +8,9 @@
 import server
 from aiohttp import web
 import time
-from typing import Dict, Any
+import json
+from contextlib import aclosing
+from typing import Dict, Any, Tuple, List, Optional, Iterator
 
 # 使用统一的ALCHEM日志系统
 from .logging_config import get_api_logger
@@ -19,11 +21,8 @@ logger = get_api_logger()
 # 导入内存管理
 try:
     from .memory import (
-        get_molecular_data, 
-        store_molecular_data,
-        get_cache_status, 
-        clear_cache,
-        edit_molecular_data
+        get_molecular_data_batch,
+        AsyncMolecularDataManager
     )
     MEMORY_AVAILABLE = True
     logger.success("内存管理器加载成功")
@@ -31,6 +30,35 @@ except ImportError as e:
     MEMORY_AVAILABLE = False
     logger.error(f"内存管理器加载失败 - {e}")
 
+# 上传暂存（流式接收大文件 / 可续传的分块上传）
+from .upload_spool import (
+    UploadSpool, UploadError, ChunkedUploadRegistry, verify_checksum,
+    is_archive_name, iter_archive_members, UPLOAD_BATCH_MAX_FILES
+)
+
+# 二进制传输封装（元数据 + 原始内容字节，通过Accept头协商）
+from .binary_envelope import encode_envelope, accepts_binary, MEDIA_TYPE as BINARY_MEDIA_TYPE
+
+# 预压缩响应缓存（按 node_id + 版本 + 表示 + 编码 缓存压缩后的响应体）
+from .response_cache import RESPONSE_CACHE, negotiate_encoding, compress_body
+from .blob_store import decode_content
+
+# 缓存工作线程池（处理函数中的缓存操作、序列化和压缩都在这里执行，事件循环只等待结果）
+from .cache_executor import CACHE_EXECUTOR
+
+# 分子数据响应中的全部字段（字段投影的取值范围，与 _format_molecular_data 一致）
+MOLECULAR_DATA_FIELDS = frozenset((
+    "filename", "format", "format_name", "node_id", "atoms", "bonds", "coordinates", "content",
+    "metadata", "file_stats", "cached_at", "version", "access_count", "last_accessed",
+    "is_active", "processing_complete"
+))
+
+# 响应中可能带分子内容的请求类型（JSON序列化放到工作线程）
+CONTENT_REQUEST_TYPES = frozenset(("get_molecular_data", "get_molecular_data_batch", "find_molecular_data"))
+
+# 分块上传会话（只在服务器事件循环中访问）
+UPLOAD_SESSIONS = ChunkedUploadRegistry()
+
 # 导入WebSocket服务器
 try:
     from .websocket_server import register_websocket_routes, get_websocket_manager
@@ -68,23 +96,50 @@ def register_api_routes():
             logger.debug(f"API请求: {request_type}, 节点: {node_id}")
             
             # 只处理实际使用的API
-            if request_type == "get_molecular_data":
-                response = await _handle_get_molecular_data(node_id)
+            # 🎯 字段投影：fields 只返回指定字段，include_content=false 不读取内容
+            fields = _parse_fields(json_data.get("fields"), json_data.get("include_content", True))
+            
+            if request_type == "get_molecular_data" and accepts_binary(request.headers.get("Accept")):
+                # 📦 二进制封装：内容以原始字节返回，不经过JSON转义
+                return await _handle_get_molecular_data_binary(node_id, fields)
+            elif request_type == "get_molecular_data":
+                response = await _handle_get_molecular_data(node_id, fields)
+            elif request_type == "get_molecular_data_batch":
+                # 📚 一次请求取回多个节点；stream=true 时以NDJSON逐个返回（每行一个节点）
+                node_ids = json_data.get("node_ids")
+                if json_data.get("stream") and _valid_node_ids(node_ids):
+                    return await _stream_molecular_data_batch(request, node_ids, fields)
+                response = await _handle_get_molecular_data_batch(node_ids, fields)
             elif request_type == "get_cache_status":
-                response = await _handle_get_cache_status()
+                response = await _handle_get_cache_status(bool(json_data.get("include_nodes", False)))
+            elif request_type == "list_cache_nodes":
+                # 📋 分页的节点列表（状态统计不再附带完整列表）
+                response = await _handle_list_cache_nodes(
+                    json_data.get("offset", 0), json_data.get("limit", 100), json_data.get("tab_id"))
             elif request_type == "clear_cache":
                 response = await _handle_clear_cache(node_id)  # 保留用于调试
             elif request_type == "edit_molecular_data":
                 # 🧪 新增：分子数据编辑
                 edit_type = json_data.get("edit_type")
-                response = await _handle_edit_molecular_data(node_id, edit_type)
+                response = await _handle_edit_molecular_data(node_id, edit_type, json_data.get("atom_index"))
+            elif request_type in ("undo_edit", "redo_edit"):
+                # ↩️ 撤销/重做编辑
+                response = await _handle_undo_redo_edit(node_id, request_type)
+            elif request_type == "find_molecular_data":
+                # 🔎 按文件名/内容哈希/tab索引查找（一次请求，不需要先拉取完整的缓存列表）
+                response = await _handle_find_molecular_data(
+                    json_data.get("filename"), json_data.get("content_hash"), json_data.get("tab_id"))
+            elif request_type == "purge_tab":
+                # 🗂️ 清除整个tab的缓存（tab_id可省略，从node_id中提取）
+                response = await _handle_purge_tab(json_data.get("tab_id"), node_id)
             else:
                 response = {
                     "success": False,
                     "error": f"未知的请求类型: {request_type}"
                 }
             
-            return web.json_response(response)
+            # 带分子内容的响应可能很大，在工作线程中序列化
+            return await _json_response(response, offload=request_type in CONTENT_REQUEST_TYPES)
             
         except Exception as e:
             logger.error(f"处理分子API请求时出错: {e}")
@@ -93,6 +148,118 @@ def register_api_routes():
                 status=500
             )
 
+    # 🏷️ 可缓存的REST读取：ETag来自条目版本号，If-None-Match命中时返回304（不读取、不传输内容）
+    @server.PromptServer.instance.routes.get("/alchem_propbtn/api/molecular/{node_id}")
+    async def handle_molecular_get(request: web.Request):
+        """按节点ID获取分子数据（支持条件请求）"""
+        if not MEMORY_AVAILABLE:
+            return web.json_response(
+                {"success": False, "error": "内存管理器不可用"},
+                status=500
+            )
+        
+        node_id = request.match_info["node_id"]
+        if_none_match = request.headers.get("If-None-Match")
+        try:
+            # ?fields=filename,atoms 只返回指定字段；?include_content=0 不返回内容
+            fields = _parse_fields(request.query.get("fields"),
+                                   request.query.get("include_content", "1").lower() not in ("0", "false", "no"))
+            
+            binary = accepts_binary(request.headers.get("Accept"))
+            # 🗜️ 客户端接受gzip/deflate时使用预压缩响应缓存
+            encoding = negotiate_encoding(request.headers.get("Accept-Encoding")) if RESPONSE_CACHE.enabled else None
+            variant = _response_variant(binary, fields)
+            
+            # 快速路径：只比较内存中的版本号，命中预压缩缓存时不读取、不序列化内容
+            if if_none_match or encoding:
+                version = await AsyncMolecularDataManager.get_molecular_version(node_id)
+                if version is not None:
+                    etag = _molecular_etag(version)
+                    if if_none_match and _etag_matches(if_none_match, etag):
+                        return _not_modified(etag)
+                    body = RESPONSE_CACHE.get(node_id, etag, variant, encoding) if encoding else None
+                    if body is not None:
+                        return _encoded_response(body, binary, encoding, etag)
+            
+            content_mode = _content_mode(fields)
+            molecular_data = await AsyncMolecularDataManager.get_molecular_data(
+                node_id, "bytes" if binary and content_mode == "text" else content_mode)
+            if not molecular_data:
+                return web.json_response(
+                    {"success": False, "error": f"未找到节点 {node_id} 的分子数据"},
+                    status=404
+                )
+            
+            etag = _molecular_etag(molecular_data)
+            if if_none_match and _etag_matches(if_none_match, etag):
+                return _not_modified(etag)
+            
+            # 同一URL按Accept返回JSON或二进制封装（序列化和压缩在工作线程中完成）
+            body, encoding = await AsyncMolecularDataManager.run(
+                _encode_get_body, node_id, etag, variant, molecular_data, fields, binary, encoding)
+            return _encoded_response(body, binary, encoding, etag)
+            
+        except Exception as e:
+            logger.error(f"获取分子数据时出错: {e}")
+            return web.json_response(
+                {"success": False, "error": f"服务器内部错误: {str(e)}"},
+                status=500
+            )
+    
+    # 📄 原始内容（不经过JSON），支持 Range: bytes=start-end 分段读取
+    @server.PromptServer.instance.routes.get("/alchem_propbtn/api/molecular/{node_id}/content")
+    async def handle_molecular_content(request: web.Request):
+        """按节点ID获取原始分子文件内容（支持Range和条件请求）"""
+        if not MEMORY_AVAILABLE:
+            return web.json_response(
+                {"success": False, "error": "内存管理器不可用"},
+                status=500
+            )
+        
+        node_id = request.match_info["node_id"]
+        try:
+            molecular_data = await AsyncMolecularDataManager.get_molecular_data(node_id, "bytes")
+            if not molecular_data:
+                return web.json_response(
+                    {"success": False, "error": f"未找到节点 {node_id} 的分子数据"},
+                    status=404
+                )
+            
+            content = molecular_data["content"]
+            # 原始字节与版本一一对应，可以使用强ETag（If-Range要求强比较）
+            etag = _molecular_etag(molecular_data, weak=False)
+            headers = {"ETag": etag, "Cache-Control": "no-cache", "Accept-Ranges": "bytes"}
+            if_none_match = request.headers.get("If-None-Match")
+            if if_none_match and _etag_matches(if_none_match, etag):
+                return _not_modified(etag)
+            
+            # If-Range不匹配时忽略Range，返回完整的新内容
+            if_range = request.headers.get("If-Range")
+            if "Range" in request.headers and (if_range is None or if_range.strip() == etag):
+                try:
+                    requested = request.http_range
+                except ValueError:
+                    # 无法解析或多段Range：忽略Range，返回完整内容
+                    requested = slice(None, None)
+                try:
+                    byte_range = _resolve_range(requested, len(content))
+                except ValueError:
+                    return web.Response(status=416, headers={"Content-Range": f"bytes */{len(content)}"})
+                if byte_range is not None:
+                    start, stop = byte_range
+                    headers["Content-Range"] = f"bytes {start}-{stop - 1}/{len(content)}"
+                    return web.Response(body=memoryview(content)[start:stop], status=206,
+                                        content_type="text/plain", headers=headers)
+            
+            return web.Response(body=content, content_type="text/plain", headers=headers)
+            
+        except Exception as e:
+            logger.error(f"获取分子内容时出错: {e}")
+            return web.json_response(
+                {"success": False, "error": f"服务器内部错误: {str(e)}"},
+                status=500
+            )
+
     @server.PromptServer.instance.routes.post("/alchem_propbtn/api/upload_molecular")
     async def handle_upload_request(request: web.Request):
         """处理分子文件上传请求"""
@@ -102,11 +269,11 @@ def register_api_routes():
                 status=500
             )
         
+        spool = None
         try:
             # 解析multipart表单数据
             reader = await request.multipart()
             
-            file_content = None
             filename = None
             node_id = None
             folder = "molecules"
@@ -120,20 +287,15 @@ def register_api_routes():
                 
                 if field.name == 'file':
                     filename = field.filename
-                    file_content = await field.read()
-                    # 转换为字符串
-                    if isinstance(file_content, (bytes, bytearray)):
-                        try:
-                            file_content = file_content.decode('utf-8')
-                        except UnicodeDecodeError:
-                            try:
-                                file_content = file_content.decode('latin-1')
-                            except UnicodeDecodeError:
-                                logger.error(f"无法解码文件: {filename}")
-                                return web.json_response(
-                                    {"success": False, "error": f"无法解码文件 {filename}"},
-                                    status=400
-                                )
+                    # 📥 按块流式写入暂存文件，边接收边计算哈希、检查大小、嗅探格式
+                    if spool is not None:
+                        spool.close()
+                    spool = UploadSpool()
+                    try:
+                        await spool.receive(field)
+                    except UploadError as e:
+                        logger.warning(f"拒绝上传 {filename}: {e}")
+                        return web.json_response({"success": False, "error": str(e)}, status=e.status)
                 elif field.name == 'node_id':
                     node_id = await field.text()
                 elif field.name == 'folder':
@@ -142,54 +304,180 @@ def register_api_routes():
                     custom_filename = await field.text()
             
             # 验证必需字段
-            if not file_content or not filename or not node_id:
+            if spool is None or not spool.size or not filename or not node_id:
                 return web.json_response(
                     {"success": False, "error": "缺少必需字段: file, filename, node_id"},
                     status=400
                 )
             
-            # 使用自定义文件名
-            actual_filename = custom_filename if custom_filename else filename
+            # 从暂存文件读出唯一的一份内容存入内存（哈希已在接收时算好）
+            response, status = await _store_uploaded_content(
+                node_id, filename, folder, custom_filename, await AsyncMolecularDataManager.run(spool.read),
+                content_hash=spool.content_hash, detected_format=spool.detected_format
+            )
+            return web.json_response(response, status=status)
             
-            logger.molecular(f"上传分子文件: 节点={node_id}, 文件={actual_filename}")
-            if custom_filename:
-                logger.debug(f"使用自定义文件名: {filename} → {actual_filename}")
+        except Exception as e:
+            logger.error(f"处理文件上传时出错: {e}")
+            return web.json_response(
+                {"success": False, "error": f"服务器内部错误: {str(e)}"},
+                status=500
+            )
+        finally:
+            # 暂存文件只在请求期间存在
+            if spool is not None:
+                spool.close()
+
+    # 🧩 可续传的分块上传：init → PUT 各块（可并行、可乱序）→ complete
+    @server.PromptServer.instance.routes.post("/alchem_propbtn/api/upload_session")
+    async def handle_upload_session_init(request: web.Request):
+        """创建分块上传会话；带upload_id时续传已有会话，返回缺失的块"""
+        try:
+            json_data = await request.json()
+            session = UPLOAD_SESSIONS.open(
+                node_id=json_data.get("node_id"),
+                filename=json_data.get("filename"),
+                total_size=json_data.get("total_size"),
+                chunk_size=json_data.get("chunk_size"),
+                folder=json_data.get("folder") or "molecules",
+                custom_filename=json_data.get("custom_filename"),
+                upload_id=json_data.get("upload_id")
+            )
+            return web.json_response({"success": True, "data": session.describe()})
+        except UploadError as e:
+            return web.json_response({"success": False, "error": str(e)}, status=e.status)
+        except Exception as e:
+            logger.error(f"创建分块上传会话时出错: {e}")
+            return web.json_response({"success": False, "error": f"服务器内部错误: {str(e)}"}, status=500)
+    
+    @server.PromptServer.instance.routes.get("/alchem_propbtn/api/upload_session/{upload_id}")
+    async def handle_upload_session_status(request: web.Request):
+        """查询分块上传会话（断线后据此续传）"""
+        try:
+            session = UPLOAD_SESSIONS.get(request.match_info["upload_id"])
+            return web.json_response({"success": True, "data": session.describe()})
+        except UploadError as e:
+            return web.json_response({"success": False, "error": str(e)}, status=e.status)
+    
+    @server.PromptServer.instance.routes.put("/alchem_propbtn/api/upload_session/{upload_id}/chunks/{index}")
+    async def handle_upload_session_chunk(request: web.Request):
+        """上传一个块（请求体为原始字节，X-Chunk-Checksum: sha256=<hex> 或 crc32=<hex>）"""
+        upload_id = request.match_info["upload_id"]
+        try:
+            index = int(request.match_info["index"])
+            # 请求体按网络块直接写入暂存文件（下标、确切大小和校验和由 receive_chunk 检查）
+            session = await UPLOAD_SESSIONS.receive_chunk(upload_id, index, request.content,
+                                                          request.headers.get("X-Chunk-Checksum"))
+            return web.json_response({"success": True, "data": {
+                "index": index,
+                "received_chunks": len(session.received),
+                "total_chunks": session.total_chunks,
+                "complete": session.complete
+            }})
+        except ValueError:
+            return web.json_response({"success": False, "error": "无效的分块下标"}, status=400)
+        except UploadError as e:
+            logger.warning(f"分块上传失败: {upload_id} - {e}")
+            return web.json_response({"success": False, "error": str(e)}, status=e.status)
+        except Exception as e:
+            logger.error(f"处理分块上传时出错: {e}")
+            return web.json_response({"success": False, "error": f"服务器内部错误: {str(e)}"}, status=500)
+    
+    @server.PromptServer.instance.routes.post("/alchem_propbtn/api/upload_session/{upload_id}/complete")
+    async def handle_upload_session_complete(request: web.Request):
+        """所有块到齐后存入缓存（可选的整文件 sha256 校验）"""
+        if not MEMORY_AVAILABLE:
+            return web.json_response({"success": False, "error": "内存管理器不可用"}, status=500)
+        
+        upload_id = request.match_info["upload_id"]
+        try:
+            json_data = await request.json() if request.can_read_body else {}
+            # 校验和存储都成功之后才结束会话；失败时会话保留，客户端可以重传有问题的块
+            session = UPLOAD_SESSIONS.ready(upload_id)
+            content = await AsyncMolecularDataManager.run(session.read)
+            if not await AsyncMolecularDataManager.run(verify_checksum, content, json_data.get("checksum")):
+                return web.json_response({"success": False, "error": "整文件校验失败"}, status=422)
             
-            # 存储到内存
-            stored_data = store_molecular_data(
-                node_id=node_id,
-                filename=actual_filename,
-                folder=folder,
-                content=file_content
+            response, status = await _store_uploaded_content(
+                session.node_id, session.filename, session.folder, session.custom_filename, content,
+                detected_format=session.detected_format
             )
+            if response.get("success"):
+                UPLOAD_SESSIONS.finish(session)
+            return web.json_response(response, status=status)
+        except UploadError as e:
+            return web.json_response({"success": False, "error": str(e)}, status=e.status)
+        except Exception as e:
+            logger.error(f"完成分块上传时出错: {e}")
+            return web.json_response({"success": False, "error": f"服务器内部错误: {str(e)}"}, status=500)
+    
+    @server.PromptServer.instance.routes.delete("/alchem_propbtn/api/upload_session/{upload_id}")
+    async def handle_upload_session_abort(request: web.Request):
+        """放弃分块上传并删除暂存文件"""
+        removed = UPLOAD_SESSIONS.remove(request.match_info["upload_id"])
+        return web.json_response({"success": True, "data": {"removed": removed}})
+
+    # 📦 批量上传：多个file字段和/或一个压缩包（zip/tar），按顺序对应node_ids
+    @server.PromptServer.instance.routes.post("/alchem_propbtn/api/upload_molecular_batch")
+    async def handle_batch_upload_request(request: web.Request):
+        """批量上传分子文件，全部存入后只发送一条合并的WebSocket通知"""
+        if not MEMORY_AVAILABLE:
+            return web.json_response({"success": False, "error": "内存管理器不可用"}, status=500)
+        
+        sources = []
+        try:
+            reader = await request.multipart()
+            node_ids: List[str] = []
+            folder = "molecules"
             
-            if stored_data:
-                logger.success(f"文件已存储: {filename} -> 节点 {node_id}")
-                return web.json_response({
-                    "success": True,
-                    "data": {
-                        "filename": filename,
-                        "node_id": node_id,
-                        "format": stored_data.get("format"),
-                        "atoms": stored_data.get("atoms", 0),
-                        "file_size": stored_data.get("file_stats", {}).get("size", 0),
-                        "cached_at": stored_data.get("cached_at")
-                    },
-                    "message": f"分子文件 {filename} 上传成功"
-                })
-            else:
-                logger.error(f"存储分子文件失败: {filename}")
-                return web.json_response(
-                    {"success": False, "error": "存储分子文件失败"},
-                    status=500
-                )
+            while True:
+                field = await reader.next()
+                if field is None:
+                    break
+                
+                if field.name in ('file', 'archive'):
+                    archive = field.name == 'archive' or is_archive_name(field.filename)
+                    source = {"filename": field.filename, "spool": UploadSpool(sniff=not archive),
+                              "archive": archive, "error": None}
+                    sources.append(source)
+                    try:
+                        await source["spool"].receive(field)
+                    except UploadError as e:
+                        # 单个文件被拒绝不影响其他文件
+                        logger.warning(f"批量上传中拒绝 {field.filename}: {e}")
+                        source["error"] = str(e)
+                        await field.release()
+                elif field.name == 'node_ids':
+                    node_ids = _parse_node_ids(await field.text())
+                elif field.name == 'folder':
+                    folder = await field.text()
+            
+            if not sources:
+                return web.json_response({"success": False, "error": "缺少必需字段: file 或 archive"}, status=400)
+            
+            # 逐个读出内容交给缓存（内存中同一时刻只有一个文件），被跳过的文件保留结果位置
+            # 读取暂存文件、解包和存储都在工作线程中进行，返回时outcomes已填满
+            outcomes: List[Optional[Dict[str, Any]]] = []
+            stored = iter(await AsyncMolecularDataManager.store_molecular_data_batch(
+                _iter_batch_items(sources, node_ids, outcomes), folder))
+            items = [outcome if outcome is not None else next(stored) for outcome in outcomes]
+            
+            succeeded = sum(1 for item in items if item.get("success"))
+            logger.success(f"批量上传完成: {succeeded}/{len(items)} 个文件")
+            return web.json_response({
+                "success": succeeded > 0,
+                "data": {"items": items, "stored": succeeded, "failed": len(items) - succeeded}
+            }, status=200 if succeeded > 0 else 400)
             
         except Exception as e:
-            logger.error(f"处理文件上传时出错: {e}")
+            logger.error(f"处理批量上传时出错: {e}")
             return web.json_response(
                 {"success": False, "error": f"服务器内部错误: {str(e)}"},
                 status=500
             )
+        finally:
+            for source in sources:
+                source["spool"].close()
 
     @server.PromptServer.instance.routes.get("/alchem_propbtn/api/status")
     async def handle_status_request(request: web.Request):
@@ -212,6 +500,10 @@ def register_api_routes():
             else:
                 status_info["websocket"] = {"error": "WebSocket不可用"}
             
+            # 预压缩响应缓存和缓存工作线程池统计
+            status_info["response_cache"] = RESPONSE_CACHE.get_stats()
+            status_info["cache_executor"] = CACHE_EXECUTOR.get_stats()
+            
             # 获取缓存状态
             if MEMORY_AVAILABLE:
                 try:
@@ -249,7 +541,11 @@ def register_api_routes():
     
     logger.success("ALCHEM_PropBtn API路由注册完成")
     logger.info("POST /alchem_propbtn/api/molecular (分子数据操作)")
+    logger.info("GET /alchem_propbtn/api/molecular/{node_id} (可缓存的分子数据读取，支持ETag)")
+    logger.info("GET /alchem_propbtn/api/molecular/{node_id}/content (原始内容，支持Range)")
     logger.info("POST /alchem_propbtn/api/upload_molecular (文件上传)")  
+    logger.info("POST/PUT /alchem_propbtn/api/upload_session (可续传的分块上传)")
+    logger.info("POST /alchem_propbtn/api/upload_molecular_batch (批量/压缩包上传)")
     logger.info("GET /alchem_propbtn/api/status (系统状态)")
     if WEBSOCKET_AVAILABLE:
         logger.info("GET /alchem_propbtn/ws (WebSocket实时同步)")
@@ -259,35 +555,107 @@ def register_api_routes():
 # 核心处理函数 - 只保留实际使用的
 # ====================================================================================================
 
-async def _handle_get_molecular_data(node_id: str) -> Dict[str, Any]:
-    """获取指定节点的分子数据"""
+async def _store_uploaded_content(node_id: str, filename: str, folder: str, custom_filename: str, content: bytes,
+                                  content_hash: str = None, detected_format: str = None) -> Tuple[Dict[str, Any], int]:
+    """
+    把上传完成的内容存入缓存（普通上传和分块上传共用）
+    
+    Returns:
+        (响应字典, HTTP状态码)
+    """
+    # 使用自定义文件名
+    actual_filename = custom_filename if custom_filename else filename
+    
+    logger.molecular(f"上传分子文件: 节点={node_id}, 文件={actual_filename}")
+    if custom_filename:
+        logger.debug(f"使用自定义文件名: {filename} → {actual_filename}")
+    
+    stored_data = await AsyncMolecularDataManager.store_molecular_data(
+        node_id=node_id,
+        filename=actual_filename,
+        folder=folder,
+        content=content,
+        content_hash=content_hash
+    )
+    
+    if not stored_data:
+        logger.error(f"存储分子文件失败: {filename}")
+        return {"success": False, "error": "存储分子文件失败"}, 500
+    
+    logger.success(f"文件已存储: {filename} -> 节点 {node_id}")
+    return {
+        "success": True,
+        "data": {
+            "filename": filename,
+            "node_id": node_id,
+            "format": stored_data.get("format"),
+            "atoms": stored_data.get("atoms", 0),
+            "file_size": stored_data.get("file_stats", {}).get("size", 0),
+            "detected_format": detected_format,
+            "cached_at": stored_data.get("cached_at")
+        },
+        "message": f"分子文件 {filename} 上传成功"
+    }, 200
+
+def _parse_node_ids(value: str) -> List[str]:
+    """解析批量上传的node_ids字段（JSON数组或逗号分隔）"""
+    value = (value or "").strip()
+    if value.startswith("["):
+        return [str(node_id) for node_id in json.loads(value)]
+    return [node_id.strip() for node_id in value.split(",") if node_id.strip()]
+
+def _iter_batch_items(sources: List[Dict[str, Any]], node_ids: List[str],
+                      outcomes: List[Optional[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """
+    按上传顺序展开文件和压缩包成员，第i个文件对应node_ids[i]
+    
+    每个文件在outcomes中占一个位置：被跳过的文件直接写入失败结果，
+    交给缓存的文件写入None（由存储结果按顺序填充）。
+    """
+    position = 0
+    for source in sources:
+        if source["error"] is not None:
+            members = [(source["filename"], None, source["error"])]
+        elif source["archive"]:
+            if position >= UPLOAD_BATCH_MAX_FILES:
+                members = [(source["filename"], None, f"超过批量上传文件数上限 {UPLOAD_BATCH_MAX_FILES}")]
+            else:
+                members = iter_archive_members(source["spool"].path, UPLOAD_BATCH_MAX_FILES - position,
+                                               source["filename"])
+        else:
+            members = [(source["filename"], None, None)]
+        
+        for filename, content, error in members:
+            node_id = node_ids[position] if position < len(node_ids) else None
+            position += 1
+            if error is None and position > UPLOAD_BATCH_MAX_FILES:
+                error = f"超过批量上传文件数上限 {UPLOAD_BATCH_MAX_FILES}"
+            if error is None and not node_id:
+                error = "没有对应的node_id"
+            if error is not None:
+                outcomes.append({"node_id": node_id, "filename": filename, "success": False, "error": error})
+                continue
+            
+            outcomes.append(None)
+            if source["archive"]:
+                yield {"node_id": node_id, "filename": filename, "content": content}
+            else:
+                # 单个文件的哈希已在接收时算好
+                yield {"node_id": node_id, "filename": filename, "content": source["spool"].read(),
+                       "content_hash": source["spool"].content_hash}
+
+async def _handle_get_molecular_data(node_id: str, fields: Optional[frozenset] = None) -> Dict[str, Any]:
+    """获取指定节点的分子数据（fields为None时返回全部字段）"""
     if not node_id:
         return {"success": False, "error": "节点ID不能为空"}
     
     try:
-        molecular_data = get_molecular_data(node_id)
+        molecular_data = await AsyncMolecularDataManager.get_molecular_data(node_id, _content_mode(fields))
         
         if molecular_data:
-            # 为前端优化数据格式
-            optimized_data = {
-                "filename": molecular_data.get("filename"),
-                "format": molecular_data.get("format"),
-                "format_name": molecular_data.get("format_name"),
-                "node_id": molecular_data.get("node_id"),
-                "atoms": molecular_data.get("atoms", 0),
-                "bonds": molecular_data.get("bonds", 0),
-                "coordinates": molecular_data.get("coordinates", []),
-                "content": molecular_data.get("content", ""),
-                "metadata": molecular_data.get("metadata", {}),
-                "file_stats": molecular_data.get("file_stats", {}),
-                "cached_at": molecular_data.get("cached_at"),
-                "access_count": molecular_data.get("access_count", 0),
-                "last_accessed": molecular_data.get("last_accessed"),
-                "is_active": molecular_data.get("is_active", False),
-                "processing_complete": molecular_data.get("processing_complete", True)
-            }
+            optimized_data = _format_molecular_data(molecular_data, fields)
             
-            logger.debug(f"获取分子数据成功: 节点{node_id}, 文件{optimized_data['filename']}")
+            logger.debug(f"获取分子数据成功: 节点{node_id}, 文件{molecular_data.get('filename')}")
             return {"success": True, "data": optimized_data}
         else:
             logger.warning(f"未找到节点 {node_id} 的数据")
@@ -298,10 +666,273 @@ async def _handle_get_molecular_data(node_id: str) -> Dict[str, Any]:
         return {"success": False, "error": f"获取分子数据失败: {str(e)}"}
 
 
-async def _handle_get_cache_status() -> Dict[str, Any]:
-    """获取缓存状态"""
+def _valid_node_ids(node_ids: Any) -> bool:
+    """批量请求的node_ids必须是非空的字符串列表"""
+    return isinstance(node_ids, list) and bool(node_ids) and all(isinstance(n, str) for n in node_ids)
+
+
+def _format_batch_item(node_id: str, molecular_data: Optional[Dict[str, Any]],
+                       fields: Optional[frozenset] = None) -> Dict[str, Any]:
+    """批量获取中单个节点的结果（HTTP和WebSocket共用）"""
+    if molecular_data:
+        return {"node_id": node_id, "success": True, "data": _format_molecular_data(molecular_data, fields)}
+    return {"node_id": node_id, "success": False, "error": f"未找到节点 {node_id} 的分子数据"}
+
+
+async def _handle_get_molecular_data_batch(node_ids: List[str], fields: Optional[frozenset] = None) -> Dict[str, Any]:
+    """批量获取分子数据（一次读锁，逐个节点返回状态）"""
+    if not _valid_node_ids(node_ids):
+        return {"success": False, "error": "node_ids必须是非空的节点ID列表"}
+    
+    try:
+        results = await AsyncMolecularDataManager.run(list, get_molecular_data_batch(node_ids, _content_mode(fields)))
+        items = [_format_batch_item(node_id, data, fields) for node_id, data in results]
+        found = sum(1 for item in items if item["success"])
+        logger.debug(f"批量获取分子数据: {found}/{len(items)} 个节点")
+        return {"success": True, "data": {"items": items, "found": found, "missing": len(items) - found}}
+    except Exception as e:
+        logger.error(f"批量获取分子数据失败: {e}")
+        return {"success": False, "error": f"批量获取分子数据失败: {str(e)}"}
+
+
+async def _stream_molecular_data_batch(request: web.Request, node_ids: List[str],
+                                       fields: Optional[frozenset] = None) -> web.StreamResponse:
+    """
+    以NDJSON流式返回批量结果：每取回一个节点就写出一行，最后一行是 {"done": true, "found", "missing"}
+    """
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson; charset=utf-8"})
+    await response.prepare(request)
+    found = missing = 0
+    results = get_molecular_data_batch(node_ids, _content_mode(fields))
+    # 每个节点的读取和序列化在工作线程中完成，事件循环只负责写出；
+    # 结束、断开或取消时由工作线程关闭 results，释放尚未产出的条目的引用
+    lines = AsyncMolecularDataManager.iterate(_iter_batch_lines(results, fields), close=results.close)
     try:
-        status = get_cache_status()
+        try:
+            async with aclosing(lines):
+                async for success, line in lines:
+                    if success:
+                        found += 1
+                    else:
+                        missing += 1
+                    await response.write(line)
+            summary = {"done": True, "found": found, "missing": missing}
+        except ConnectionResetError:
+            raise
+        except Exception as e:
+            logger.error(f"流式批量获取分子数据失败: {e}")
+            summary = {"done": True, "found": found, "missing": missing, "error": str(e)}
+        await response.write(json.dumps(summary).encode("utf-8") + b"\n")
+        await response.write_eof()
+    except ConnectionResetError:
+        logger.debug(f"客户端在批量获取完成前断开: 已发送 {found + missing}/{len(node_ids)} 个节点")
+    return response
+
+
+def _iter_batch_lines(results: Iterator[Tuple[str, Optional[Dict[str, Any]]]],
+                      fields: Optional[frozenset] = None) -> Iterator[Tuple[bool, bytes]]:
+    """把批量结果逐个编码为NDJSON行，产出 (是否找到, 行字节)"""
+    for node_id, data in results:
+        item = _format_batch_item(node_id, data, fields)
+        yield item["success"], json.dumps(item, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+async def _handle_get_molecular_data_binary(node_id: str, fields: Optional[frozenset] = None) -> web.Response:
+    """以二进制封装返回分子数据（找不到时仍返回JSON错误）"""
+    if not node_id:
+        return web.json_response({"success": False, "error": "节点ID不能为空"})
+    
+    content_mode = _content_mode(fields)
+    molecular_data = await AsyncMolecularDataManager.get_molecular_data(
+        node_id, "bytes" if content_mode == "text" else content_mode)
+    if not molecular_data:
+        logger.warning(f"未找到节点 {node_id} 的数据")
+        return web.json_response({"success": False, "error": f"未找到节点 {node_id} 的分子数据"})
+    body = await AsyncMolecularDataManager.run(_encode_molecular_body, molecular_data, fields, True)
+    return web.Response(body=body, content_type=BINARY_MEDIA_TYPE)
+
+
+async def _handle_find_molecular_data(filename: str = None, content_hash: str = None,
+                                      tab_id: str = None) -> Dict[str, Any]:
+    """按文件名/内容哈希/tab查找分子数据（返回第一个匹配的节点）"""
+    if not filename and not content_hash and not tab_id:
+        return {"success": False, "error": "filename、content_hash、tab_id至少需要一个"}
+    
+    try:
+        molecular_data = await AsyncMolecularDataManager.find_molecular_data(filename, content_hash, tab_id)
+        if molecular_data:
+            return {"success": True, "data": _format_molecular_data(molecular_data)}
+        return {"success": False, "error": f"未找到匹配的分子数据: {filename or content_hash or tab_id}"}
+    except Exception as e:
+        logger.error(f"查找分子数据失败: {e}")
+        return {"success": False, "error": f"查找分子数据失败: {str(e)}"}
+
+
+def _molecular_etag(molecular_data: Dict[str, Any], weak: bool = True) -> str:
+    """
+    条目的ETag：内容哈希 + 版本号（存储/编辑时递增）
+    
+    JSON响应使用弱ETag：响应中的访问统计每次都会变化，但分子数据本身相同
+    """
+    content_hash = (molecular_data.get("content_hash") or "")[:16]
+    etag = f'"{content_hash}-{molecular_data.get("version") or 0}"'
+    return "W/" + etag if weak else etag
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match的弱比较（支持逗号分隔的多个ETag和 *）"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def _not_modified(etag: str) -> web.Response:
+    """304响应（不带响应体）"""
+    return web.Response(status=304, headers={"ETag": etag, "Cache-Control": "no-cache",
+                                             "Vary": "Accept, Accept-Encoding"})
+
+
+def _encode_molecular_body(molecular_data: Dict[str, Any], fields: Optional[frozenset], binary: bool) -> bytes:
+    """
+    序列化成功响应 {"success": True, "data": ...}（JSON或二进制封装）
+    
+    二进制封装的头是与JSON接口相同的结构（不含content），内容以原始字节跟在后面
+    """
+    formatted = _format_molecular_data(molecular_data, fields)
+    if binary:
+        content = formatted.pop("content", None)
+        return encode_envelope({"success": True, "data": formatted}, content)
+    if isinstance(formatted.get("content"), (bytes, bytearray, memoryview)):
+        formatted["content"] = decode_content(formatted["content"])
+    return json.dumps({"success": True, "data": formatted}).encode("utf-8")
+
+
+def _encode_get_body(node_id: str, etag: str, variant: str, molecular_data: Dict[str, Any],
+                     fields: Optional[frozenset], binary: bool,
+                     encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    序列化GET接口的响应体，足够大时压缩并存入预压缩缓存（在工作线程中执行）
+    
+    Returns:
+        (响应体, 实际使用的编码；未压缩时为None)
+    """
+    body = _encode_molecular_body(molecular_data, fields, binary)
+    if encoding and RESPONSE_CACHE.should_compress(len(body)):
+        compressed = compress_body(body, encoding)
+        RESPONSE_CACHE.put(node_id, etag, variant, encoding, compressed, len(body))
+        return compressed, encoding
+    return body, None
+
+
+async def _json_response(response: Dict[str, Any], status: int = 200, offload: bool = False) -> web.Response:
+    """JSON响应；offload时在工作线程中序列化（响应可能带有完整的分子内容）"""
+    if not offload:
+        return web.json_response(response, status=status)
+    text = await AsyncMolecularDataManager.run(json.dumps, response)
+    return web.Response(text=text, status=status, content_type="application/json")
+
+
+def _response_variant(binary: bool, fields: Optional[frozenset]) -> str:
+    """预压缩缓存中区分响应表示的键（编码格式 + 字段投影）"""
+    return ("binary" if binary else "json") + ":" + (",".join(sorted(fields)) if fields is not None else "*")
+
+
+def _encoded_response(body: bytes, binary: bool, encoding: Optional[str], etag: str) -> web.Response:
+    """GET接口的响应（body已按encoding压缩）"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept, Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return web.Response(body=body, headers=headers,
+                        content_type=BINARY_MEDIA_TYPE if binary else "application/json",
+                        charset=None if binary else "utf-8")
+
+
+def _parse_fields(fields: Any, include_content: Any = True) -> Optional[frozenset]:
+    """
+    解析字段投影（列表或逗号分隔的字符串）
+    
+    Returns:
+        要返回的字段集合，None表示全部字段
+    """
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(",") if field.strip()]
+    projected = frozenset(fields) if fields else None
+    if include_content is False or include_content in ("0", "false"):
+        projected = (projected if projected is not None else MOLECULAR_DATA_FIELDS) - {"content"}
+    return projected
+
+
+def _content_mode(fields: Optional[frozenset]) -> str:
+    """投影中不包含content时不读取内容"""
+    return "text" if fields is None or "content" in fields else "none"
+
+
+def _resolve_range(byte_range: slice, size: int) -> Optional[Tuple[int, int]]:
+    """
+    把aiohttp解析出的Range（request.http_range）换算为 [start, stop)
+    
+    Returns:
+        (start, stop)；没有Range时返回None
+        
+    Raises:
+        ValueError: Range无法满足（返回416）
+    """
+    start, stop = byte_range.start, byte_range.stop
+    if start is None and stop is None:
+        return None
+    if start is not None and start < 0:
+        # 后缀范围 bytes=-N：最后N个字节
+        start, stop = max(size + start, 0), size
+    else:
+        start = start or 0
+        stop = size if stop is None else min(stop, size)
+    if start >= size or start >= stop:
+        raise ValueError(f"无法满足的范围: {start}-{stop}/{size}")
+    return start, stop
+
+
+def _format_molecular_data(molecular_data: Dict[str, Any], fields: Optional[frozenset] = None) -> Dict[str, Any]:
+    """
+    为前端优化数据格式
+    
+    Args:
+        molecular_data: 分子数据字典
+        fields: 字段投影（node_id总是返回，未知字段忽略），None表示全部字段
+    """
+    formatted = {
+        "filename": molecular_data.get("filename"),
+        "format": molecular_data.get("format"),
+        "format_name": molecular_data.get("format_name"),
+        "node_id": molecular_data.get("node_id"),
+        "atoms": molecular_data.get("atoms", 0),
+        "bonds": molecular_data.get("bonds", 0),
+        "coordinates": molecular_data.get("coordinates", []),
+        "content": molecular_data.get("content", ""),
+        "metadata": molecular_data.get("metadata", {}),
+        "file_stats": molecular_data.get("file_stats", {}),
+        "cached_at": molecular_data.get("cached_at"),
+        "version": molecular_data.get("version"),
+        "access_count": molecular_data.get("access_count", 0),
+        "last_accessed": molecular_data.get("last_accessed"),
+        "is_active": molecular_data.get("is_active", False),
+        "processing_complete": molecular_data.get("processing_complete", True)
+    }
+    if fields is None:
+        return formatted
+    return {key: value for key, value in formatted.items() if key in fields or key == "node_id"}
+
+
+async def _handle_get_cache_status(include_nodes: bool = False) -> Dict[str, Any]:
+    """获取缓存状态（计数统计，include_nodes时附带第一页节点列表）"""
+    try:
+        status = await AsyncMolecularDataManager.get_cache_status(include_nodes)
         logger.debug(f"缓存状态: {status.get('total_nodes', 0)}个节点")
         return {"success": True, "data": status}
     except Exception as e:
@@ -309,10 +940,19 @@ async def _handle_get_cache_status() -> Dict[str, Any]:
         return {"success": False, "error": f"获取缓存状态失败: {str(e)}"}
 
 
+async def _handle_list_cache_nodes(offset: int = 0, limit: int = 100, tab_id: str = None) -> Dict[str, Any]:
+    """分页列出缓存节点"""
+    try:
+        return {"success": True, "data": await AsyncMolecularDataManager.list_cache_nodes(offset, limit, tab_id)}
+    except Exception as e:
+        logger.error(f"获取节点列表失败: {e}")
+        return {"success": False, "error": f"获取节点列表失败: {str(e)}"}
+
+
 async def _handle_clear_cache(node_id: str = None) -> Dict[str, Any]:
     """清除缓存（调试用）"""
     try:
-        success = clear_cache(node_id)
+        success = await AsyncMolecularDataManager.clear_cache(node_id)
         if success:
             message = f"成功清除节点 {node_id} 的缓存" if node_id else "成功清除所有缓存"
             logger.storage(f"{message}")
@@ -325,8 +965,8 @@ async def _handle_clear_cache(node_id: str = None) -> Dict[str, Any]:
         return {"success": False, "error": f"清除缓存出错: {str(e)}"}
 
 
-async def _handle_edit_molecular_data(node_id: str, edit_type: str) -> Dict[str, Any]:
-    """编辑分子数据"""
+async def _handle_edit_molecular_data(node_id: str, edit_type: str, atom_index: int = None) -> Dict[str, Any]:
+    """编辑分子数据（remove_atom 需要 atom_index）"""
     if not node_id:
         return {"success": False, "error": "节点ID不能为空"}
     
@@ -334,7 +974,8 @@ async def _handle_edit_molecular_data(node_id: str, edit_type: str) -> Dict[str,
         return {"success": False, "error": "编辑类型不能为空"}
     
     try:
-        edited_data = edit_molecular_data(node_id, edit_type)
+        edit_kwargs = {"atom_index": atom_index} if atom_index is not None else {}
+        edited_data = await AsyncMolecularDataManager.edit_molecular_data(node_id, edit_type, **edit_kwargs)
         
         if edited_data:
             logger.success(f"编辑成功: 节点 {node_id}, 类型 {edit_type}")
@@ -345,7 +986,8 @@ async def _handle_edit_molecular_data(node_id: str, edit_type: str) -> Dict[str,
                     "edit_type": edit_type,
                     "atoms_count": edited_data.get("atoms", 0),
                     "last_edited": edited_data.get("last_edited"),
-                    "edit_history": edited_data.get("edit_history", [])
+                    "edit_history": edited_data.get("edit_history", []),
+                    "edit_state": edited_data.get("edit_state", {})
                 },
                 "message": f"成功执行编辑: {edit_type}"
             }
@@ -358,6 +1000,60 @@ async def _handle_edit_molecular_data(node_id: str, edit_type: str) -> Dict[str,
         return {"success": False, "error": f"编辑分子数据失败: {str(e)}"}
 
 
+async def _handle_undo_redo_edit(node_id: str, request_type: str) -> Dict[str, Any]:
+    """撤销或重做分子数据编辑"""
+    if not node_id:
+        return {"success": False, "error": "节点ID不能为空"}
+    
+    action = "撤销" if request_type == "undo_edit" else "重做"
+    try:
+        if request_type == "undo_edit":
+            edited_data = await AsyncMolecularDataManager.undo_edit(node_id)
+        else:
+            edited_data = await AsyncMolecularDataManager.redo_edit(node_id)
+        
+        if edited_data:
+            logger.success(f"{action}成功: 节点 {node_id}")
+            return {
+                "success": True,
+                "data": {
+                    "node_id": node_id,
+                    "edit_type": request_type,
+                    "atoms_count": edited_data.get("atoms", 0),
+                    "last_edited": edited_data.get("last_edited"),
+                    "edit_history": edited_data.get("edit_history", []),
+                    "edit_state": edited_data.get("edit_state", {})
+                },
+                "message": f"成功{action}编辑"
+            }
+        else:
+            return {"success": False, "error": f"没有可{action}的编辑"}
+            
+    except Exception as e:
+        logger.error(f"{action}编辑失败: {e}")
+        return {"success": False, "error": f"{action}编辑失败: {str(e)}"}
+
+
+async def _handle_purge_tab(tab_id: str = None, node_id: str = None) -> Dict[str, Any]:
+    """清除一个tab下的所有节点缓存"""
+    if not tab_id and node_id and "_node_" in node_id:
+        tab_id = node_id.split("_node_")[0]
+    
+    if not tab_id:
+        return {"success": False, "error": "tab_id不能为空"}
+    
+    try:
+        result = await AsyncMolecularDataManager.purge_tab(tab_id)
+        return {
+            "success": True,
+            "data": result,
+            "message": f"已清除tab {tab_id} 的 {result['purged']} 个节点"
+        }
+    except Exception as e:
+        logger.error(f"清除tab缓存失败: {e}")
+        return {"success": False, "error": f"清除tab缓存失败: {str(e)}"}
+
+
 # ====================================================================================================
 # 便捷调试函数 - 仅保留必要的
 # ====================================================================================================
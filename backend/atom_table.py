@@ -0,0 +1,516 @@
+"""
+⚛️ ALCHEM_PropBtn 原子表 (atom_table.py)
+
+分子内容只解析一次，得到紧凑的列式表示，供原子计数、分析、居中、编辑等路径共用：
+- coords:            float32坐标数组（x, y, z交错存放）
+- *_codes:           元素/原子名/残基名/链ID的驻留编码（字符串只存一份）
+- residue_numbers:   残基序号（PDB resSeq）
+- residue_index:     残基序数（链/序号/插入码变化时递增，编辑后可能不连续）
+- record_offsets:    每个原子记录在content中的起始偏移和长度，可直接按原子拼接内容；
+                     删除单个原子时由旧表直接推导新表，不需要重新解析
+
+支持 PDB / XYZ / MOL / SDF（第一个分子），其它格式返回空表。
+表本身不保存content，内容仍由Blob存储管理。
+content可以是str，也可以是bytes/memoryview（纯ASCII内容直接按字节解析，不解码；
+含非ASCII字符时先解码，保证record_offsets始终是文本中的字符偏移）。
+"""
+
+import math
+from array import array
+from typing import Dict, Any, Optional, List, Tuple, Iterator, Union
+
+from .blob_store import decode_content
+
+# 支持解析的格式（不带点）
+SUPPORTED_TABLE_FORMATS = ("pdb", "xyz", "mol", "sdf")
+
+
+class _StringPool:
+    """字符串驻留池：字符串 -> 编码（按字节解析时bytes也作为key，与对应的字符串共用编码）"""
+
+    __slots__ = ("names", "_codes")
+
+    def __init__(self):
+        self.names: List[str] = []
+        self._codes: Dict[Union[str, bytes], int] = {}
+
+    def code(self, name: Union[str, bytes]) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            if isinstance(name, bytes):
+                # 每个不同的名字只解码一次
+                code = self.code(name.decode("ascii"))
+                self._codes[name] = code
+                return code
+            code = len(self.names)
+            self._codes[name] = code
+            self.names.append(name)
+        return code
+
+
+def _as_parse_input(content) -> Union[str, bytes]:
+    """
+    解析器的输入：str原样返回；纯ASCII的bytes-like按字节解析（不解码），其余解码为文本
+
+    memoryview指向完整的bytes对象时直接使用该对象，不复制。
+    """
+    if not content:
+        return ""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, memoryview):
+        owner = content.obj
+        content = owner if isinstance(owner, bytes) and len(owner) == content.nbytes else content.tobytes()
+    elif not isinstance(content, bytes):
+        content = bytes(content)
+    return content if content.isascii() else decode_content(content)
+
+
+def _newline(content: Union[str, bytes]) -> Union[str, bytes]:
+    """与content类型一致的换行符"""
+    return b"\n" if isinstance(content, bytes) else "\n"
+
+
+def _first_alpha(text: Union[str, bytes]) -> Union[str, bytes]:
+    """原子名中的第一个字母（元素列缺失时作为元素符号）"""
+    for i in range(len(text)):
+        char = text[i:i + 1]
+        if char.isalpha():
+            return char
+    return text[:0]
+
+
+class AtomTable:
+    """
+    ⚛️ 分子内容的列式原子表
+
+    用 AtomTable.from_content(content, file_format) 构建；构建后不再修改，
+    编辑通过 remove_record / insert_record 推导出新表。
+    """
+
+    __slots__ = (
+        "file_format", "total_lines", "coords",
+        "element_codes", "atom_name_codes", "residue_name_codes", "chain_codes",
+        "residue_numbers", "residue_index", "hetatm",
+        "record_offsets", "record_lengths",
+        "elements", "atom_names", "residue_names", "chains"
+    )
+
+    def __init__(self, file_format: str = ""):
+        self.file_format = file_format
+        self.total_lines = 0
+        self.coords = array("f")
+        self.element_codes = array("H")
+        self.atom_name_codes = array("H")
+        self.residue_name_codes = array("H")
+        self.chain_codes = array("H")
+        self.residue_numbers = array("i")
+        self.residue_index = array("i")
+        self.hetatm = array("b")
+        self.record_offsets = array("q")
+        self.record_lengths = array("I")
+        self.elements = _StringPool()
+        self.atom_names = _StringPool()
+        self.residue_names = _StringPool()
+        self.chains = _StringPool()
+
+    # ====================================================================================================
+    # 构建
+    # ====================================================================================================
+
+    @staticmethod
+    def supports(file_format: str) -> bool:
+        """是否支持解析该格式"""
+        return (file_format or "").lower().lstrip(".") in SUPPORTED_TABLE_FORMATS
+
+    @classmethod
+    def from_content(cls, content: Union[str, bytes, memoryview], file_format: str) -> "AtomTable":
+        """
+        解析分子内容
+
+        Args:
+            content: 分子文件内容（str，或bytes/memoryview）
+            file_format: 格式（"pdb" 或 ".pdb" 均可）
+
+        Returns:
+            原子表；格式不支持时返回只记录行数的空表
+        """
+        file_format = (file_format or "").lower().lstrip(".")
+        table = cls(file_format)
+        content = _as_parse_input(content)
+
+        if file_format == "pdb":
+            table._parse_pdb(content)
+        elif file_format == "xyz":
+            table._parse_xyz(content)
+        elif file_format in ("mol", "sdf"):
+            table._parse_molfile(content)
+        else:
+            table.total_lines = content.count(_newline(content)) + 1 if content else 0
+        return table
+
+    def _append(self, offset: int, length: int, x: float, y: float, z: float,
+                element: str, atom_name: str = "", residue_name: str = "", chain: str = "",
+                residue_number: int = 0, residue_ordinal: int = 0, hetatm: bool = False):
+        """追加一个原子记录"""
+        self.coords.extend((x, y, z))
+        self.element_codes.append(self.elements.code(element))
+        self.atom_name_codes.append(self.atom_names.code(atom_name))
+        self.residue_name_codes.append(self.residue_names.code(residue_name))
+        self.chain_codes.append(self.chains.code(chain))
+        self.residue_numbers.append(residue_number)
+        self.residue_index.append(residue_ordinal)
+        self.hetatm.append(1 if hetatm else 0)
+        self.record_offsets.append(offset)
+        self.record_lengths.append(length)
+
+    def _parse_pdb(self, content: Union[str, bytes]):
+        """解析PDB的ATOM/HETATM记录（固定列格式）"""
+        offset = 0
+        line_count = 0
+        residue_ordinal = -1
+        last_residue_key = None
+        atom, hetatm = (b"ATOM", b"HETATM") if isinstance(content, bytes) else ("ATOM", "HETATM")
+
+        for line in content.split(_newline(content)):
+            line_count += 1
+            if line.startswith(atom) or line.startswith(hetatm):
+                try:
+                    x, y, z = float(line[30:38]), float(line[38:46]), float(line[46:54])
+                except ValueError:
+                    x = y = z = math.nan
+
+                atom_name = line[12:16].strip()
+                element = line[76:78].strip()
+                if not element:
+                    element = _first_alpha(atom_name)
+
+                residue_name = line[17:20].strip()
+                chain = line[21:22].strip()
+                residue_text = line[22:27]
+                try:
+                    residue_number = int(line[22:26])
+                except ValueError:
+                    residue_number = 0
+
+                residue_key = (chain, residue_text)
+                if residue_key != last_residue_key:
+                    residue_ordinal += 1
+                    last_residue_key = residue_key
+
+                self._append(offset, len(line), x, y, z, element, atom_name, residue_name, chain,
+                             residue_number, residue_ordinal, line.startswith(hetatm))
+
+            offset += len(line) + 1
+
+        self.total_lines = line_count if content else 0
+
+    def _parse_xyz(self, content: Union[str, bytes]):
+        """解析XYZ：第一行原子数，第二行注释，之后每行 元素 x y z"""
+        lines = content.split(_newline(content))
+        self.total_lines = len(lines) if content else 0
+        try:
+            declared = int(lines[0].strip())
+        except (ValueError, IndexError):
+            return
+
+        offset = len(lines[0]) + 1
+        if len(lines) > 1:
+            offset += len(lines[1]) + 1
+
+        for line in lines[2:2 + declared]:
+            parts = line.split()
+            if len(parts) >= 4:
+                try:
+                    x, y, z = float(parts[1]), float(parts[2]), float(parts[3])
+                except ValueError:
+                    x = y = z = math.nan
+                self._append(offset, len(line), x, y, z, parts[0], parts[0])
+            offset += len(line) + 1
+
+    def _parse_molfile(self, content: Union[str, bytes]):
+        """解析MOL/SDF的原子块（只取第一个分子）"""
+        lines = content.split(_newline(content))
+        self.total_lines = len(lines) if content else 0
+        if len(lines) < 4:
+            return
+
+        try:
+            declared = int(lines[3][:3])
+        except ValueError:
+            counts_line = lines[3].split()
+            try:
+                declared = int(counts_line[0]) if counts_line else 0
+            except ValueError:
+                return
+
+        offset = sum(len(line) + 1 for line in lines[:4])
+        for line in lines[4:4 + declared]:
+            parts = line.split()
+            if len(parts) >= 4:
+                try:
+                    x, y, z = float(parts[0]), float(parts[1]), float(parts[2])
+                except ValueError:
+                    x = y = z = math.nan
+                self._append(offset, len(line), x, y, z, parts[3], parts[3])
+            offset += len(line) + 1
+
+    # ====================================================================================================
+    # 查询
+    # ====================================================================================================
+
+    def __len__(self) -> int:
+        return len(self.record_offsets)
+
+    @property
+    def atom_count(self) -> int:
+        """原子记录数（PDB包含ATOM和HETATM）"""
+        return len(self.record_offsets)
+
+    def count(self, hetatm: Optional[bool] = None) -> int:
+        """
+        统计原子数
+
+        Args:
+            hetatm: None统计全部，False只统计ATOM，True只统计HETATM
+        """
+        if hetatm is None:
+            return len(self.record_offsets)
+        het_count = sum(self.hetatm)
+        return het_count if hetatm else len(self.record_offsets) - het_count
+
+    def indices(self, hetatm: Optional[bool] = None) -> Iterator[int]:
+        """按记录顺序遍历原子下标（hetatm含义同count）"""
+        if hetatm is None:
+            return iter(range(len(self.record_offsets)))
+        flag = 1 if hetatm else 0
+        return (i for i, h in enumerate(self.hetatm) if h == flag)
+
+    def coord(self, index: int) -> Tuple[float, float, float]:
+        """第index个原子的坐标（无法解析时为nan）"""
+        base = index * 3
+        return self.coords[base], self.coords[base + 1], self.coords[base + 2]
+
+    def element(self, index: int) -> str:
+        return self.elements.names[self.element_codes[index]]
+
+    def atom_name(self, index: int) -> str:
+        return self.atom_names.names[self.atom_name_codes[index]]
+
+    def residue_name(self, index: int) -> str:
+        return self.residue_names.names[self.residue_name_codes[index]]
+
+    def chain(self, index: int) -> str:
+        return self.chains.names[self.chain_codes[index]]
+
+    def record_span(self, index: int) -> Tuple[int, int]:
+        """第index个原子记录在content中的 [start, end) 范围（不含换行符）"""
+        start = self.record_offsets[index]
+        return start, start + self.record_lengths[index]
+
+    def element_counts(self, hetatm: Optional[bool] = None) -> Dict[str, int]:
+        """元素分布"""
+        code_counts: Dict[int, int] = {}
+        for i in self.indices(hetatm):
+            code = self.element_codes[i]
+            code_counts[code] = code_counts.get(code, 0) + 1
+        return {self.elements.names[code]: count for code, count in code_counts.items() if self.elements.names[code]}
+
+    def residue_types(self, hetatm: Optional[bool] = None) -> List[str]:
+        """出现过的残基名称（按首次出现顺序）"""
+        seen = {}
+        for i in self.indices(hetatm):
+            seen.setdefault(self.residue_name_codes[i], None)
+        return [self.residue_names.names[code] for code in seen]
+
+    def coordinate_ranges(self, hetatm: Optional[bool] = None) -> Optional[Dict[str, List[float]]]:
+        """坐标范围 {"x_range": [min, max], ...}，没有有效坐标时返回None"""
+        mins = [math.inf] * 3
+        maxs = [-math.inf] * 3
+        found = False
+        for i in self.indices(hetatm):
+            xyz = self.coord(i)
+            if math.isnan(xyz[0]):
+                continue
+            found = True
+            for axis in range(3):
+                if xyz[axis] < mins[axis]:
+                    mins[axis] = xyz[axis]
+                if xyz[axis] > maxs[axis]:
+                    maxs[axis] = xyz[axis]
+        if not found:
+            return None
+        return {
+            "x_range": [mins[0], maxs[0]],
+            "y_range": [mins[1], maxs[1]],
+            "z_range": [mins[2], maxs[2]]
+        }
+
+    def centroid(self, hetatm: Optional[bool] = None) -> Optional[Tuple[float, float, float]]:
+        """几何中心，没有有效坐标时返回None"""
+        sums = [0.0, 0.0, 0.0]
+        count = 0
+        for i in self.indices(hetatm):
+            xyz = self.coord(i)
+            if math.isnan(xyz[0]):
+                continue
+            sums[0] += xyz[0]
+            sums[1] += xyz[1]
+            sums[2] += xyz[2]
+            count += 1
+        if not count:
+            return None
+        return sums[0] / count, sums[1] / count, sums[2] / count
+
+    def translate_pdb(self, content: str, offset: Tuple[float, float, float],
+                      hetatm: Optional[bool] = None) -> str:
+        """
+        平移PDB坐标：只改写原子记录的坐标列，其余内容原样拼接
+
+        Args:
+            content: 构建本表时使用的PDB内容
+            offset: (dx, dy, dz)
+            hetatm: 需要平移的记录（含义同count）
+
+        Returns:
+            平移后的内容
+        """
+        dx, dy, dz = offset
+        pieces = []
+        cursor = 0
+        for i in self.indices(hetatm):
+            start, end = self.record_span(i)
+            if end - start <= 54:
+                continue
+            try:
+                # 重新读取原文坐标，避免float32精度损失
+                x = float(content[start + 30:start + 38]) + dx
+                y = float(content[start + 38:start + 46]) + dy
+                z = float(content[start + 46:start + 54]) + dz
+            except ValueError:
+                continue
+            pieces.append(content[cursor:start + 30])
+            pieces.append(f"{x:8.3f}{y:8.3f}{z:8.3f}")
+            cursor = start + 54
+        pieces.append(content[cursor:])
+        return "".join(pieces)
+
+    def removal_range(self, content: str, index: int) -> Tuple[int, int]:
+        """
+        删除第index个原子记录时需要从content中去掉的 [low, high) 范围（含一个换行符）
+        """
+        start, end = self.record_span(index)
+        if end < len(content):
+            # 删除记录及其后的换行符
+            return start, end + 1
+        # 最后一行没有换行符：删除前一个换行符
+        return max(start - 1, 0), end
+
+    def get_row(self, index: int) -> Tuple:
+        """第index个原子的完整字段（字符串形式，可用于insert_record恢复）"""
+        x, y, z = self.coord(index)
+        return (x, y, z, self.element(index), self.atom_name(index), self.residue_name(index),
+                self.chain(index), self.residue_numbers[index], self.residue_index[index],
+                self.hetatm[index], self.record_lengths[index])
+
+    def insert_record(self, content: str, index: int, offset: int, text: str, row: Tuple) -> Tuple[str, "AtomTable"]:
+        """
+        remove_record 的逆操作：在offset处插回文本，并推导出新内容的原子表
+
+        Args:
+            content: 构建本表时使用的内容
+            index: 插回后该原子的下标
+            offset: 插入位置（即删除时的 removal_range 起点）
+            text: 删除时去掉的文本
+            row: 删除前由 get_row 保存的字段
+
+        Returns:
+            (新内容, 新原子表)
+        """
+        new_content = content[:offset] + text + content[offset:]
+        record_offset = offset + 1 if text.startswith("\n") else offset
+        inserted = len(text)
+
+        table = AtomTable(self.file_format)
+        table.total_lines = self.total_lines + 1
+        table.elements = self.elements
+        table.atom_names = self.atom_names
+        table.residue_names = self.residue_names
+        table.chains = self.chains
+
+        x, y, z, element, atom_name, residue_name, chain, residue_number, residue_ordinal, hetatm, length = row
+        values = {
+            "element_codes": table.elements.code(element),
+            "atom_name_codes": table.atom_names.code(atom_name),
+            "residue_name_codes": table.residue_names.code(residue_name),
+            "chain_codes": table.chains.code(chain),
+            "residue_numbers": residue_number,
+            "residue_index": residue_ordinal,
+            "hetatm": hetatm,
+            "record_lengths": length
+        }
+        table.coords = self.coords[:index * 3] + array("f", (x, y, z)) + self.coords[index * 3:]
+        for name, value in values.items():
+            column = getattr(self, name)
+            setattr(table, name, column[:index] + array(column.typecode, (value,)) + column[index:])
+
+        # 只有插入位置之后的偏移需要平移
+        table.record_offsets = self.record_offsets[:index]
+        table.record_offsets.append(record_offset)
+        table.record_offsets.extend(o + inserted for o in self.record_offsets[index:])
+        return new_content, table
+
+    def remove_record(self, content: str, index: int) -> Tuple[str, "AtomTable"]:
+        """
+        删除一个原子记录：按偏移拼接内容，并由本表推导出新内容的原子表
+
+        Args:
+            content: 构建本表时使用的内容
+            index: 原子下标
+
+        Returns:
+            (新内容, 新原子表)
+        """
+        low, high = self.removal_range(content, index)
+        new_content = content[:low] + content[high:]
+        removed = high - low
+
+        table = AtomTable(self.file_format)
+        table.total_lines = max(self.total_lines - 1, 0)
+        # 字符串池只追加，已有编码不会改变，新旧表可以共享
+        table.elements = self.elements
+        table.atom_names = self.atom_names
+        table.residue_names = self.residue_names
+        table.chains = self.chains
+
+        table.coords = self.coords[:index * 3] + self.coords[index * 3 + 3:]
+        for name in ("element_codes", "atom_name_codes", "residue_name_codes", "chain_codes",
+                     "residue_numbers", "residue_index", "hetatm", "record_lengths"):
+            column = getattr(self, name)
+            setattr(table, name, column[:index] + column[index + 1:])
+
+        # 只有被删除记录之后的偏移需要平移（内容拼接和各列切片仍是O(n)）
+        table.record_offsets = self.record_offsets[:index]
+        table.record_offsets.extend(offset - removed for offset in self.record_offsets[index + 1:])
+        return new_content, table
+
+    @property
+    def nbytes(self) -> int:
+        """数组部分占用的字节数（估算）"""
+        arrays = (self.coords, self.element_codes, self.atom_name_codes, self.residue_name_codes,
+                  self.chain_codes, self.residue_numbers, self.residue_index, self.hetatm,
+                  self.record_offsets, self.record_lengths)
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    def get_summary(self) -> Dict[str, Any]:
+        """原子表摘要（用于调试和状态接口）"""
+        return {
+            "format": self.file_format,
+            "atoms": len(self),
+            "hetatm": sum(self.hetatm),
+            "total_lines": self.total_lines,
+            "elements": len(self.elements.names),
+            "residues": (self.residue_index[-1] + 1) if len(self.residue_index) else 0,
+            "chains": len(self.chains.names),
+            "nbytes": self.nbytes
+        }
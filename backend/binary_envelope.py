@@ -0,0 +1,99 @@
+"""
+📦 ALCHEM_PropBtn 二进制传输封装 (binary_envelope.py)
+
+大分子文件作为JSON字符串字段传输时，要在 json.dumps、WebSocket广播和浏览器的
+response.json() 中各转义/复制一遍。二进制封装把元数据放在紧凑的JSON头里，
+内容作为原始字节直接跟在后面：
+
+    ┌──────────┬─────────┬──────────┬──────────────┬────────────┬──────────────┐
+    │ "ALCM"   │ version │ reserved │ header_len   │ header     │ content      │
+    │ 4 bytes  │ 1 byte  │ 3 bytes  │ uint32 (BE)  │ UTF-8 JSON │ 原始字节      │
+    └──────────┴─────────┴──────────┴──────────────┴────────────┴──────────────┘
+
+- 内容长度 = 总长度 - 12 - header_len，头中的 content_length 用于校验，
+  has_content 区分"没有请求内容"和"内容为空"
+- HTTP通过 Accept: application/vnd.alchem.molecular+binary 协商，
+  WebSocket通过订阅时的 binary 标志协商（以二进制帧发送）
+- 前端解码见 web/js/modules/binary-envelope.js
+"""
+
+import json
+import struct
+from typing import Dict, Any, Optional, Tuple, Union
+
+from .blob_store import content_bytes
+
+# 封装格式的媒体类型（HTTP Content-Type / Accept）
+MEDIA_TYPE = "application/vnd.alchem.molecular+binary"
+
+MAGIC = b"ALCM"
+VERSION = 1
+
+# magic(4) + version(1) + reserved(3) + header_len(4)
+_PREFIX = struct.Struct(">4sB3xI")
+PREFIX_SIZE = _PREFIX.size
+
+
+def encode_envelope(header: Dict[str, Any], content: Union[str, bytes, memoryview, None] = None) -> bytes:
+    """
+    编码二进制封装
+
+    Args:
+        header: 元数据（不应包含content）
+        content: 内容（str按UTF-8编码，bytes原样写入），None表示没有内容
+
+    Returns:
+        封装后的字节
+    """
+    data = content_bytes(content) if content is not None else b""
+    header = dict(header, content_length=len(data), has_content=content is not None)
+    encoded_header = json.dumps(header, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    return b"".join((_PREFIX.pack(MAGIC, VERSION, len(encoded_header)), encoded_header, data))
+
+
+def decode_envelope(data: Union[bytes, memoryview]) -> Tuple[Dict[str, Any], memoryview]:
+    """
+    解码二进制封装
+
+    Returns:
+        (元数据, 内容的memoryview)
+
+    Raises:
+        ValueError: 不是有效的封装
+    """
+    view = memoryview(data)
+    if len(view) < PREFIX_SIZE:
+        raise ValueError("二进制封装过短")
+    magic, version, header_len = _PREFIX.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("不是ALCHEM二进制封装")
+    if version != VERSION:
+        raise ValueError(f"不支持的封装版本: {version}")
+    header_end = PREFIX_SIZE + header_len
+    if len(view) < header_end:
+        raise ValueError("二进制封装的头不完整")
+
+    header = json.loads(bytes(view[PREFIX_SIZE:header_end]).decode("utf-8"))
+    content = view[header_end:]
+    if header.get("content_length", len(content)) != len(content):
+        raise ValueError("二进制封装的内容长度不符")
+    return header, content
+
+
+def accepts_binary(accept: Optional[str]) -> bool:
+    """Accept头是否请求二进制封装（q=0 表示拒绝）"""
+    if not accept:
+        return False
+    for media_range in accept.split(","):
+        parts = [part.strip() for part in media_range.split(";")]
+        if parts[0].lower() != MEDIA_TYPE:
+            continue
+        for param in parts[1:]:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
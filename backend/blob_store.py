@@ -0,0 +1,573 @@
+"""
+🧬 ALCHEM_PropBtn 内容寻址Blob存储 (blob_store.py)
+
+同一个PDB被加载到多个节点（甚至多个Tab）时，缓存中只保留一份内容。
+MOLECULAR_DATA_CACHE 的条目只记录 content_hash，真正的内容由这里按哈希引用计数管理。
+
+设计要点：
+- 以内容哈希（blake2b-128）作为key，相同内容只存一份
+- 引用计数：每个引用该内容的缓存条目计1，归零时释放
+- 统计物理字节数（实际占用）与引用次数，供 get_cache_status 报告去重效果
+- 可选的静态压缩：按内容大小选择 zlib/lzma/bz2，读取时懒解压，
+  并用一个小的"热点集合"缓存最近解压过的内容，保证3D查看路径的速度
+- 派生数据（如解析后的原子表）挂在blob上，与内容同生命周期，相同内容只解析一次
+- 延迟压缩：交互式编辑产生的新版本先以原文存放，超过延迟仍存活时才由后台线程压缩，
+  连续编辑时被替换掉的中间版本不会被压缩
+- 内容以原始字节保存（上传的bytes直接入库，不先解码成str）：哈希、压缩、快照、共享内存
+  都直接使用字节；get_view() 给解析器零拷贝的memoryview，只有 get() 才按需解码成文本
+"""
+
+import bz2
+import lzma
+import zlib
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple, Callable, Union
+
+# 使用统一的ALCHEM日志系统
+from .logging_config import get_alchem_logger
+
+logger = get_alchem_logger('BlobStore')
+
+
+# 支持的压缩编解码器: 名称 -> (压缩函数, 解压函数)
+COMPRESSION_CODECS = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=1), lzma.decompress),
+    "bz2": (lambda data: bz2.compress(data, 9), bz2.decompress),
+}
+
+# 压缩后至少要节省的比例，否则保留原文
+MIN_COMPRESSION_SAVING = 0.1
+
+
+def content_bytes(content: Union[str, bytes, bytearray, memoryview]) -> bytes:
+    """
+    内容的字节形式：str按UTF-8编码，bytes原样返回（不复制），其它bytes-like复制一次
+    """
+    if isinstance(content, bytes):
+        return content
+    if isinstance(content, str):
+        return content.encode("utf-8")
+    return bytes(content)
+
+
+def decode_content(data: Union[bytes, bytearray, memoryview]) -> str:
+    """字节内容解码为文本：先尝试UTF-8，失败时按latin-1（与上传接口原来的规则一致）"""
+    try:
+        return str(data, "utf-8")
+    except UnicodeDecodeError:
+        return str(data, "latin-1")
+
+
+def compute_content_hash(content: Union[str, bytes, bytearray, memoryview]) -> str:
+    """计算分子内容的哈希值（blake2b-128，十六进制；str按UTF-8编码后计算）"""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def parse_compression_tiers(spec: str) -> List[Tuple[int, str]]:
+    """
+    解析压缩分级配置
+
+    Args:
+        spec: 形如 "16384:zlib,8388608:lzma" 的字符串，表示内容大小达到阈值时使用对应编解码器；
+              "none" 或空字符串表示不压缩
+
+    Returns:
+        按阈值升序排列的 [(min_size, codec), ...]
+    """
+    tiers = []
+    if not spec or spec.strip().lower() == "none":
+        return tiers
+
+    for item in spec.split(","):
+        try:
+            threshold, codec = item.strip().split(":")
+            codec = codec.strip().lower()
+            if codec not in COMPRESSION_CODECS:
+                logger.warning(f"不支持的压缩编解码器: {codec}，已忽略")
+                continue
+            tiers.append((int(threshold), codec))
+        except ValueError:
+            logger.warning(f"无效的压缩分级配置: '{item}'，已忽略")
+
+    return sorted(tiers)
+
+
+class MolecularBlobStore:
+    """
+    🧬 引用计数的内容寻址存储
+
+    所有公开方法都是线程安全的。压缩和解压都在锁外进行。
+    """
+
+    def __init__(self, compression_tiers: List[Tuple[int, str]] = None,
+                 hot_set_max_bytes: int = 64 * 1024 * 1024, hot_set_max_entries: int = 32,
+                 compaction_delay: float = 2.0):
+        """
+        Args:
+            compression_tiers: 压缩分级 [(min_size, codec), ...]，None或空表示不压缩
+            hot_set_max_bytes: 解压热点集合的字节上限
+            hot_set_max_entries: 解压热点集合的条目上限
+            compaction_delay: 延迟压缩的等待秒数
+        """
+        # content_hash -> {"data": bytes, "codec": str, "refcount": int, "size": int, "stored_size": int}
+        self._blobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._physical_bytes = 0
+        self._raw_bytes = 0
+        self._derived_bytes = 0
+        # 增量维护的统计：引用总数和各编解码器的blob数（get_stats不需要遍历所有blob）
+        self._references = 0
+        self._codec_counts: Dict[str, int] = {}
+        self._stats = {
+            "puts": 0,
+            "dedup_hits": 0,
+            "hot_hits": 0,
+            "hot_misses": 0,
+            "derived_hits": 0,
+            "derived_builds": 0,
+            "deferred_compressions": 0
+        }
+
+        # 等待延迟压缩的内容: content_hash -> 到期时间（按存入顺序）
+        self.compaction_delay = compaction_delay
+        self._deferred: "OrderedDict[str, float]" = OrderedDict()
+        self._compact_cond = threading.Condition(self._lock)
+        self._compactor: Optional[threading.Thread] = None
+
+        self.compression_tiers = sorted(compression_tiers or [])
+
+        # 最近解压过的内容: content_hash -> bytes（按访问顺序，最旧的在最前面）
+        self.hot_set_max_bytes = hot_set_max_bytes
+        self.hot_set_max_entries = hot_set_max_entries
+        self._hot_set: "OrderedDict[str, str]" = OrderedDict()
+        self._hot_bytes = 0
+
+    def put(self, content: Union[str, bytes, bytearray, memoryview], content_hash: str = None,
+            defer_compression: bool = False) -> str:
+        """
+        存入内容并增加引用计数
+
+        Args:
+            content: 分子文件内容（str按UTF-8编码保存；bytes直接保存，不复制也不解码）
+            content_hash: 预先计算好的哈希（可选；会重新校验，不一致时使用实际内容的哈希，
+                          避免错误的元数据让共享该哈希的所有节点指向别的内容）
+            defer_compression: 先存原文，延迟后再由后台线程压缩（用于交互式编辑）
+
+        Returns:
+            内容哈希
+        """
+        content = content_bytes(content)
+        actual_hash = compute_content_hash(content)
+        if content_hash is not None and content_hash != actual_hash:
+            logger.warning(f"内容哈希不一致: 提供 {content_hash}，实际 {actual_hash}，使用实际哈希")
+        content_hash = actual_hash
+
+        with self._lock:
+            self._stats["puts"] += 1
+            if self._add_reference(content_hash):
+                return content_hash
+
+        # 压缩在锁外进行，避免阻塞其他读写
+        deferred = defer_compression and self._select_codec(len(content)) != "none"
+        data, codec = (content, "none") if deferred else self._encode(content)
+
+        with self._lock:
+            # 压缩期间可能已有其他线程存入相同内容
+            if self._add_reference(content_hash):
+                return content_hash
+
+            stored_size = len(data)
+            self._blobs[content_hash] = {
+                "data": data,
+                "codec": codec,
+                "refcount": 1,
+                "size": len(content),
+                "stored_size": stored_size
+            }
+            self._physical_bytes += stored_size
+            self._raw_bytes += len(content)
+            self._references += 1
+            self._codec_counts[codec] = self._codec_counts.get(codec, 0) + 1
+
+            # 刚写入的压缩内容很可能马上被读取，放入热点集合
+            if codec != "none":
+                self._hot_put(content_hash, content)
+            if deferred:
+                self._deferred[content_hash] = time.time() + self.compaction_delay
+                self._ensure_compactor()
+                self._compact_cond.notify()
+            return content_hash
+
+    def put_encoded(self, content_hash: str, data: bytes, codec: str, size: int) -> str:
+        """
+        按已编码的形式存入内容并增加引用计数（用于从快照恢复，避免重新压缩）
+
+        Args:
+            content_hash: 内容哈希
+            data: export() 导出的数据
+            codec: 编解码器名称（"none" 表示data就是原始字节）
+            size: 原文字节数
+
+        Raises:
+            ValueError: 编解码器不支持，或解码后的内容与content_hash不一致
+        """
+        if codec != "none" and codec not in COMPRESSION_CODECS:
+            raise ValueError(f"不支持的编解码器: {codec}")
+        stored = content_bytes(data)
+
+        with self._lock:
+            exists = content_hash in self._blobs
+        if not exists:
+            # 新内容先校验哈希（压缩数据需要解压一次），损坏或错误的快照不能进入去重表
+            content = stored if codec == "none" else COMPRESSION_CODECS[codec][1](stored)
+            if len(content) != size or compute_content_hash(content) != content_hash:
+                raise ValueError(f"快照内容与哈希不一致: {content_hash}")
+
+        with self._lock:
+            self._stats["puts"] += 1
+            if self._add_reference(content_hash):
+                return content_hash
+
+            self._blobs[content_hash] = {
+                "data": stored,
+                "codec": codec,
+                "refcount": 1,
+                "size": size,
+                "stored_size": len(stored)
+            }
+            self._physical_bytes += len(stored)
+            self._raw_bytes += size
+            self._references += 1
+            self._codec_counts[codec] = self._codec_counts.get(codec, 0) + 1
+            return content_hash
+
+    def export(self, content_hash: str) -> Optional[Tuple[bytes, str, int]]:
+        """
+        导出内容的存储形式（不解压），用于写快照
+
+        Returns:
+            (数据, 编解码器名称, 原文字节数)，不存在返回None
+        """
+        with self._lock:
+            blob = self._blobs.get(content_hash)
+            if blob is None:
+                return None
+            return blob["data"], blob["codec"], blob["size"]
+
+    def get(self, content_hash: str) -> Optional[str]:
+        """按哈希获取文本内容（必要时懒解压，再按需解码），不存在返回None"""
+        data = self.get_bytes(content_hash)
+        return decode_content(data) if data is not None else None
+
+    def get_view(self, content_hash: str) -> Optional[memoryview]:
+        """按哈希获取内容的只读memoryview（未压缩的内容零拷贝），不存在返回None"""
+        data = self.get_bytes(content_hash)
+        return memoryview(data) if data is not None else None
+
+    def get_bytes(self, content_hash: str) -> Optional[bytes]:
+        """按哈希获取原始字节（必要时懒解压，不解码），不存在返回None"""
+        if not content_hash:
+            return None
+
+        with self._lock:
+            blob = self._blobs.get(content_hash)
+            if blob is None:
+                return None
+            if blob["codec"] == "none":
+                return blob["data"]
+
+            hot = self._hot_set.get(content_hash)
+            if hot is not None:
+                self._hot_set.move_to_end(content_hash)
+                self._stats["hot_hits"] += 1
+                return hot
+
+            self._stats["hot_misses"] += 1
+            data, codec = blob["data"], blob["codec"]
+
+        # 解压在锁外进行
+        content = COMPRESSION_CODECS[codec][1](data)
+
+        with self._lock:
+            if content_hash in self._blobs:
+                self._hot_put(content_hash, content)
+        return content
+
+    def retain(self, content_hash: Optional[str]) -> bool:
+        """
+        为已存在的内容增加一个引用（不需要内容本身）
+
+        Returns:
+            内容是否存在
+        """
+        if not content_hash:
+            return False
+
+        with self._lock:
+            blob = self._blobs.get(content_hash)
+            if blob is None:
+                return False
+            blob["refcount"] += 1
+            self._references += 1
+            return True
+
+    def release(self, content_hash: Optional[str]) -> bool:
+        """
+        减少引用计数，归零时释放内容
+
+        Returns:
+            内容是否被真正释放
+        """
+        if not content_hash:
+            return False
+
+        with self._lock:
+            blob = self._blobs.get(content_hash)
+            if blob is None:
+                logger.warning(f"释放不存在的blob: {content_hash}")
+                return False
+
+            blob["refcount"] -= 1
+            self._references -= 1
+            if blob["refcount"] > 0:
+                return False
+
+            del self._blobs[content_hash]
+            self._codec_counts[blob["codec"]] -= 1
+            self._physical_bytes -= blob["stored_size"]
+            self._raw_bytes -= blob["size"]
+            self._derived_bytes -= blob.get("derived_bytes", 0)
+            self._hot_remove(content_hash)
+            self._deferred.pop(content_hash, None)
+            return True
+    
+    def get_derived(self, content_hash: Optional[str], key: str, factory: Callable[[], Any]) -> Any:
+        """
+        获取挂在内容上的派生数据，不存在时用factory构建（构建在锁外进行）
+
+        派生数据随内容一起释放。内容不存在时直接返回factory()的结果，不做缓存。
+
+        Args:
+            content_hash: 内容哈希
+            key: 派生数据名称（如 "atom_table:pdb"）
+            factory: 无参构建函数
+        """
+        with self._lock:
+            blob = self._blobs.get(content_hash) if content_hash else None
+            if blob is not None:
+                derived = blob.get("derived")
+                if derived is not None and key in derived:
+                    self._stats["derived_hits"] += 1
+                    return derived[key]
+
+        value = factory()
+
+        with self._lock:
+            self._stats["derived_builds"] += 1
+            blob = self._blobs.get(content_hash) if content_hash else None
+            if blob is None:
+                return value
+            derived = blob.setdefault("derived", {})
+            if key in derived:
+                # 构建期间其他线程已存入
+                return derived[key]
+            derived[key] = value
+            nbytes = getattr(value, "nbytes", 0)
+            blob["derived_bytes"] = blob.get("derived_bytes", 0) + nbytes
+            self._derived_bytes += nbytes
+            return value
+
+    def set_derived(self, content_hash: Optional[str], key: str, value: Any) -> bool:
+        """
+        为内容预先挂上派生数据（例如由编辑前的原子表推导出的新表）
+
+        Returns:
+            内容是否存在
+        """
+        with self._lock:
+            blob = self._blobs.get(content_hash) if content_hash else None
+            if blob is None:
+                return False
+            derived = blob.setdefault("derived", {})
+            if key in derived:
+                return True
+            derived[key] = value
+            nbytes = getattr(value, "nbytes", 0)
+            blob["derived_bytes"] = blob.get("derived_bytes", 0) + nbytes
+            self._derived_bytes += nbytes
+            return True
+    
+    def get_refcount(self, content_hash: str) -> int:
+        """获取内容的引用计数"""
+        blob = self._blobs.get(content_hash)
+        return blob["refcount"] if blob is not None else 0
+
+    def get_stored_size(self, content_hash: str) -> int:
+        """获取内容实际占用的字节数（计入physical_bytes的部分），不存在返回0"""
+        blob = self._blobs.get(content_hash)
+        return blob["stored_size"] if blob is not None else 0
+
+    @property
+    def physical_bytes(self) -> int:
+        """实际占用的字节数（去重、压缩后，不含热点集合）"""
+        return self._physical_bytes
+
+    def clear(self):
+        """清空所有内容"""
+        with self._lock:
+            self._blobs.clear()
+            self._physical_bytes = 0
+            self._raw_bytes = 0
+            self._derived_bytes = 0
+            self._references = 0
+            self._codec_counts.clear()
+            self._deferred.clear()
+            self._hot_set.clear()
+            self._hot_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取Blob存储统计信息"""
+        with self._lock:
+            return {
+                "blobs": len(self._blobs),
+                "physical_bytes": self._physical_bytes,
+                "raw_bytes": self._raw_bytes,
+                "compression_ratio": round(self._raw_bytes / self._physical_bytes, 2) if self._physical_bytes else 1.0,
+                "codecs": {codec: count for codec, count in self._codec_counts.items() if count},
+                "references": self._references,
+                "puts": self._stats["puts"],
+                "dedup_hits": self._stats["dedup_hits"],
+                "deferred": {
+                    "pending": len(self._deferred),
+                    "compressed": self._stats["deferred_compressions"],
+                    "delay": self.compaction_delay
+                },
+                "derived": {
+                    "bytes": self._derived_bytes,
+                    "hits": self._stats["derived_hits"],
+                    "builds": self._stats["derived_builds"]
+                },
+                "hot_set": {
+                    "entries": len(self._hot_set),
+                    "bytes": self._hot_bytes,
+                    "max_bytes": self.hot_set_max_bytes,
+                    "hits": self._stats["hot_hits"],
+                    "misses": self._stats["hot_misses"]
+                }
+            }
+
+    # ====================================================================================================
+    # 内部函数
+    # ====================================================================================================
+
+    def _add_reference(self, content_hash: str) -> bool:
+        """已存在相同内容时增加引用计数（调用方必须已持有self._lock）"""
+        blob = self._blobs.get(content_hash)
+        if blob is None:
+            return False
+
+        # 🔑 相同内容已存在：只增加引用，不保留新的副本
+        blob["refcount"] += 1
+        self._references += 1
+        self._stats["dedup_hits"] += 1
+        return True
+
+    def _select_codec(self, size: int) -> str:
+        """按内容大小选择编解码器"""
+        codec = "none"
+        for threshold, tier_codec in self.compression_tiers:
+            if size >= threshold:
+                codec = tier_codec
+        return codec
+
+    def _encode(self, content: bytes) -> Tuple[bytes, str]:
+        """
+        按分级配置压缩内容
+
+        Returns:
+            (存储的数据, 编解码器名称)；不压缩时数据就是原始字节
+        """
+        codec = self._select_codec(len(content))
+        if codec == "none":
+            return content, "none"
+
+        try:
+            compressed = COMPRESSION_CODECS[codec][0](content)
+            if len(compressed) > len(content) * (1 - MIN_COMPRESSION_SAVING):
+                # 压缩收益太小，保留原文
+                return content, "none"
+            return compressed, codec
+        except Exception as e:
+            logger.warning(f"内容压缩失败({codec})，保留原文: {e}")
+            return content, "none"
+
+    def _ensure_compactor(self):
+        """按需启动延迟压缩线程（调用方必须已持有self._lock）"""
+        if self._compactor is None or not self._compactor.is_alive():
+            self._compactor = threading.Thread(target=self._run_compactor, name="ALCHEM-BlobCompactor", daemon=True)
+            self._compactor.start()
+
+    def _run_compactor(self):
+        """后台线程：压缩到期且仍然存活的延迟内容"""
+        with self._compact_cond:
+            while True:
+                if not self._deferred:
+                    self._compact_cond.wait()
+                    continue
+
+                content_hash, due = next(iter(self._deferred.items()))
+                remaining = due - time.time()
+                if remaining > 0:
+                    self._compact_cond.wait(remaining)
+                    continue
+                del self._deferred[content_hash]
+
+                blob = self._blobs.get(content_hash)
+                if blob is None or blob["codec"] != "none":
+                    continue
+                content = blob["data"]
+
+                # 压缩在锁外进行
+                self._lock.release()
+                try:
+                    data, codec = self._encode(content)
+                finally:
+                    self._lock.acquire()
+
+                blob = self._blobs.get(content_hash)
+                if blob is None or blob["codec"] != "none" or codec == "none":
+                    continue
+                self._physical_bytes += len(data) - blob["stored_size"]
+                blob["data"] = data
+                blob["codec"] = codec
+                self._codec_counts["none"] -= 1
+                self._codec_counts[codec] = self._codec_counts.get(codec, 0) + 1
+                blob["stored_size"] = len(data)
+                self._stats["deferred_compressions"] += 1
+                self._hot_put(content_hash, content)
+
+    def _hot_put(self, content_hash: str, content: bytes):
+        """放入解压热点集合并按上限淘汰（调用方必须已持有self._lock）"""
+        if not self.hot_set_max_bytes or len(content) > self.hot_set_max_bytes:
+            return
+
+        self._hot_remove(content_hash)
+        self._hot_set[content_hash] = content
+        self._hot_bytes += len(content)
+
+        while self._hot_set and (self._hot_bytes > self.hot_set_max_bytes
+                                 or len(self._hot_set) > self.hot_set_max_entries):
+            _, evicted = self._hot_set.popitem(last=False)
+            self._hot_bytes -= len(evicted)
+
+    def _hot_remove(self, content_hash: str):
+        """从解压热点集合中移除（调用方必须已持有self._lock）"""
+        content = self._hot_set.pop(content_hash, None)
+        if content is not None:
+            self._hot_bytes -= len(content)
@@ -0,0 +1,176 @@
+"""
+⚙️ ALCHEM_PropBtn 缓存工作线程池 (cache_executor.py)
+
+aiohttp处理函数运行在ComfyUI唯一的事件循环上。存储/编辑/读取缓存时的原子统计、
+行拆分、文件写入、压缩和锁等待如果直接在处理函数中执行，会阻塞所有其他路由和
+WebSocket心跳。CacheExecutor 把这些同步调用放进有界线程池，事件循环只等待结果：
+- 线程数由 ALCHEM_CACHE_WORKERS 决定，同时执行的缓存操作不超过该数量，其余排队
+- 已提交（执行中+排队）的任务数不超过 ALCHEM_CACHE_MAX_PENDING，达到上限时
+  新的调用在事件循环上异步等待空位（背压），而不是无限堆积在线程池队列中
+- 缓存、Blob存储和锁都是进程内状态，只能使用线程池（进程池中的修改对服务器不可见）
+- 记录排队等待时间和并发峰值，供 /api/status 监控
+"""
+
+import os
+import time
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, AsyncIterator, Iterator, Optional, TypeVar
+
+# 使用统一的ALCHEM日志系统
+from .logging_config import get_alchem_logger
+
+logger = get_alchem_logger('CacheExecutor')
+
+# 缓存工作线程数（同时执行的缓存操作上限）
+CACHE_WORKERS = max(1, int(os.environ.get("ALCHEM_CACHE_WORKERS", min(8, (os.cpu_count() or 1) + 2))))
+# 已提交（执行中+排队）的任务数上限
+CACHE_MAX_PENDING = int(os.environ.get("ALCHEM_CACHE_MAX_PENDING", CACHE_WORKERS * 8))
+
+T = TypeVar("T")
+
+# iterate() 中表示迭代结束的哨兵
+_EXHAUSTED = object()
+
+
+class CacheExecutor:
+    """
+    ⚙️ 有界线程池（线程安全）
+    """
+
+    def __init__(self, max_workers: int = None, max_pending: int = None):
+        """
+        Args:
+            max_workers: 工作线程数（默认 CACHE_WORKERS）
+            max_pending: 已提交任务数上限（默认 CACHE_MAX_PENDING，不小于max_workers）
+        """
+        self.max_workers = CACHE_WORKERS if max_workers is None else max(1, max_workers)
+        self.max_pending = max(self.max_workers, CACHE_MAX_PENDING if max_pending is None else max_pending)
+        # 每个事件循环一个信号量（asyncio.Semaphore绑定创建它的事件循环）
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ALCHEM-Cache")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._stats = {
+            "submitted": 0,
+            "throttled": 0,
+            "completed": 0,
+            "failed": 0,
+            "peak_active": 0,
+            "peak_queued": 0,
+            "queue_wait_time": 0.0,
+            "max_queue_wait": 0.0
+        }
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        在工作线程中执行 func(*args, **kwargs) 并等待结果（异常原样抛出）
+        """
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_pending)
+        if slots.locked():
+            with self._lock:
+                self._stats["throttled"] += 1
+
+        async with slots:
+            submitted_at = time.perf_counter()
+            with self._lock:
+                self._stats["submitted"] += 1
+                self._queued += 1
+                if self._queued > self._stats["peak_queued"]:
+                    self._stats["peak_queued"] = self._queued
+            return await loop.run_in_executor(self._executor, self._call, submitted_at, func, args, kwargs)
+
+    async def iterate(self, iterator: Iterator[T], close: Optional[Callable[[], Any]] = None) -> AsyncIterator[T]:
+        """
+        在工作线程中逐项推进同步迭代器（用于流式输出）
+
+        结束时（正常结束、提前退出或被取消）在工作线程中调用 close（默认 iterator.close）。
+        被取消时工作线程可能仍在执行 next()，生成器执行中不能关闭，close 会等这一步返回后再执行。
+        提前退出时调用方应使用 contextlib.aclosing，保证立即关闭。
+
+        Args:
+            iterator: 同步迭代器
+            close: 结束时调用的清理函数（例如外层生成器包装了内层生成器时，传入内层的close）
+        """
+        # 串行化 next() 和 close()
+        step_lock = threading.Lock()
+
+        def step():
+            with step_lock:
+                return next(iterator, _EXHAUSTED)
+
+        try:
+            while True:
+                item = await self.run(step)
+                if item is _EXHAUSTED:
+                    return
+                yield item
+        finally:
+            if close is None:
+                close = getattr(iterator, "close", None)
+            if close is not None:
+                # 不在这里等待：取消时不能再挂起，关闭在后台完成
+                try:
+                    self._executor.submit(self._close_iterator, step_lock, close)
+                except RuntimeError:
+                    # 线程池已关闭（没有正在执行的步骤）
+                    self._close_iterator(step_lock, close)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取线程池统计信息"""
+        with self._lock:
+            stats = dict(self._stats, workers=self.max_workers, max_pending=self.max_pending,
+                         active=self._active, queued=self._queued)
+        stats["queue_wait_time"] = round(stats["queue_wait_time"], 4)
+        stats["max_queue_wait"] = round(stats["max_queue_wait"], 4)
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        """关闭线程池（已提交的任务执行完后返回）"""
+        self._executor.shutdown(wait=wait)
+
+    # ====================================================================================================
+    # 内部函数
+    # ====================================================================================================
+
+    @staticmethod
+    def _close_iterator(step_lock: threading.Lock, close: Callable[[], Any]):
+        """等正在执行的 next() 返回后关闭迭代器"""
+        with step_lock:
+            try:
+                close()
+            except Exception as e:
+                logger.warning(f"关闭迭代器失败: {e}")
+
+    def _call(self, submitted_at: float, func: Callable, args: tuple, kwargs: Dict[str, Any]):
+        """在工作线程中执行，记录排队时间和并发数"""
+        waited = time.perf_counter() - submitted_at
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+            if self._active > self._stats["peak_active"]:
+                self._stats["peak_active"] = self._active
+            self._stats["queue_wait_time"] += waited
+            if waited > self._stats["max_queue_wait"]:
+                self._stats["max_queue_wait"] = waited
+
+        failed = True
+        try:
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._stats["failed" if failed else "completed"] += 1
+
+
+# 全局缓存工作线程池（缓存操作通过 memory.AsyncMolecularDataManager 使用，上传暂存和推送编码直接使用）
+CACHE_EXECUTOR = CacheExecutor()
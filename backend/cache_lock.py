@@ -0,0 +1,187 @@
+"""
+🔐 ALCHEM_PropBtn 缓存锁模块 (cache_lock.py)
+
+替代原来的全局 threading.Lock：
+- ReadWriteLock: 读者之间互不阻塞，写者独占（写者优先，避免写饥饿）
+- StripedLock: 按node_id分片的互斥锁，同一节点的写操作串行，不同节点互不影响
+
+两者都记录竞争统计（获取次数、等待次数、累计/最大等待时间），
+供 get_cache_status 暴露给监控。
+"""
+
+import time
+import zlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List
+
+
+class _LockStats:
+    """单个锁的竞争统计（调用方负责同步）"""
+
+    __slots__ = ("acquisitions", "contended", "wait_time", "max_wait")
+
+    def __init__(self):
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float, contended: bool):
+        self.acquisitions += 1
+        if contended:
+            self.contended += 1
+            self.wait_time += waited
+            if waited > self.max_wait:
+                self.max_wait = waited
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "wait_time_ms": round(self.wait_time * 1000, 3),
+            "max_wait_ms": round(self.max_wait * 1000, 3)
+        }
+
+
+class ReadWriteLock:
+    """
+    🔐 写者优先的读写锁
+
+    用法：
+        with lock.read():   # 多个读者可以同时持有
+            ...
+        with lock.write():  # 写者独占
+            ...
+
+    兼容旧代码：直接 `with lock:` 等价于 `with lock.read():`。
+    不支持重入，也不支持读锁升级为写锁。
+    """
+
+    def __init__(self, name: str = "cache"):
+        self.name = name
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        self._read_stats = _LockStats()
+        self._write_stats = _LockStats()
+
+    def acquire_read(self):
+        with self._cond:
+            contended = self._writer or self._waiting_writers > 0
+            start = time.perf_counter()
+            while self._writer or self._waiting_writers > 0:
+                self._cond.wait()
+            self._readers += 1
+            self._read_stats.record(time.perf_counter() - start, contended)
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            contended = self._writer or self._readers > 0
+            start = time.perf_counter()
+            self._waiting_writers += 1
+            try:
+                while self._writer or self._readers > 0:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+            self._write_stats.record(time.perf_counter() - start, contended)
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        """获取读锁的上下文管理器"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """获取写锁的上下文管理器"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    # 兼容 `with CACHE_LOCK:` 的旧写法（读锁）
+    def __enter__(self):
+        self.acquire_read()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release_read()
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取读写锁的竞争统计"""
+        with self._cond:
+            return {
+                "name": self.name,
+                "active_readers": self._readers,
+                "writer_active": self._writer,
+                "waiting_writers": self._waiting_writers,
+                "read": self._read_stats.to_dict(),
+                "write": self._write_stats.to_dict()
+            }
+
+
+class StripedLock:
+    """
+    🔐 按key分片的互斥锁
+
+    同一个key总是映射到同一个分片，不同分片之间互不阻塞。
+    """
+
+    def __init__(self, stripes: int = 16):
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(max(1, stripes))]
+        self._stats: List[_LockStats] = [_LockStats() for _ in self._locks]
+
+    def _index(self, key: str) -> int:
+        return zlib.crc32(str(key).encode("utf-8")) % len(self._locks)
+
+    @contextmanager
+    def for_key(self, key: str):
+        """获取key所在分片的锁"""
+        index = self._index(key)
+        lock = self._locks[index]
+
+        contended = not lock.acquire(blocking=False)
+        start = time.perf_counter()
+        if contended:
+            lock.acquire()
+        # 统计在持有分片锁时更新，无需额外同步
+        self._stats[index].record(time.perf_counter() - start, contended)
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取所有分片的汇总竞争统计"""
+        acquisitions = sum(s.acquisitions for s in self._stats)
+        contended = sum(s.contended for s in self._stats)
+        wait_time = sum(s.wait_time for s in self._stats)
+        max_wait = max((s.max_wait for s in self._stats), default=0.0)
+        return {
+            "stripes": len(self._locks),
+            "acquisitions": acquisitions,
+            "contended": contended,
+            "wait_time_ms": round(wait_time * 1000, 3),
+            "max_wait_ms": round(max_wait * 1000, 3),
+            "hottest_stripe_contended": max((s.contended for s in self._stats), default=0)
+        }
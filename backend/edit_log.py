@@ -0,0 +1,196 @@
+"""
+↩️ ALCHEM_PropBtn 编辑日志 (edit_log.py)
+
+edit_molecular_data 不再把完整内容和无限增长的 edit_history 留在条目上，
+而是为每个节点记录一串可逆的增量操作：
+- 每个操作只保存被删除的记录文本、偏移和原子表行（内存与改动大小成正比）
+- 操作放在有界环形缓冲区中，超出上限时丢弃最旧的操作（基线随之前移）
+- 每隔N个操作做一次检查点：固定（retain）该版本内容的blob，
+  撤销/重做到检查点时直接复用内容，不需要拼接和重新哈希
+- 撤销后再做新编辑会丢弃可重做的操作
+
+本模块只管理操作和检查点，内容的拼接和blob引用由 memory.py 负责。
+"""
+
+import time
+from collections import deque, OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
+
+
+class EditOperation:
+    """
+    一个可逆的记录级编辑操作
+
+    目前只有一种操作：remove_record（删除一个原子记录），其逆操作是在原偏移处插回文本。
+    """
+
+    __slots__ = ("seq", "kind", "atom_index", "offset", "text", "row",
+                 "before_hash", "after_hash", "description", "timestamp")
+
+    def __init__(self, kind: str, atom_index: int, offset: int, text: str, row: Tuple,
+                 before_hash: str, after_hash: str, description: str = ""):
+        self.seq = 0
+        self.kind = kind
+        self.atom_index = atom_index
+        self.offset = offset
+        self.text = text
+        self.row = row
+        self.before_hash = before_hash
+        self.after_hash = after_hash
+        self.description = description
+        self.timestamp = time.time()
+
+    @property
+    def nbytes(self) -> int:
+        """操作本身占用的字节数（估算）"""
+        return len(self.text) + 128
+
+    def to_dict(self) -> Dict[str, Any]:
+        """操作摘要（用于 edit_history）"""
+        return {
+            "seq": self.seq,
+            "type": self.kind,
+            "atom_index": self.atom_index,
+            "description": self.description,
+            "timestamp": self.timestamp
+        }
+
+
+class EditLog:
+    """
+    ↩️ 单个节点的编辑日志（有界环形缓冲区 + 周期检查点）
+
+    调用方负责同步（memory.py 在节点分片锁内访问）。
+    返回 content_hash 列表的方法表示调用方需要释放（release）这些检查点blob。
+    """
+
+    def __init__(self, max_ops: int = 100, checkpoint_interval: int = 20):
+        self.max_ops = max(1, max_ops)
+        self.checkpoint_interval = max(0, checkpoint_interval)
+        self._ops: "deque[EditOperation]" = deque()
+        # 已应用的操作数（_ops[:_cursor] 已应用，之后的可以重做）
+        self._cursor = 0
+        self._next_seq = 1
+        # 操作占用的字节数（增量维护）
+        self._nbytes = 0
+        # seq -> 该操作应用后的内容哈希（已retain）
+        self._checkpoints: "OrderedDict[int, str]" = OrderedDict()
+
+    # ====================================================================================================
+    # 记录
+    # ====================================================================================================
+
+    def record(self, op: EditOperation) -> List[str]:
+        """
+        记录一个新操作（会丢弃可重做的操作）
+
+        Returns:
+            需要释放的检查点哈希
+        """
+        released = self._truncate_redo()
+
+        op.seq = self._next_seq
+        self._next_seq += 1
+        self._ops.append(op)
+        self._nbytes += op.nbytes
+        self._cursor = len(self._ops)
+
+        # 超出上限时丢弃最旧的操作（基线前移）
+        while len(self._ops) > self.max_ops:
+            dropped = self._ops.popleft()
+            self._nbytes -= dropped.nbytes
+            self._cursor -= 1
+            content_hash = self._checkpoints.pop(dropped.seq, None)
+            if content_hash is not None:
+                released.append(content_hash)
+        return released
+
+    def wants_checkpoint(self, op: EditOperation) -> bool:
+        """该操作之后是否应该做检查点"""
+        return bool(self.checkpoint_interval) and op.seq % self.checkpoint_interval == 0
+
+    def add_checkpoint(self, op: EditOperation, content_hash: str):
+        """记录检查点（调用方已retain content_hash）"""
+        self._checkpoints[op.seq] = content_hash
+
+    # ====================================================================================================
+    # 撤销 / 重做
+    # ====================================================================================================
+
+    def can_undo(self) -> bool:
+        return self._cursor > 0
+
+    def can_redo(self) -> bool:
+        return self._cursor < len(self._ops)
+
+    def peek_undo(self) -> Optional[EditOperation]:
+        """下一个要撤销的操作"""
+        return self._ops[self._cursor - 1] if self.can_undo() else None
+
+    def peek_redo(self) -> Optional[EditOperation]:
+        """下一个要重做的操作"""
+        return self._ops[self._cursor] if self.can_redo() else None
+
+    def commit_undo(self):
+        """撤销已成功应用"""
+        self._cursor -= 1
+
+    def commit_redo(self):
+        """重做已成功应用"""
+        self._cursor += 1
+
+    def checkpoint_hash(self, seq: int) -> Optional[str]:
+        """seq操作应用后的检查点哈希"""
+        return self._checkpoints.get(seq)
+
+    # ====================================================================================================
+    # 状态
+    # ====================================================================================================
+
+    def get_history(self) -> List[Dict[str, Any]]:
+        """已应用操作的摘要（有界）"""
+        return [op.to_dict() for op in list(self._ops)[:self._cursor]]
+
+    def get_state(self) -> Dict[str, Any]:
+        """日志状态（返回给前端）"""
+        return {
+            "can_undo": self.can_undo(),
+            "can_redo": self.can_redo(),
+            "applied": self._cursor,
+            "redoable": len(self._ops) - self._cursor,
+            "checkpoints": len(self._checkpoints)
+        }
+
+    @property
+    def nbytes(self) -> int:
+        """操作占用的字节数（不含检查点blob）"""
+        return self._nbytes
+
+    def clear(self) -> List[str]:
+        """
+        清空日志
+
+        Returns:
+            需要释放的检查点哈希
+        """
+        released = list(self._checkpoints.values())
+        self._checkpoints.clear()
+        self._ops.clear()
+        self._nbytes = 0
+        self._cursor = 0
+        return released
+
+    # ====================================================================================================
+    # 内部函数
+    # ====================================================================================================
+
+    def _truncate_redo(self) -> List[str]:
+        """丢弃可重做的操作"""
+        released = []
+        while len(self._ops) > self._cursor:
+            dropped = self._ops.pop()
+            self._nbytes -= dropped.nbytes
+            content_hash = self._checkpoints.pop(dropped.seq, None)
+            if content_hash is not None:
+                released.append(content_hash)
+        return released
@@ -7,12 +7,26 @@
 
 import os
 import time
+import uuid
+import atexit
 import threading
-from typing import Dict, Any, Optional
+from itertools import islice, count
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional, List, Tuple, Union, Iterable, Iterator
 import folder_paths
 
 # 使用统一的ALCHEM日志系统
 from .logging_config import get_memory_logger
+from .spill_store import MolecularSpillStore
+from .blob_store import MolecularBlobStore, parse_compression_tiers, compute_content_hash, content_bytes, decode_content
+from .cache_lock import ReadWriteLock, StripedLock
+from .persistence import WriteBehindWriter
+from .snapshot import MolecularSnapshotStore
+from .shared_cache import SharedMolecularCache
+from .atom_table import AtomTable
+from .edit_log import EditLog, EditOperation
+from .response_cache import RESPONSE_CACHE
+from .cache_executor import CACHE_EXECUTOR
 
 # 初始化统一Logger
 logger = get_memory_logger()
@@ -20,379 +34,1888 @@ logger = get_memory_logger()
 # 尝试导入WebSocket通知功能
 try:
     from .websocket_server import notify_molecular_update, notify_molecular_edit, notify_molecular_delete
+    from .websocket_server import notify_molecular_batch_update, notification_dispatcher
     WEBSOCKET_NOTIFY_AVAILABLE = True
     logger.success("WebSocket通知功能加载成功")
 except ImportError as e:
     WEBSOCKET_NOTIFY_AVAILABLE = False
+    notification_dispatcher = None
     logger.warning(f"WebSocket通知功能不可用 - {e}")
     
     # 创建空的异步通知函数，避免代码报错
     async def notify_molecular_update(node_id, data):
         pass
+    async def notify_molecular_batch_update(batch_id, data):
+        pass
     async def notify_molecular_edit(node_id, data):
         pass
-    async def notify_molecular_delete(node_id):
+    async def notify_molecular_delete(node_id, data=None):
         pass
 
-# 全局分子数据缓存 - 简化版本
-MOLECULAR_DATA_CACHE: Dict[str, Dict[str, Any]] = {}
+# ====================================================================================================
+# 缓存容量配置 - 可通过环境变量或 configure_cache() 调整
+# ====================================================================================================
+
+# 缓存字节预算（按Blob存储中去重、压缩后的物理字节计，即 BLOB_STORE.physical_bytes），0表示不限制
+CACHE_MAX_BYTES = int(os.environ.get("ALCHEM_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# 缓存条目上限，0表示不限制
+CACHE_MAX_ENTRIES = int(os.environ.get("ALCHEM_CACHE_MAX_ENTRIES", 1000))
+# 淘汰策略：lru（最近最少使用）或 lfu（最不经常使用，基于access_count/last_accessed）
+CACHE_EVICTION_POLICY = os.environ.get("ALCHEM_CACHE_EVICTION_POLICY", "lru").lower()
+SUPPORTED_EVICTION_POLICIES = ("lru", "lfu")
+if CACHE_EVICTION_POLICY not in SUPPORTED_EVICTION_POLICIES:
+    logger.warning(f"不支持的淘汰策略: {CACHE_EVICTION_POLICY}，使用lru")
+    CACHE_EVICTION_POLICY = "lru"
+
+# 磁盘溢出层：被淘汰的数据写入本地SQLite，未命中时透明取回
+SPILL_ENABLED = os.environ.get("ALCHEM_SPILL_ENABLED", "1") != "0"
+# 磁盘溢出层字节预算，0表示不限制
+SPILL_MAX_BYTES = int(os.environ.get("ALCHEM_SPILL_MAX_BYTES", 4 * 1024 * 1024 * 1024))
+
+SPILL_STORE: Optional[MolecularSpillStore] = None
+if SPILL_ENABLED:
+    SPILL_STORE = MolecularSpillStore(
+        os.path.join(folder_paths.get_input_directory(), ".alchem_cache", f"spill_{os.getpid()}.sqlite3"),
+        max_bytes=SPILL_MAX_BYTES
+    )
+    atexit.register(SPILL_STORE.close)
+
+# 内容静态压缩分级："最小字节数:编解码器"，逗号分隔（zlib/lzma/bz2），"none"表示不压缩
+BLOB_COMPRESSION_TIERS = os.environ.get("ALCHEM_BLOB_COMPRESSION_TIERS", "16384:zlib")
+# 解压热点集合字节上限（最近解压过的内容保持解压状态，加速3D查看）
+BLOB_HOT_SET_MAX_BYTES = int(os.environ.get("ALCHEM_BLOB_HOT_SET_MAX_BYTES", 64 * 1024 * 1024))
+# 编辑产生的新版本延迟压缩的秒数（连续编辑时中间版本不做压缩）
+BLOB_COMPACTION_DELAY = float(os.environ.get("ALCHEM_BLOB_COMPACTION_DELAY", 2.0))
+
+# 内容寻址Blob存储：缓存条目只记录content_hash，相同内容只保留一份
+BLOB_STORE = MolecularBlobStore(
+    compression_tiers=parse_compression_tiers(BLOB_COMPRESSION_TIERS),
+    hot_set_max_bytes=BLOB_HOT_SET_MAX_BYTES,
+    compaction_delay=BLOB_COMPACTION_DELAY
+)
+
+# 文件系统持久化策略：off（不写文件）/ async（后台写回，默认）/ async_fsync（后台写回+fsync）/ sync（同步写入+fsync）
+PERSIST_POLICY = os.environ.get("ALCHEM_PERSIST_POLICY", "async").lower()
+
+# 文件系统写回队列：合并同一文件的重复写入，内容未变化时跳过，进程退出时刷新
+PERSISTENCE_WRITER = WriteBehindWriter(PERSIST_POLICY)
+atexit.register(PERSISTENCE_WRITER.shutdown)
+
+# 缓存快照：定期和退出时把内存缓存写入本地快照，重启后在后台预热恢复
+SNAPSHOT_ENABLED = os.environ.get("ALCHEM_SNAPSHOT_ENABLED", "1") != "0"
+# 定期保存的间隔秒数，0表示只在进程退出时保存
+SNAPSHOT_INTERVAL = float(os.environ.get("ALCHEM_SNAPSHOT_INTERVAL", 60))
+SNAPSHOT_PATH = os.environ.get("ALCHEM_SNAPSHOT_PATH") or os.path.join(
+    folder_paths.get_input_directory(), ".alchem_cache", "snapshot.sqlite3")
+
+SNAPSHOT_STORE: Optional[MolecularSnapshotStore] = None
+if SNAPSHOT_ENABLED:
+    SNAPSHOT_STORE = MolecularSnapshotStore(SNAPSHOT_PATH)
+
+# 🔗 跨进程共享缓存：同一主机上的多个工作进程通过共享内存段 + SQLite索引共享分子数据（默认关闭）
+SHARED_CACHE_ENABLED = os.environ.get("ALCHEM_SHARED_CACHE", "0") == "1"
+SHARED_CACHE_INDEX_PATH = os.environ.get("ALCHEM_SHARED_CACHE_INDEX") or os.path.join(
+    folder_paths.get_input_directory(), ".alchem_cache", "shared_index.sqlite3")
+
+SHARED_CACHE: Optional[SharedMolecularCache] = None
+if SHARED_CACHE_ENABLED:
+    try:
+        SHARED_CACHE = SharedMolecularCache(SHARED_CACHE_INDEX_PATH)
+        atexit.register(SHARED_CACHE.close)
+    except RuntimeError as e:
+        logger.warning(f"跨进程共享缓存不可用 - {e}")
+
+# 全局分子数据缓存 - 按访问顺序排列（最久未访问的在最前面）
+# 注意：条目中不包含content，需通过 get_molecular_data() 获取带内容的数据
+MOLECULAR_DATA_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+# 缓存统计信息 - 在存储/编辑/淘汰时增量维护
+CACHE_STATS: Dict[str, Any] = {
+    "current_bytes": 0,  # 逻辑字节数（各条目内容大小之和，未去重）
+    "evictions": 0,
+    "evicted_bytes": 0,
+    "last_evicted_at": None,
+    "last_evicted_node": None,
+    "spill_promotions": 0,
+    "spill_lost": 0,  # 溢出失败或被磁盘预算丢弃、已从索引中移除的节点数
+    "snapshot_promotions": 0,
+    "expired_tabs": 0,
+    "purged_tab_nodes": 0,
+    "shared_fetches": 0
+}
+
+# 读路径/编辑日志计数：读者并发执行，这些计数用独立的小锁保护，不占用缓存写锁
+COUNTER_LOCK = threading.Lock()
+CACHE_COUNTERS: Dict[str, int] = {
+    "hits": 0,
+    "misses": 0,
+    "edit_log_bytes": 0
+}
+
+# 条目版本号：每次存储/编辑递增，用于HTTP ETag
+# 以毫秒时间戳起始，重启后新版本号不会与快照中恢复的旧版本号重复
+ENTRY_VERSIONS = count(int(time.time() * 1000))
+
+# 支持的编辑类型（单原子编辑，按记录偏移拼接）
+SUPPORTED_EDIT_TYPES = ("remove_last_atom", "remove_atom")
+
+# 编辑日志：每个节点最多保留的可撤销操作数，以及检查点间隔（每N个操作固定一个完整版本）
+EDIT_LOG_MAX_OPS = int(os.environ.get("ALCHEM_EDIT_LOG_MAX_OPS", 100))
+EDIT_CHECKPOINT_INTERVAL = int(os.environ.get("ALCHEM_EDIT_CHECKPOINT_INTERVAL", 20))
+
+# 节点编辑日志: node_id -> EditLog（在节点分片锁内访问）
+EDIT_LOGS: Dict[str, EditLog] = {}
+
+# 🔎 二级索引：覆盖内存、溢出层和启动快照中的所有节点，在CACHE_LOCK写锁内增量维护
+# node_id -> (tab_id, filename, content_hash, format)
+NODE_INDEX: Dict[str, Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]] = {}
+# tab_id -> 该tab下的node_id集合
+TAB_INDEX: Dict[str, set] = {}
+# filename -> node_id集合
+FILENAME_INDEX: Dict[str, set] = {}
+# content_hash -> node_id集合
+HASH_INDEX: Dict[str, set] = {}
+# format -> 节点数
+FORMAT_COUNTS: Dict[str, int] = {}
+# 每个tab最近一次活动（存储/读取/编辑）的时间
+TAB_LAST_ACTIVE: Dict[str, float] = {}
+# Tab空闲超时秒数：超过该时间没有活动的tab整体清除，0表示不过期
+TAB_IDLE_TTL = float(os.environ.get("ALCHEM_TAB_IDLE_TTL", 0))
+# 空闲tab检查的最小间隔秒数（检查在存储路径上顺带进行）
+TAB_TTL_SWEEP_INTERVAL = min(60.0, TAB_IDLE_TTL / 4) if TAB_IDLE_TTL > 0 else 0.0
+_LAST_TAB_SWEEP = 0.0
+
+# 节点列表每页最多条数
+NODE_LIST_MAX_LIMIT = 1000
 
 # 🔑 将被移除：全局活跃tab_id（已被前端传参替代）
 # ACTIVE_TAB_ID: Optional[str] = None  # 已废弃，使用前端传入的_alchem_node_id
 
-# 线程锁，确保缓存操作的线程安全
-CACHE_LOCK = threading.Lock()
+# 🔐 缓存读写锁：读者之间互不阻塞，写者只在修改缓存结构（插入/删除/淘汰）时短暂独占
+# 兼容旧代码：`with CACHE_LOCK:` 等价于 `with CACHE_LOCK.read():`
+CACHE_LOCK = ReadWriteLock("molecular_cache")
+
+# 🔐 按node_id分片的写锁：同一节点的存储/编辑串行执行，
+# 解析、压缩、文件写入等耗时操作只持有分片锁，不阻塞其他节点和读者
+NODE_LOCK_STRIPES = int(os.environ.get("ALCHEM_NODE_LOCK_STRIPES", 16))
+NODE_LOCKS = StripedLock(NODE_LOCK_STRIPES)
+
+# 读路径的访问记录：读者只追加node_id，写者持有写锁时再统一调整LRU顺序
+ACCESS_BUFFER: "deque[str]" = deque(maxlen=4096)
+
+# 已被淘汰、正在写入磁盘溢出层的条目（写入完成前仍可被取回）
+PENDING_SPILLS: Dict[str, Dict[str, Any]] = {}
 
 
 class MolecularDataManager:
     """
     🧪 简化的分子数据内存管理器
     
-    专注于核心功能：
-    1. 存储分子数据到内存缓存
-    2. 从缓存获取分子数据  
-    3. 缓存状态查询
-    4. 缓存清理（调试用）
-    """
+    专注于核心功能：
+    1. 存储分子数据到内存缓存
+    2. 从缓存获取分子数据  
+    3. 缓存状态查询
+    4. 缓存清理（调试用）
+    
+    缓存条目只保存元数据和content_hash，内容存放在BLOB_STORE中，
+    对外返回的数据字典通过 _materialize() 附加content。
+    
+    加锁约定：NODE_LOCKS（分片锁）在外，CACHE_LOCK（读写锁）在内，
+    CACHE_LOCK的写锁只包住O(1)的字典操作和淘汰选择。
+    """
+    
+    @classmethod
+    def store_molecular_data(cls, node_id: str, filename: str, folder: str = "molecules", 
+                           content: Union[str, bytes, memoryview] = None,
+                           content_hash: str = None) -> Optional[Dict[str, Any]]:
+        """
+        存储分子数据到内存缓存
+        
+        Args:
+            node_id: ComfyUI节点的唯一ID
+            filename: 分子文件名
+            folder: 存储文件夹（默认molecules）
+            content: 分子文件内容（上传的原始bytes直接入库，不解码；str按UTF-8保存）
+            content_hash: 预先计算好的内容哈希（流式上传时边接收边计算，可选）
+            
+        Returns:
+            存储的数据字典，失败返回None
+        """
+        try:
+            molecular_data, content = cls._store_entry(node_id, filename, folder, content, content_hash)
+            if molecular_data is None:
+                return None
+            
+            molecular_data = cls._materialize(molecular_data, content)
+            
+            # 🚀 发送WebSocket通知（在所有锁之外）
+            cls._send_notification(notify_molecular_update, node_id, molecular_data, "update")
+            
+            # ⏳ 顺带清除空闲超时的tab（必须在分片锁之外）
+            cls._expire_idle_tabs_if_due()
+            
+            return molecular_data
+            
+        except Exception as e:
+            logger.error(f"存储分子数据时出错: {e}")
+            return None
+    
+    @classmethod
+    def store_molecular_data_batch(cls, items: Iterable[Dict[str, Any]],
+                                   folder: str = "molecules") -> List[Dict[str, Any]]:
+        """
+        批量存储分子数据（批量上传/压缩包上传）
+        
+        逐个存入缓存，但不为每个节点单独发送通知，全部完成后只发送一条合并的WebSocket通知。
+        items可以是生成器：内存中同一时刻只需要持有一个文件的内容。
+        
+        Args:
+            items: 可迭代的 {"node_id", "filename", "content", 可选 "content_hash", "folder"}
+            folder: 默认存储文件夹
+            
+        Returns:
+            与items一一对应的结果：{"node_id", "filename", "success", 成功时附带format/atoms/file_size，失败时附带error}
+        """
+        results = []
+        stored = []
+        for item in items:
+            node_id, filename = item.get("node_id"), item.get("filename")
+            try:
+                data, _ = cls._store_entry(node_id, filename, item.get("folder") or folder,
+                                           item.get("content"), item.get("content_hash"))
+            except Exception as e:
+                logger.error(f"批量存储分子数据时出错: {filename} -> 节点 {node_id} - {e}")
+                data = None
+            
+            if data is None:
+                results.append({"node_id": node_id, "filename": filename, "success": False, "error": "存储失败"})
+                continue
+            summary = {
+                "node_id": node_id,
+                "filename": data.get("filename"),
+                "format": data.get("format"),
+                "atoms": data.get("atoms", 0),
+                "file_size": data.get("file_stats", {}).get("size", 0),
+                "tab_id": data.get("tab_id"),
+                "content_hash": data.get("content_hash"),
+                "cached_at": data.get("cached_at")
+            }
+            stored.append(summary)
+            results.append(dict(summary, success=True))
+        
+        if stored:
+            # 📡 一条合并通知（不含content，客户端按需拉取）
+            cls._send_notification(notify_molecular_batch_update, f"batch_{uuid.uuid4().hex[:12]}",
+                                   {"items": stored}, "batch_update")
+            logger.success(f"批量存储完成: {len(stored)}/{len(results)} 个文件")
+        
+        cls._expire_idle_tabs_if_due()
+        return results
+    
+    @classmethod
+    def _store_entry(cls, node_id: str, filename: str, folder: str, content: Union[str, bytes, memoryview],
+                     content_hash: str = None) -> Tuple[Optional[Dict[str, Any]], Union[str, bytes, None]]:
+        """
+        存储的核心部分：写入缓存和各个缓存层，不发送通知（调用方不应持有任何缓存锁）
+        
+        Returns:
+            (缓存条目的副本, 规范化后的内容)，参数无效时返回 (None, None)
+        """
+        # 验证必需参数
+        if not node_id or not filename:
+            logger.error("存储失败：节点ID和文件名不能为空")
+            return None, None
+        
+        if not content:
+            logger.error("存储失败：文件内容不能为空")
+            return None, None
+        
+        if not isinstance(content, str):
+            content = content_bytes(content)
+        newline = b"\n" if isinstance(content, bytes) else "\n"
+        
+        with NODE_LOCKS.for_key(node_id):
+            # 🔍 调试日志：追踪节点ID格式
+            logger.molecular(f"[DEBUG] 存储分子数据开始:")
+            logger.molecular(f"  - 原始node_id: '{node_id}'")
+            logger.molecular(f"  - node_id类型: {type(node_id)}")
+            logger.molecular(f"  - node_id长度: {len(node_id)}")
+            logger.molecular(f"  - 文件名: {filename}")
+            
+            # 检测基本格式信息
+            file_format = cls._detect_format(filename)
+            
+            # 🔑 提取tab_id（关键新增）
+            tab_id = None
+            if "_node_" in node_id:
+                tab_id = node_id.split("_node_")[0]  # 例如: "workflow_fl40l5"
+                logger.molecular(f"[DEBUG] 解析node_id:")
+                logger.molecular(f"  - 提取的tab_id: '{tab_id}'")
+                logger.molecular(f"  - 分割后的节点部分: '{node_id.split('_node_')[1] if len(node_id.split('_node_')) > 1 else 'None'}")
+            else:
+                logger.warning(f"[DEBUG] node_id格式异常，未包含'_node_': '{node_id}'")
+            
+            # 创建存储数据结构（解析在缓存锁之外进行）
+            molecular_data = {
+                "node_id": node_id,
+                "filename": filename,
+                "folder": folder,
+                "content_hash": None,  # 🔑 指向BLOB_STORE中的内容
+                "format": file_format,
+                "format_name": cls._get_format_name(file_format),
+                "tab_id": tab_id,  # 🔑 新增：Tab标识
+                
+                # 基本统计信息
+                "file_stats": {
+                    "size": len(content),
+                    "lines": content.count(newline) + 1
+                },
+                
+                # 原子计数在内容存入Blob后由原子表得出
+                "atoms": 0,
+                
+                # 缓存管理信息
+                "version": next(ENTRY_VERSIONS),
+                "cached_at": time.time(),
+                "last_accessed": time.time(),
+                "access_count": 0
+            }
+            
+            # 🔑 内容存入Blob存储（哈希和压缩在缓存锁之外，相同内容只保留一份）
+            molecular_data["content_hash"] = BLOB_STORE.put(content, content_hash)
+            
+            # ⚛️ 内容只解析一次：原子表挂在blob上，后续计数/分析/编辑都复用它
+            molecular_data["atoms"] = cls._simple_atom_count(content, file_format, molecular_data["content_hash"])
+            
+            with CACHE_LOCK.write():
+                # 保存到全局缓存（替换旧数据时先扣除旧的字节数并释放旧内容）
+                previous = MOLECULAR_DATA_CACHE.pop(node_id, None)
+                if previous is not None:
+                    CACHE_STATS["current_bytes"] -= cls._entry_size(previous)
+                else:
+                    # 正在溢出的旧数据（字节数在淘汰时已扣除）
+                    previous = PENDING_SPILLS.pop(node_id, None)
+                if previous is not None:
+                    BLOB_STORE.release(previous.get("content_hash"))
+                MOLECULAR_DATA_CACHE[node_id] = molecular_data
+                CACHE_STATS["current_bytes"] += cls._entry_size(molecular_data)
+                cls._index_node(node_id, molecular_data)
+                
+                # 🔑 超出预算时按策略淘汰旧数据（不会淘汰刚存入的节点）
+                victims = cls._evict_if_needed(protect_node_id=node_id)
+                cache_size = len(MOLECULAR_DATA_CACHE)
+            
+            # 磁盘溢出层和启动快照中的旧版本已过期
+            if SPILL_STORE is not None and SPILL_STORE.contains(node_id):
+                SPILL_STORE.remove(node_id)
+            if SNAPSHOT_STORE is not None:
+                SNAPSHOT_STORE.discard(node_id)
+            cls._spill_victims(victims)
+            
+            # 新内容成为新的基线，旧的编辑日志不再适用
+            cls._reset_edit_log(node_id)
+            # 旧版本的预压缩响应不会再被命中，及时释放
+            RESPONSE_CACHE.invalidate(node_id)
+            
+            # 🔍 调试日志：验证存储
+            logger.molecular(f"[DEBUG] 数据已存储到缓存:")
+            logger.molecular(f"  - 缓存key: '{node_id}'")
+            logger.molecular(f"  - 缓存大小: {cache_size}")
+            
+            # 🔑 修复：保存到文件系统时传递节点ID，避免重名文件覆盖
+            # 写入交给后台写回队列，内容未变化时不会重复写
+            try:
+                cls._save_to_filesystem(filename, folder, content, node_id,
+                                        content_hash=molecular_data["content_hash"])
+            except Exception as e:
+                logger.warning(f"文件系统保存失败: {e}")
+            
+            # 🔗 发布到跨进程共享缓存（在分片锁内，保证同一节点的发布顺序与本地一致）
+            cls._publish_shared(node_id, molecular_data, content)
+        
+        logger.success(f"[DEBUG] 分子数据存储成功: {filename} -> 节点 {node_id}")
+        return dict(molecular_data), content
+    
+    @classmethod
+    def get_molecular_data(cls, node_id: str, content_mode: str = "text") -> Optional[Dict[str, Any]]:
+        """
+        从缓存获取分子数据
+        
+        Args:
+            node_id: 节点ID
+            content_mode: "text" 附带解码后的content，"bytes" 附带原始字节，
+                          "none" 只返回元数据（内存命中时完全不读取内容）
+            
+        Returns:
+            分子数据字典，不存在返回None
+        """
+        try:
+            # 🔍 调试日志：追踪数据获取
+            logger.debug(f"[DEBUG] 获取分子数据:")
+            logger.debug(f"  - 请求的node_id: '{node_id}'")
+            
+            # 🔑 读路径：只持有读锁，读者之间互不阻塞
+            with CACHE_LOCK.read():
+                data = MOLECULAR_DATA_CACHE.get(node_id)
+                if data is not None:
+                    cls._record_access(node_id, data)
+                    cls._touch_tab(data.get("tab_id"))
+                    result = dict(data)
+                    # 增加引用，保证锁外解压期间内容不会被并发淘汰释放
+                    BLOB_STORE.retain(result.get("content_hash"))
+            
+            if data is not None:
+                cls._count("hits")
+                # 🔗 其他工作进程更新过共享索引时，校验本地条目是否过期
+                if SHARED_CACHE is not None:
+                    refreshed = cls._refresh_from_shared(node_id, data)
+                    if refreshed is not None:
+                        BLOB_STORE.release(result.get("content_hash"))
+                        return cls._apply_content_mode(refreshed, content_mode)
+                try:
+                    cls._attach_content(result, content_mode)
+                finally:
+                    BLOB_STORE.release(result.get("content_hash"))
+                
+                logger.debug(f"[DEBUG] 找到数据:")
+                logger.debug(f"  - 文件名: {result.get('filename')}")
+                logger.debug(f"  - tab_id: {result.get('tab_id')}")
+                logger.debug(f"  - 访问次数: {result.get('access_count')}")
+                return result
+            
+            # 🔑 内存未命中：尝试从磁盘溢出层（或尚未预热的启动快照、其他工作进程的共享缓存）取回
+            data = cls._promote_from_spill(node_id)
+            if data is not None:
+                cls._count("hits")
+                return cls._apply_content_mode(data, content_mode)
+            
+            cls._count("misses")
+            logger.warning(f"[DEBUG] 节点 '{node_id}' 的数据不存在!")
+            return None
+                
+        except Exception as e:
+            logger.error(f"获取分子数据时出错: {e}")
+            return None
+    
+    @classmethod
+    def get_molecular_version(cls, node_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取内存中条目的版本信息（不读取内容，用于条件请求的快速路径）
+        
+        Returns:
+            {"node_id", "content_hash", "version"}；节点不在内存中或共享缓存中有更新版本时返回None，
+            调用方应回退到 get_molecular_data()
+        """
+        with CACHE_LOCK.read():
+            data = MOLECULAR_DATA_CACHE.get(node_id)
+            if data is None:
+                return None
+            if SHARED_CACHE is not None and data.get("shared_generation") != SHARED_CACHE.generation():
+                return None
+            cls._record_access(node_id, data)
+            cls._touch_tab(data.get("tab_id"))
+            version = {"node_id": node_id, "content_hash": data.get("content_hash"), "version": data.get("version")}
+        cls._count("hits")
+        return version
+    
+    @classmethod
+    def get_molecular_data_batch(cls, node_ids: Iterable[str],
+                                 content_mode: str = "text") -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """
+        批量获取分子数据（打开工作流时一次取回所有显示节点）
+        
+        只获取一次读锁复制所有内存中条目的元数据，内容在逐个产出时才解压，
+        调用方可以边取边发送；内存未命中的节点按 get_molecular_data 的路径从其他缓存层取回。
+        
+        Args:
+            node_ids: 节点ID列表（重复的ID只返回一次）
+            content_mode: 同 get_molecular_data
+        
+        Yields:
+            (node_id, 分子数据字典或None)，按node_ids的顺序
+        """
+        node_ids = list(dict.fromkeys(node_id for node_id in node_ids if node_id))
+        resident: Dict[str, Dict[str, Any]] = {}
+        with CACHE_LOCK.read():
+            for node_id in node_ids:
+                data = MOLECULAR_DATA_CACHE.get(node_id)
+                if data is not None:
+                    cls._record_access(node_id, data)
+                    cls._touch_tab(data.get("tab_id"))
+                    resident[node_id] = dict(data)
+                    # 增加引用，保证产出之前内容不会被并发淘汰释放
+                    BLOB_STORE.retain(data.get("content_hash"))
+        
+        try:
+            for node_id in node_ids:
+                result = resident.pop(node_id, None)
+                if result is None:
+                    yield node_id, cls.get_molecular_data(node_id, content_mode)
+                    continue
+                
+                cls._count("hits")
+                try:
+                    refreshed = cls._refresh_from_shared(node_id, result) if SHARED_CACHE is not None else None
+                    if refreshed is None:
+                        cls._attach_content(result, content_mode)
+                finally:
+                    BLOB_STORE.release(result.get("content_hash"))
+                yield node_id, cls._apply_content_mode(refreshed, content_mode) if refreshed is not None else result
+        finally:
+            # 调用方中途停止迭代时释放剩余的引用
+            for result in resident.values():
+                BLOB_STORE.release(result.get("content_hash"))
+    
+    @classmethod
+    def get_cache_status(cls, include_nodes: bool = False) -> Dict[str, Any]:
+        """
+        获取缓存状态统计
+        
+        所有计数都是在存储/编辑/淘汰时增量维护的，不遍历缓存条目；
+        节点列表请使用分页的 list_cache_nodes()。
+        
+        Args:
+            include_nodes: 是否附带第一页节点列表（兼容旧调用，默认不附带）
+            
+        Returns:
+            缓存状态字典
+        """
+        try:
+            with CACHE_LOCK.read():
+                total_nodes = len(MOLECULAR_DATA_CACHE)
+                total_cache_size = CACHE_STATS["current_bytes"]
+                
+                eviction_stats = {
+                    "evictions": CACHE_STATS["evictions"],
+                    "evicted_bytes": CACHE_STATS["evicted_bytes"],
+                    "last_evicted_at": CACHE_STATS["last_evicted_at"],
+                    "last_evicted_node": CACHE_STATS["last_evicted_node"]
+                }
+                spill_promotions = CACHE_STATS["spill_promotions"]
+                snapshot_promotions = CACHE_STATS["snapshot_promotions"]
+                shared_fetches = CACHE_STATS["shared_fetches"]
+                index_stats = {
+                    "nodes": len(NODE_INDEX),
+                    "tabs": len(TAB_INDEX),
+                    "filenames": len(FILENAME_INDEX),
+                    "content_hashes": len(HASH_INDEX)
+                }
+                tab_stats = {
+                    "tabs": len(TAB_INDEX),
+                    "idle_ttl": TAB_IDLE_TTL,
+                    "expired_tabs": CACHE_STATS["expired_tabs"],
+                    "purged_nodes": CACHE_STATS["purged_tab_nodes"],
+                    # 每个tab的节点数（与tab数成正比，不遍历节点）
+                    "nodes_per_tab": {tab_id: len(node_ids) for tab_id, node_ids in TAB_INDEX.items()}
+                }
+                format_counts = dict(FORMAT_COUNTS)
+            
+            with COUNTER_LOCK:
+                counters = dict(CACHE_COUNTERS)
+            lookups = counters["hits"] + counters["misses"]
+            
+            status = {
+                "total_nodes": total_nodes,
+                "total_cache_size": total_cache_size,
+                "status": "active" if total_nodes > 0 else "empty",
+                # 🔑 容量与淘汰统计
+                "limits": {
+                    "max_bytes": CACHE_MAX_BYTES,
+                    "max_entries": CACHE_MAX_ENTRIES,
+                    "eviction_policy": CACHE_EVICTION_POLICY
+                },
+                "eviction": eviction_stats,
+                # 📊 命中率与按格式统计
+                "lookups": {
+                    "hits": counters["hits"],
+                    "misses": counters["misses"],
+                    "hit_rate": round(counters["hits"] / lookups, 4) if lookups else None
+                },
+                "formats": format_counts,
+                "spill": dict(
+                    SPILL_STORE.get_stats() if SPILL_STORE is not None else {"enabled": False},
+                    promotions=spill_promotions
+                ),
+                # 🔑 去重效果：逻辑字节（各节点内容之和）vs 物理字节（实际占用）
+                "logical_bytes": total_cache_size,
+                "physical_bytes": BLOB_STORE.physical_bytes,
+                "blob": BLOB_STORE.get_stats(),
+                # 🔐 锁竞争统计
+                "locks": {
+                    "cache": CACHE_LOCK.get_stats(),
+                    "node_stripes": NODE_LOCKS.get_stats()
+                },
+                "persistence": PERSISTENCE_WRITER.get_stats(),
+                "snapshot": dict(
+                    SNAPSHOT_STORE.get_stats() if SNAPSHOT_STORE is not None else {"enabled": False},
+                    promotions=snapshot_promotions,
+                    interval=SNAPSHOT_INTERVAL
+                ),
+                "shared": dict(SHARED_CACHE.get_stats(), fetches=shared_fetches)
+                          if SHARED_CACHE is not None else {"enabled": False},
+                "tabs": tab_stats,
+                "indexes": index_stats,
+                "edit_logs": {
+                    "nodes": len(EDIT_LOGS),
+                    "ops_bytes": counters["edit_log_bytes"],
+                    "max_ops": EDIT_LOG_MAX_OPS,
+                    "checkpoint_interval": EDIT_CHECKPOINT_INTERVAL
+                },
+                "notifications": notification_dispatcher.get_stats() if WEBSOCKET_NOTIFY_AVAILABLE else None
+            }
+            
+            if include_nodes:
+                status["nodes"] = cls.list_cache_nodes()["nodes"]
+            
+            return status
+            
+        except Exception as e:
+            logger.error(f"获取缓存状态时出错: {e}")
+            return {"error": str(e)}
+    
+    @classmethod
+    def list_cache_nodes(cls, offset: int = 0, limit: int = 100, tab_id: str = None) -> Dict[str, Any]:
+        """
+        分页列出缓存中的节点摘要（内存、磁盘溢出层和启动快照）
+        
+        按索引顺序（最近存入或编辑的节点在后面；指定tab_id时按node_id排序），只访问当前页的节点。
+        
+        Args:
+            offset: 起始位置
+            limit: 每页条数（最多 NODE_LIST_MAX_LIMIT）
+            tab_id: 只列出该tab的节点
+            
+        Returns:
+            {"total", "offset", "limit", "nodes"}
+        """
+        offset = max(0, int(offset or 0))
+        limit = max(1, min(int(limit or NODE_LIST_MAX_LIMIT), NODE_LIST_MAX_LIMIT))
+        
+        with CACHE_LOCK.read():
+            if tab_id is not None:
+                node_ids = sorted(TAB_INDEX.get(tab_id, ()))
+                total = len(node_ids)
+                page = node_ids[offset:offset + limit]
+            else:
+                total = len(NODE_INDEX)
+                page = list(islice(NODE_INDEX, offset, offset + limit))
+            
+            summaries = {}
+            for node_id in page:
+                data = MOLECULAR_DATA_CACHE.get(node_id) or PENDING_SPILLS.get(node_id)
+                if data is not None:
+                    summaries[node_id] = cls._node_summary(node_id, data, "memory")
+        
+        # 不在内存中的节点：从溢出层/快照的内存索引中取摘要
+        for node_id in page:
+            if node_id in summaries:
+                continue
+            info = SPILL_STORE.get_info(node_id) if SPILL_STORE is not None else None
+            if info is not None:
+                summaries[node_id] = cls._node_summary(node_id, info, "disk")
+                continue
+            info = SNAPSHOT_STORE.get_metadata(node_id) if SNAPSHOT_STORE is not None else None
+            if info is not None:
+                summaries[node_id] = cls._node_summary(node_id, info, "snapshot")
+        
+        nodes = [summaries[node_id] for node_id in page if node_id in summaries]
+        return {"total": total, "offset": offset, "limit": limit, "nodes": nodes}
+    
+    @staticmethod
+    def _node_summary(node_id: str, data: Dict[str, Any], tier: str) -> Dict[str, Any]:
+        """节点列表中的一项"""
+        return {
+            "node_id": node_id,
+            "filename": data.get("filename"),
+            "format": data.get("format"),
+            "atoms": data.get("atoms", 0),
+            "tab_id": data.get("tab_id"),  # 🔑 新增：Tab标识
+            "cached_at": data.get("cached_at"),
+            "access_count": data.get("access_count", 0),
+            "tier": tier
+        }
+    
+    @staticmethod
+    def _count(name: str, delta: int = 1):
+        """更新读路径/编辑日志计数"""
+        with COUNTER_LOCK:
+            CACHE_COUNTERS[name] += delta
+    
+    @classmethod
+    def edit_molecular_data(cls, node_id: str, edit_type: str, **kwargs) -> Optional[Dict[str, Any]]:
+        """
+        编辑分子数据（简单版本，用于概念验证）
+        
+        编辑以可逆的增量操作记入节点的编辑日志，可通过 undo_edit / redo_edit 撤销和重做
+        
+        Args:
+            node_id: 节点ID
+            edit_type: 编辑类型（'remove_last_atom' 或 'remove_atom'）
+            **kwargs: 编辑参数（remove_atom 需要 atom_index）
+            
+        Returns:
+            编辑后的数据字典，失败或非PDB格式返回None
+        """
+        # 🔧 调试：显示编辑参数
+        logger.debug(f"[DEBUG] 编辑分子数据:")
+        logger.debug(f"  - 目标node_id: '{node_id}'")
+        logger.debug(f"  - 编辑类型: {edit_type}")
+        
+        if edit_type not in SUPPORTED_EDIT_TYPES:
+            logger.warning(f"不支持的编辑类型: {edit_type}")
+            return None
+        
+        def remove_atom(content: str, atom_table: AtomTable, file_format: str, old_hash: str, edit_log: EditLog):
+            # 🧪 单原子编辑：按原子表的记录偏移拼接内容，新内容的原子表由旧表直接推导
+            atom_index = len(atom_table) - 1 if edit_type == "remove_last_atom" else kwargs.get("atom_index")
+            edited = cls._remove_atom_record(content, atom_table, atom_index)
+            if edited is None:
+                return None
+            edited_content, edited_table = edited
+            
+            description = "删除最后一个原子" if edit_type == "remove_last_atom" else f"删除第 {atom_index + 1} 个原子"
+            new_hash = BLOB_STORE.put(edited_content, defer_compression=True)
+            BLOB_STORE.set_derived(new_hash, f"atom_table:{file_format}", edited_table)
+            
+            # 只记录被删除的文本和原子字段，内存与改动大小成正比
+            low, high = atom_table.removal_range(content, atom_index)
+            operation = EditOperation("remove_record", atom_index, low, content[low:high],
+                                      atom_table.get_row(atom_index), old_hash, new_hash, description)
+            
+            def commit_log():
+                for content_hash in edit_log.record(operation):
+                    BLOB_STORE.release(content_hash)
+                if edit_log.wants_checkpoint(operation) and BLOB_STORE.retain(new_hash):
+                    edit_log.add_checkpoint(operation, new_hash)
+            
+            return edited_content, edited_table, new_hash, description, commit_log
+        
+        return cls._apply_edit(node_id, edit_type, remove_atom)
+    
+    @classmethod
+    def undo_edit(cls, node_id: str) -> Optional[Dict[str, Any]]:
+        """
+        撤销节点最近一次编辑
+        
+        Returns:
+            撤销后的数据字典，没有可撤销的编辑返回None
+        """
+        def undo(content: str, atom_table: AtomTable, file_format: str, old_hash: str, edit_log: EditLog):
+            operation = edit_log.peek_undo()
+            if operation is None:
+                return None
+            if operation.after_hash != old_hash:
+                # 内容已被其他途径替换，日志不再适用
+                cls._reset_edit_log(node_id)
+                return None
+            
+            restored = cls._restore_version(
+                operation.before_hash, file_format,
+                lambda: atom_table.insert_record(content, operation.atom_index, operation.offset,
+                                                 operation.text, operation.row)
+            )
+            return restored + (f"撤销: {operation.description}", edit_log.commit_undo)
+        
+        return cls._apply_edit(node_id, "undo", undo)
+    
+    @classmethod
+    def redo_edit(cls, node_id: str) -> Optional[Dict[str, Any]]:
+        """
+        重做节点最近一次撤销的编辑
+        
+        Returns:
+            重做后的数据字典，没有可重做的编辑返回None
+        """
+        def redo(content: str, atom_table: AtomTable, file_format: str, old_hash: str, edit_log: EditLog):
+            operation = edit_log.peek_redo()
+            if operation is None:
+                return None
+            if operation.before_hash != old_hash:
+                cls._reset_edit_log(node_id)
+                return None
+            
+            restored = cls._restore_version(
+                operation.after_hash, file_format,
+                lambda: atom_table.remove_record(content, operation.atom_index)
+            )
+            return restored + (f"重做: {operation.description}", edit_log.commit_redo)
+        
+        return cls._apply_edit(node_id, "redo", redo)
+    
+    @classmethod
+    def _apply_edit(cls, node_id: str, edit_type: str, compute) -> Optional[Dict[str, Any]]:
+        """
+        编辑/撤销/重做的公共流程
+        
+        compute(content, atom_table, file_format, old_hash, edit_log) 在缓存锁之外执行，返回
+        (新内容, 新原子表, 新哈希(已持有一个引用), 描述, 成功后更新日志的回调)，无法执行时返回None
+        """
+        try:
+            with NODE_LOCKS.for_key(node_id):
+                with CACHE_LOCK.read():
+                    molecular_data = MOLECULAR_DATA_CACHE.get(node_id)
+                    if molecular_data is not None:
+                        old_hash = molecular_data.get("content_hash")
+                        # 编辑期间保持旧内容存活（条目可能被并发淘汰）
+                        BLOB_STORE.retain(old_hash)
+                
+                if molecular_data is None:
+                    if cls._promote_from_spill_locked(node_id) is None:
+                        logger.warning(f"节点 {node_id} 的数据不存在，无法编辑")
+                        return None
+                    with CACHE_LOCK.read():
+                        molecular_data = MOLECULAR_DATA_CACHE[node_id]
+                        old_hash = molecular_data.get("content_hash")
+                        BLOB_STORE.retain(old_hash)
+                
+                try:
+                    original_content = BLOB_STORE.get(old_hash) or ""
+                    file_format = molecular_data.get("format", "")
+                    edit_log = EDIT_LOGS.get(node_id)
+                    if edit_log is None:
+                        edit_log = EditLog(EDIT_LOG_MAX_OPS, EDIT_CHECKPOINT_INTERVAL)
+                    log_bytes = edit_log.nbytes
+                    
+                    logger.molecular(f"开始编辑: {edit_type}, 原始内容长度: {len(original_content)}")
+                    atom_table = cls._atom_table_for_blob(old_hash, original_content, file_format)
+                    computed = compute(original_content, atom_table, file_format, old_hash, edit_log)
+                    
+                    if computed is None:
+                        logger.warning(f"编辑无效果: 节点 {node_id}")
+                        return None
+                    edited_content, edited_table, new_hash, description, commit_log = computed
+                    logger.molecular(f"编辑完成: 新内容长度: {len(edited_content)}")
+                    
+                    commit_log()
+                    cls._count("edit_log_bytes", edit_log.nbytes - log_bytes)
+                    
+                    with CACHE_LOCK.write():
+                        stale_spill = cls._reclaim_entry(node_id, molecular_data)
+                        EDIT_LOGS[node_id] = edit_log
+                        
+                        # 更新数据（同步维护字节统计）
+                        CACHE_STATS["current_bytes"] += len(edited_content) - cls._entry_size(molecular_data)
+                        molecular_data["content_hash"] = new_hash
+                        BLOB_STORE.release(old_hash)
+                        molecular_data["file_stats"] = {
+                            "size": len(edited_content),
+                            "lines": edited_table.total_lines
+                        }
+                        molecular_data["atoms"] = len(edited_table)
+                        molecular_data["last_edited"] = time.time()
+                        molecular_data["version"] = next(ENTRY_VERSIONS)
+                        # 🔑 编辑历史来自有界的编辑日志，不再无限增长
+                        molecular_data["edit_history"] = edit_log.get_history()
+                        molecular_data["edit_state"] = edit_log.get_state()
+                        cls._index_node(node_id, molecular_data)
+                        cls._touch_tab(molecular_data.get("tab_id"))
+                        victims = cls._evict_if_needed(protect_node_id=node_id)
+                    
+                    if stale_spill and SPILL_STORE is not None:
+                        SPILL_STORE.remove(node_id)
+                    cls._spill_victims(victims)
+                    RESPONSE_CACHE.invalidate(node_id)
+                    cls._publish_shared(node_id, molecular_data, edited_content)
+                    
+                    result = cls._materialize(molecular_data, edited_content)
+                finally:
+                    BLOB_STORE.release(old_hash)
+            
+            logger.success(f"编辑成功: 节点 {node_id} {description}")
+            
+            # 🚀 发送WebSocket编辑通知（在所有锁之外）
+            edit_info = {
+                "edit_type": edit_type,
+                "description": description,
+                "atoms_count": result["atoms"],
+                "can_undo": result["edit_state"]["can_undo"],
+                "can_redo": result["edit_state"]["can_redo"],
+                "timestamp": time.time()
+            }
+            cls._send_notification(notify_molecular_edit, node_id, edit_info, "edit")
+            
+            return result
+                
+        except Exception as e:
+            logger.error(f"编辑分子数据时出错: {e}")
+            return None
+    
+    @classmethod
+    def _restore_version(cls, content_hash: str, file_format: str, rebuild) -> Tuple[str, AtomTable, str]:
+        """
+        切换到编辑日志中记录的某个版本
+        
+        该版本的blob仍然存在（例如是检查点或被其他节点引用）时直接复用，
+        否则用 rebuild() 对当前内容做一次拼接得到 (内容, 原子表)，还原为该版本的原始字节后存入
+        
+        Returns:
+            (内容, 原子表, 哈希)，哈希上已持有一个引用
+        """
+        table_key = f"atom_table:{file_format}"
+        if BLOB_STORE.retain(content_hash):
+            content = BLOB_STORE.get(content_hash)
+            atom_table = BLOB_STORE.get_derived(content_hash, table_key, lambda: rebuild()[1])
+            return content, atom_table, content_hash
+        
+        content, atom_table = rebuild()
+        data = content_bytes(content)
+        if compute_content_hash(data) != content_hash:
+            # 原始字节不是合法UTF-8时是按latin-1解码的（decode_content），按latin-1编码才能还原
+            try:
+                data = content.encode("latin-1")
+            except UnicodeEncodeError:
+                pass
+            if compute_content_hash(data) != content_hash:
+                # 无法还原出记录的字节：按实际内容重新计算哈希，保证blob的字节与哈希一致
+                logger.warning(f"编辑日志版本 {content_hash[:12]} 无法按原始字节还原，重新计算哈希")
+                content_hash = None
+        content_hash = BLOB_STORE.put(data, content_hash=content_hash, defer_compression=True)
+        BLOB_STORE.set_derived(content_hash, table_key, atom_table)
+        return content, atom_table, content_hash
+    
+    @staticmethod
+    def _reset_edit_log(node_id: str = None):
+        """丢弃节点（None表示所有节点）的编辑日志并释放检查点（调用方持有对应的节点锁）"""
+        node_ids = [node_id] if node_id else list(EDIT_LOGS.keys())
+        for key in node_ids:
+            edit_log = EDIT_LOGS.pop(key, None)
+            if edit_log is not None:
+                MolecularDataManager._count("edit_log_bytes", -edit_log.nbytes)
+                for content_hash in edit_log.clear():
+                    BLOB_STORE.release(content_hash)
+    
+    @classmethod
+    def clear_cache(cls, node_id: str = None) -> bool:
+        """
+        清除缓存数据（调试用）
+        
+        Args:
+            node_id: 指定节点ID，None则清除所有
+            
+        Returns:
+            是否成功
+        """
+        try:
+            if node_id:
+                with NODE_LOCKS.for_key(node_id):
+                    with CACHE_LOCK.write():
+                        removed = MOLECULAR_DATA_CACHE.pop(node_id, None)
+                        if removed is not None:
+                            CACHE_STATS["current_bytes"] -= cls._entry_size(removed)
+                        else:
+                            # 正在溢出的数据（字节数在淘汰时已扣除）
+                            removed = PENDING_SPILLS.pop(node_id, None)
+                        if removed is not None:
+                            BLOB_STORE.release(removed.get("content_hash"))
+                        cls._unindex_node(node_id)
+                    
+                    spilled = SPILL_STORE is not None and SPILL_STORE.remove(node_id)
+                    if SNAPSHOT_STORE is not None and SNAPSHOT_STORE.discard(node_id):
+                        spilled = True
+                    if SHARED_CACHE is not None and SHARED_CACHE.remove(node_id):
+                        spilled = True
+                    cls._reset_edit_log(node_id)
+                    RESPONSE_CACHE.invalidate(node_id)
+                
+                if removed is not None:
+                    logger.storage(f"清除节点 {node_id} 的缓存")
+                    return True
+                elif spilled:
+                    logger.storage(f"清除节点 {node_id} 的磁盘溢出/快照数据")
+                    return True
+                else:
+                    logger.warning(f"节点 {node_id} 不存在")
+                    return False
+            else:
+                with CACHE_LOCK.write():
+                    # 逐个释放引用（而不是清空BLOB_STORE），进行中的编辑持有的引用不受影响
+                    for entry in list(MOLECULAR_DATA_CACHE.values()) + list(PENDING_SPILLS.values()):
+                        BLOB_STORE.release(entry.get("content_hash"))
+                    MOLECULAR_DATA_CACHE.clear()
+                    PENDING_SPILLS.clear()
+                    ACCESS_BUFFER.clear()
+                    for index in (NODE_INDEX, TAB_INDEX, FILENAME_INDEX, HASH_INDEX, FORMAT_COUNTS, TAB_LAST_ACTIVE):
+                        index.clear()
+                    CACHE_STATS["current_bytes"] = 0
+                
+                if SPILL_STORE is not None:
+                    SPILL_STORE.clear()
+                if SNAPSHOT_STORE is not None:
+                    SNAPSHOT_STORE.discard()
+                if SHARED_CACHE is not None:
+                    SHARED_CACHE.remove()
+                cls._reset_edit_log()
+                RESPONSE_CACHE.invalidate()
+                logger.storage("清除所有缓存")
+                return True
+                
+        except Exception as e:
+            logger.error(f"清除缓存时出错: {e}")
+            return False
+    
+    @staticmethod
+    def has_node(node_id: str) -> bool:
+        """节点是否在缓存中（任一层），O(1)，不读取内容"""
+        return node_id in NODE_INDEX
+    
+    @staticmethod
+    def find_nodes(filename: str = None, content_hash: str = None, tab_id: str = None) -> List[str]:
+        """
+        按文件名/内容哈希/tab查找节点（条件取交集），只访问索引
+        
+        Returns:
+            匹配的node_id列表（按node_id排序）
+        """
+        conditions = [(FILENAME_INDEX, filename), (HASH_INDEX, content_hash), (TAB_INDEX, tab_id)]
+        conditions = [(index, key) for index, key in conditions if key is not None]
+        if not conditions:
+            return []
+        
+        with CACHE_LOCK.read():
+            candidates = [index.get(key, ()) for index, key in conditions]
+            # 从最小的集合开始求交集
+            candidates.sort(key=len)
+            matched = set(candidates[0])
+            for node_ids in candidates[1:]:
+                matched &= node_ids
+        return sorted(matched)
+    
+    @classmethod
+    def update_tab_id(cls, node_id: str, tab_id: str) -> bool:
+        """
+        修改内存中节点的tab_id，并同步更新TAB_INDEX等二级索引
+        
+        Returns:
+            节点在内存缓存中并已更新返回True，节点数据尚不存在返回False
+        """
+        with NODE_LOCKS.for_key(node_id):
+            with CACHE_LOCK.write():
+                entry = MOLECULAR_DATA_CACHE.get(node_id)
+                if entry is None:
+                    return False
+                if entry.get("tab_id") != tab_id:
+                    entry["tab_id"] = tab_id
+                    cls._index_node(node_id, entry)
+                return True
+    
+    @classmethod
+    def find_molecular_data(cls, filename: str = None, content_hash: str = None,
+                            tab_id: str = None) -> Optional[Dict[str, Any]]:
+        """
+        按索引查找并返回第一个匹配节点的分子数据（带content）
+        
+        Returns:
+            分子数据字典，没有匹配返回None
+        """
+        for node_id in cls.find_nodes(filename, content_hash, tab_id):
+            data = cls.get_molecular_data(node_id)
+            if data is not None:
+                return data
+        return None
+    
+    @classmethod
+    def purge_tab(cls, tab_id: str) -> Dict[str, Any]:
+        """
+        清除一个tab下的所有节点（内存、磁盘溢出层和启动快照），只访问该tab的节点
+        
+        Args:
+            tab_id: Tab标识，如 "workflow_nv6wm"
+            
+        Returns:
+            {"tab_id", "purged", "node_ids"}
+        """
+        with CACHE_LOCK.read():
+            node_ids = list(TAB_INDEX.get(tab_id, ()))
+        
+        # 逐个节点清除（每个节点只持有自己的分片锁）
+        purged = [node_id for node_id in node_ids if cls.clear_cache(node_id)]
+        
+        with CACHE_LOCK.write():
+            if not TAB_INDEX.get(tab_id):
+                TAB_INDEX.pop(tab_id, None)
+                TAB_LAST_ACTIVE.pop(tab_id, None)
+            CACHE_STATS["purged_tab_nodes"] += len(purged)
+        
+        logger.storage(f"清除tab {tab_id}: {len(purged)} 个节点")
+        return {"tab_id": tab_id, "purged": len(purged), "node_ids": purged}
+    
+    @classmethod
+    def expire_idle_tabs(cls, now: float = None) -> List[str]:
+        """
+        清除超过 TAB_IDLE_TTL 没有活动的tab
+        
+        Returns:
+            被清除的tab_id列表
+        """
+        if TAB_IDLE_TTL <= 0:
+            return []
+        
+        now = now if now is not None else time.time()
+        with CACHE_LOCK.read():
+            # 复制一份再遍历：其他读者可能同时在 _touch_tab 中更新时间
+            idle_tabs = [tab_id for tab_id, last_active in list(TAB_LAST_ACTIVE.items())
+                         if now - last_active > TAB_IDLE_TTL]
+        
+        for tab_id in idle_tabs:
+            result = cls.purge_tab(tab_id)
+            logger.storage(f"tab {tab_id} 空闲超过 {TAB_IDLE_TTL} 秒，已清除 {result['purged']} 个节点")
+        
+        if idle_tabs:
+            with CACHE_LOCK.write():
+                CACHE_STATS["expired_tabs"] += len(idle_tabs)
+        return idle_tabs
+    
+    @classmethod
+    def _expire_idle_tabs_if_due(cls):
+        """距离上次检查超过 TAB_TTL_SWEEP_INTERVAL 时清除空闲tab（调用方不应持有任何锁）"""
+        global _LAST_TAB_SWEEP
+        
+        if TAB_IDLE_TTL <= 0:
+            return
+        now = time.time()
+        if now - _LAST_TAB_SWEEP < TAB_TTL_SWEEP_INTERVAL:
+            return
+        _LAST_TAB_SWEEP = now
+        try:
+            cls.expire_idle_tabs(now)
+        except Exception as e:
+            logger.warning(f"清除空闲tab失败: {e}")
+    
+    @classmethod
+    def _index_node(cls, node_id: str, entry: Dict[str, Any]):
+        """
+        把节点加入（或更新）二级索引（调用方必须已持有CACHE_LOCK写锁）
+        
+        存储、编辑和快照加载时调用；淘汰到溢出层不改变索引。
+        """
+        keys = (entry.get("tab_id"), entry.get("filename"), entry.get("content_hash"), entry.get("format"))
+        old_keys = NODE_INDEX.get(node_id)
+        if old_keys == keys:
+            return
+        if old_keys is not None:
+            cls._unindex_node(node_id)
+        
+        NODE_INDEX[node_id] = keys
+        for index, key in zip((TAB_INDEX, FILENAME_INDEX, HASH_INDEX), keys):
+            if key is not None:
+                index.setdefault(key, set()).add(node_id)
+        FORMAT_COUNTS[keys[3]] = FORMAT_COUNTS.get(keys[3], 0) + 1
+        if keys[0] is not None:
+            TAB_LAST_ACTIVE[keys[0]] = time.time()
+    
+    @staticmethod
+    def _unindex_node(node_id: str):
+        """把节点从二级索引中移除（调用方必须已持有CACHE_LOCK写锁）"""
+        keys = NODE_INDEX.pop(node_id, None)
+        if keys is None:
+            return
+        for index, key in zip((TAB_INDEX, FILENAME_INDEX, HASH_INDEX), keys):
+            node_ids = index.get(key)
+            if node_ids is None:
+                continue
+            node_ids.discard(node_id)
+            if not node_ids:
+                del index[key]
+                if index is TAB_INDEX:
+                    TAB_LAST_ACTIVE.pop(key, None)
+        FORMAT_COUNTS[keys[3]] -= 1
+        if not FORMAT_COUNTS[keys[3]]:
+            del FORMAT_COUNTS[keys[3]]
+    
+    @staticmethod
+    def _touch_tab(tab_id: Optional[str]):
+        """
+        记录tab活动时间（读锁内也可以调用）
+        
+        只更新已有的key，不改变字典大小；新tab由 _index_node 在写锁内加入。
+        """
+        if tab_id is not None and tab_id in TAB_LAST_ACTIVE:
+            TAB_LAST_ACTIVE[tab_id] = time.time()
+    
+    @classmethod
+    def configure_cache(cls, max_bytes: int = None, max_entries: int = None,
+                        eviction_policy: str = None) -> Dict[str, Any]:
+        """
+        调整缓存容量配置，调整后立即按新预算淘汰
+        
+        Args:
+            max_bytes: 字节预算（去重、压缩后的物理字节），0表示不限制
+            max_entries: 条目上限，0表示不限制
+            eviction_policy: 淘汰策略（'lru' 或 'lfu'）
+            
+        Returns:
+            当前生效的配置
+        """
+        global CACHE_MAX_BYTES, CACHE_MAX_ENTRIES, CACHE_EVICTION_POLICY
+        
+        with CACHE_LOCK.write():
+            if max_bytes is not None:
+                CACHE_MAX_BYTES = max(0, int(max_bytes))
+            if max_entries is not None:
+                CACHE_MAX_ENTRIES = max(0, int(max_entries))
+            if eviction_policy is not None:
+                policy = eviction_policy.lower()
+                if policy in SUPPORTED_EVICTION_POLICIES:
+                    CACHE_EVICTION_POLICY = policy
+                else:
+                    logger.warning(f"不支持的淘汰策略: {eviction_policy}，保持 {CACHE_EVICTION_POLICY}")
+            
+            victims = cls._evict_if_needed()
+        
+        cls._spill_victims(victims)
+        logger.storage(f"缓存配置更新: max_bytes={CACHE_MAX_BYTES}, max_entries={CACHE_MAX_ENTRIES}, "
+                       f"policy={CACHE_EVICTION_POLICY}, 淘汰 {len(victims)} 个节点")
+        
+        return {
+            "max_bytes": CACHE_MAX_BYTES,
+            "max_entries": CACHE_MAX_ENTRIES,
+            "eviction_policy": CACHE_EVICTION_POLICY
+        }
+    
+    # ====================================================================================================
+    # 缓存淘汰 - 标注"调用方必须已持有CACHE_LOCK写锁"的函数只能在写锁内调用
+    # ====================================================================================================
+    
+    @classmethod
+    def get_atom_table(cls, node_id: str) -> Optional[AtomTable]:
+        """
+        获取节点内容的原子表（第一次访问时解析，之后复用）
+        
+        Args:
+            node_id: 节点ID
+            
+        Returns:
+            原子表，节点不存在返回None
+        """
+        with CACHE_LOCK.read():
+            entry = MOLECULAR_DATA_CACHE.get(node_id)
+            if entry is not None:
+                content_hash = entry.get("content_hash")
+                file_format = entry.get("format", "")
+                BLOB_STORE.retain(content_hash)
+        
+        if entry is None:
+            if cls._promote_from_spill(node_id) is None:
+                return None
+            return cls.get_atom_table(node_id)
+        
+        try:
+            return BLOB_STORE.get_derived(
+                content_hash, f"atom_table:{file_format}",
+                lambda: AtomTable.from_content(BLOB_STORE.get_view(content_hash) or b"", file_format)
+            )
+        finally:
+            BLOB_STORE.release(content_hash)
+    
+    @classmethod
+    def get_atom_table_for_content(cls, content: Union[str, bytes, memoryview], file_format: str = "pdb") -> AtomTable:
+        """
+        获取任意内容的原子表：内容已在缓存中时复用已解析的表，否则临时解析
+        
+        Args:
+            content: 分子文件内容（str或bytes-like）
+            file_format: 格式（"pdb" 或 ".pdb" 均可）
+        """
+        file_format = (file_format or "").lower().lstrip(".")
+        content_hash = compute_content_hash(content or "")
+        if not BLOB_STORE.retain(content_hash):
+            return AtomTable.from_content(content, file_format)
+        try:
+            return cls._atom_table_for_blob(content_hash, content, file_format)
+        finally:
+            BLOB_STORE.release(content_hash)
+    
+    @staticmethod
+    def _atom_table_for_blob(content_hash: Optional[str], content: Union[str, bytes, memoryview],
+                             file_format: str) -> AtomTable:
+        """获取挂在blob上的原子表，不存在时用给定内容解析"""
+        return BLOB_STORE.get_derived(
+            content_hash, f"atom_table:{file_format}",
+            lambda: AtomTable.from_content(content, file_format)
+        )
+    
+    @staticmethod
+    def _entry_size(data: Dict[str, Any]) -> int:
+        """缓存条目的逻辑字节数（按file_stats.size计，未去重）"""
+        return data.get("file_stats", {}).get("size", 0)
+    
+    @staticmethod
+    def _materialize(data: Dict[str, Any], content: Union[str, bytes] = None) -> Dict[str, Any]:
+        """
+        生成对外返回的数据字典：缓存条目的浅拷贝 + 文本content（字节内容在这里才解码）
+        
+        Args:
+            data: 缓存条目
+            content: 已知的内容（可选，避免再次查询BLOB_STORE）
+        """
+        result = dict(data)
+        if content is None:
+            content = BLOB_STORE.get(data.get("content_hash")) or ""
+        elif not isinstance(content, str):
+            content = decode_content(content)
+        result["content"] = content
+        return result
+    
+    @staticmethod
+    def _attach_content(result: Dict[str, Any], content_mode: str):
+        """按content_mode从BLOB_STORE附加内容（调用方已retain content_hash）"""
+        if content_mode == "none":
+            return
+        if content_mode == "bytes":
+            result["content"] = BLOB_STORE.get_bytes(result.get("content_hash")) or b""
+        else:
+            result["content"] = BLOB_STORE.get(result.get("content_hash")) or ""
+    
+    @staticmethod
+    def _apply_content_mode(result: Dict[str, Any], content_mode: str) -> Dict[str, Any]:
+        """把已附带文本content的数据字典转换为content_mode要求的形式"""
+        if content_mode == "none":
+            result.pop("content", None)
+        elif content_mode == "bytes":
+            result["content"] = content_bytes(result.get("content") or "")
+        return result
+    
+    @staticmethod
+    def _record_access(node_id: str, data: Dict[str, Any]):
+        """
+        记录一次读访问（持有读锁即可）
+        
+        访问计数直接写在条目上（并发时允许少量计数误差），
+        LRU顺序调整延迟到下次持有写锁时由 _drain_access_buffer() 统一处理。
+        """
+        data["last_accessed"] = time.time()
+        data["access_count"] = data.get("access_count", 0) + 1
+        ACCESS_BUFFER.append(node_id)
+    
+    @staticmethod
+    def _drain_access_buffer():
+        """按读访问记录调整LRU顺序（调用方必须已持有CACHE_LOCK写锁）"""
+        while ACCESS_BUFFER:
+            try:
+                node_id = ACCESS_BUFFER.popleft()
+            except IndexError:
+                break
+            if node_id in MOLECULAR_DATA_CACHE:
+                MOLECULAR_DATA_CACHE.move_to_end(node_id)
+    
+    @classmethod
+    def _is_over_budget(cls, pending_freed_bytes: int = 0) -> bool:
+        """
+        检查缓存是否超出字节预算（按去重后的物理字节计）或条目上限
+        
+        Args:
+            pending_freed_bytes: 已淘汰、但要等溢出完成后才释放的字节数
+        """
+        if CACHE_MAX_ENTRIES and len(MOLECULAR_DATA_CACHE) > CACHE_MAX_ENTRIES:
+            return True
+        if CACHE_MAX_BYTES and BLOB_STORE.physical_bytes - pending_freed_bytes > CACHE_MAX_BYTES:
+            return True
+        return False
+    
+    @staticmethod
+    def _projected_freed_bytes(content_hash: Optional[str], pending_releases: Dict[str, int]) -> int:
+        """
+        淘汰持有该内容的条目后预计释放的物理字节数（调用方必须已持有CACHE_LOCK写锁）
+        
+        只有最后一个引用被释放时内容才会真正释放；pending_releases 记录本轮淘汰中
+        已放入PENDING_SPILLS、尚未释放的引用数。
+        """
+        if not content_hash:
+            return 0
+        if BLOB_STORE.get_refcount(content_hash) - pending_releases.get(content_hash, 0) > 1:
+            return 0
+        return BLOB_STORE.get_stored_size(content_hash)
+    
+    @classmethod
+    def _select_victim(cls, protect_node_id: str = None, skip: set = None) -> Optional[str]:
+        """按淘汰策略选出下一个被淘汰的节点（跳过protect_node_id和skip中的节点）"""
+        skip = skip or ()
+        if CACHE_EVICTION_POLICY == "lfu":
+            # LFU：访问次数最少者优先，次数相同时淘汰最久未访问的
+            candidates = [
+                (data.get("access_count", 0), data.get("last_accessed", 0), node_id)
+                for node_id, data in MOLECULAR_DATA_CACHE.items()
+                if node_id != protect_node_id and node_id not in skip
+            ]
+            return min(candidates)[2] if candidates else None
+        
+        # LRU：OrderedDict头部即最久未访问的节点
+        for node_id in MOLECULAR_DATA_CACHE:
+            if node_id != protect_node_id and node_id not in skip:
+                return node_id
+        return None
+    
+    @classmethod
+    def _evict_if_needed(cls, protect_node_id: str = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        淘汰数据直到满足字节预算和条目上限（调用方必须已持有CACHE_LOCK写锁）
+        
+        被淘汰的条目先放入PENDING_SPILLS，调用方释放写锁后
+        必须调用 _spill_victims() 完成磁盘写入和内容释放。
+        
+        Args:
+            protect_node_id: 不允许淘汰的节点（通常是刚存入的节点）
+            
+        Returns:
+            被淘汰的 (节点ID, 条目) 列表
+        """
+        victims = []
+        if not cls._is_over_budget():
+            return victims
+        
+        cls._drain_access_buffer()
+        
+        # 放入PENDING_SPILLS的条目在溢出完成前仍持有内容引用，physical_bytes不会下降，
+        # 因此按预计释放的字节数判断预算
+        pending_releases: Dict[str, int] = {}
+        pending_freed = 0
+        # 内容与其他节点共享的条目：淘汰它不释放任何字节，只超出字节预算时跳过
+        shared = set()
+        while cls._is_over_budget(pending_freed):
+            victim_id = cls._select_victim(protect_node_id, shared)
+            if victim_id is None:
+                # 只剩受保护的节点（或内容共享的节点）：单个条目超出预算时保留它
+                logger.warning(f"缓存超出预算但没有可淘汰的节点 (当前 {BLOB_STORE.physical_bytes - pending_freed} 字节)")
+                break
+            
+            over_entries = CACHE_MAX_ENTRIES and len(MOLECULAR_DATA_CACHE) > CACHE_MAX_ENTRIES
+            content_hash = MOLECULAR_DATA_CACHE[victim_id].get("content_hash")
+            if not over_entries and not cls._projected_freed_bytes(content_hash, pending_releases):
+                shared.add(victim_id)
+                continue
+            
+            victim = MOLECULAR_DATA_CACHE.pop(victim_id)
+            victim_size = cls._entry_size(victim)
+            CACHE_STATS["current_bytes"] -= victim_size
+            CACHE_STATS["evictions"] += 1
+            CACHE_STATS["evicted_bytes"] += victim_size
+            CACHE_STATS["last_evicted_at"] = time.time()
+            CACHE_STATS["last_evicted_node"] = victim_id
+            victims.append((victim_id, victim))
+            
+            logger.storage(f"缓存淘汰({CACHE_EVICTION_POLICY}): 节点 {victim_id}, 释放 {victim_size} 字节")
+            
+            if SPILL_STORE is not None:
+                # 🔑 被淘汰的数据稍后落到磁盘溢出层，而不是直接丢弃
+                PENDING_SPILLS[victim_id] = victim
+                pending_freed += cls._projected_freed_bytes(content_hash, pending_releases)
+                if content_hash:
+                    pending_releases[content_hash] = pending_releases.get(content_hash, 0) + 1
+            else:
+                BLOB_STORE.release(victim.get("content_hash"))
+        
+        return victims
+    
+    @classmethod
+    def _spill_victims(cls, victims: List[Tuple[str, Dict[str, Any]]]):
+        """
+        将被淘汰的条目写入磁盘溢出层（不持有CACHE_LOCK）
+        
+        写入期间条目仍在PENDING_SPILLS中，可被 _promote_from_spill() 直接取回；
+        如果写入完成时条目已被取回或被新数据替换，磁盘副本作废。
+        """
+        if SPILL_STORE is None:
+            return
+        
+        lost = []
+        for victim_id, victim in victims:
+            # 直接溢出原始字节，不解码；溢出层为腾出磁盘预算丢弃的旧节点记入dropped
+            dropped: List[str] = []
+            spilled = SPILL_STORE.put(victim_id, dict(victim, content=BLOB_STORE.get_bytes(victim.get("content_hash")) or b""),
+                                      dropped)
+            lost.extend(dropped)
+            
+            with CACHE_LOCK.write():
+                finished = PENDING_SPILLS.get(victim_id) is victim
+                if finished:
+                    del PENDING_SPILLS[victim_id]
+                    BLOB_STORE.release(victim.get("content_hash"))
+                    if not spilled:
+                        # 溢出被拒绝（超过磁盘预算或写入失败），内容已经释放
+                        lost.append(victim_id)
+            
+            if not finished:
+                SPILL_STORE.remove(victim_id)
+        
+        if lost:
+            cls._forget_lost_nodes(lost)
+    
+    @classmethod
+    def _forget_lost_nodes(cls, node_ids: List[str]):
+        """
+        把已经不在任何一层中的节点从二级索引中移除（不持有CACHE_LOCK时调用）
+        
+        溢出失败或被溢出层按磁盘预算丢弃的节点如果仍留在索引中，has_node()/find_nodes()
+        会报告它存在，而 get_molecular_data() 取不到数据。快照或共享缓存中仍有副本的节点保留。
+        """
+        for node_id in node_ids:
+            if SNAPSHOT_STORE is not None and SNAPSHOT_STORE.contains(node_id):
+                continue
+            if SHARED_CACHE is not None and SHARED_CACHE.get_hash(node_id) is not None:
+                continue
+            with CACHE_LOCK.write():
+                # 期间可能被重新存入或再次溢出
+                if node_id in MOLECULAR_DATA_CACHE or node_id in PENDING_SPILLS or SPILL_STORE.contains(node_id):
+                    continue
+                if node_id not in NODE_INDEX:
+                    continue
+                cls._unindex_node(node_id)
+                CACHE_STATS["spill_lost"] += 1
+            logger.warning(f"节点 {node_id} 的数据已从溢出层丢失，已从索引中移除")
+    
+    @classmethod
+    def _reclaim_entry(cls, node_id: str, entry: Dict[str, Any]) -> bool:
+        """
+        确保条目在内存缓存中（调用方必须已持有CACHE_LOCK写锁）
+        
+        用于编辑期间条目被并发淘汰的情况：条目重新放回缓存，
+        如果它已经完成溢出，则重新为内容增加引用。
+        
+        Returns:
+            磁盘溢出层中是否留有需要删除的过期副本
+        """
+        if MOLECULAR_DATA_CACHE.get(node_id) is entry:
+            return False
+        
+        if PENDING_SPILLS.get(node_id) is entry:
+            # 溢出尚未完成：取回所有权，_spill_victims 会删除磁盘副本
+            del PENDING_SPILLS[node_id]
+            stale_spill = False
+        else:
+            # 溢出已完成，内容引用已被释放
+            BLOB_STORE.retain(entry.get("content_hash"))
+            stale_spill = True
+        
+        MOLECULAR_DATA_CACHE[node_id] = entry
+        CACHE_STATS["current_bytes"] += cls._entry_size(entry)
+        return stale_spill
     
     @classmethod
-    def store_molecular_data(cls, node_id: str, filename: str, folder: str = "molecules", 
-                           content: str = None) -> Optional[Dict[str, Any]]:
+    def _promote_from_spill(cls, node_id: str) -> Optional[Dict[str, Any]]:
         """
-        存储分子数据到内存缓存
+        从磁盘溢出层（或尚未写完的淘汰队列、尚未预热的启动快照、跨进程共享缓存）取回节点数据并放回内存缓存
         
-        Args:
-            node_id: ComfyUI节点的唯一ID
-            filename: 分子文件名
-            folder: 存储文件夹（默认molecules）
-            content: 分子文件内容
-            
         Returns:
-            存储的数据字典，失败返回None
+            取回的数据字典（带content），不存在返回None
         """
-        with CACHE_LOCK:
-            try:
-                # 验证必需参数
-                if not node_id or not filename:
-                    logger.error("存储失败：节点ID和文件名不能为空")
-                    return None
-                
-                if not content:
-                    logger.error("存储失败：文件内容不能为空")
-                    return None
-                
-                # 🔍 调试日志：追踪节点ID格式
-                logger.molecular(f"[DEBUG] 存储分子数据开始:")
-                logger.molecular(f"  - 原始node_id: '{node_id}'")
-                logger.molecular(f"  - node_id类型: {type(node_id)}")
-                logger.molecular(f"  - node_id长度: {len(node_id)}")
-                logger.molecular(f"  - 文件名: {filename}")
-                
-                # 检测基本格式信息
-                file_format = cls._detect_format(filename)
-                
-                # 🔑 提取tab_id（关键新增）
-                tab_id = None
-                if "_node_" in node_id:
-                    tab_id = node_id.split("_node_")[0]  # 例如: "workflow_fl40l5"
-                    logger.molecular(f"[DEBUG] 解析node_id:")
-                    logger.molecular(f"  - 提取的tab_id: '{tab_id}'")
-                    logger.molecular(f"  - 分割后的节点部分: '{node_id.split('_node_')[1] if len(node_id.split('_node_')) > 1 else 'None'}")
-                else:
-                    logger.warning(f"[DEBUG] node_id格式异常，未包含'_node_': '{node_id}'")
-                
-                # 创建存储数据结构
-                molecular_data = {
-                    "node_id": node_id,
-                    "filename": filename,
-                    "folder": folder,
-                    "content": content,
-                    "format": file_format,
-                    "format_name": cls._get_format_name(file_format),
-                    "tab_id": tab_id,  # 🔑 新增：Tab标识
-                    
-                    # 基本统计信息
-                    "file_stats": {
-                        "size": len(content),
-                        "lines": content.count('\n') + 1
-                    },
-                    
-                    # 简单的原子计数（不做复杂分析）
-                    "atoms": cls._simple_atom_count(content, file_format),
-                    
-                    # 缓存管理信息
-                    "cached_at": time.time(),
-                    "last_accessed": time.time(),
-                    "access_count": 0
-                }
-                
-                # 保存到全局缓存
-                MOLECULAR_DATA_CACHE[node_id] = molecular_data
-                
-                # 🔍 调试日志：验证存储
-                logger.molecular(f"[DEBUG] 数据已存储到缓存:")
-                logger.molecular(f"  - 缓存key: '{node_id}'")
-                logger.molecular(f"  - 当前缓存中的所有keys: {list(MOLECULAR_DATA_CACHE.keys())}")
-                logger.molecular(f"  - 缓存大小: {len(MOLECULAR_DATA_CACHE)}")
-                
-                # 🔑 修复：保存到文件系统时传递节点ID，避免重名文件覆盖
-                try:
-                    cls._save_to_filesystem(filename, folder, content, node_id)
-                except Exception as e:
-                    logger.warning(f"文件系统保存失败: {e}")
-                
-                logger.success(f"[DEBUG] 分子数据存储成功: {filename} -> 节点 {node_id}")
-                
-                # 🚀 发送WebSocket通知（改进的安全调用）
-                if WEBSOCKET_NOTIFY_AVAILABLE:
-                    try:
-                        # 使用线程池执行异步通知
-                        import asyncio
-                        import concurrent.futures
-                        import threading
-                        
-                        def run_async_notify():
-                            """在新线程中运行异步通知"""
-                            # 创建新的事件循环
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                            try:
-                                # 运行异步函数
-                                loop.run_until_complete(notify_molecular_update(node_id, molecular_data))
-                                logger.network(f"[DEBUG] WebSocket更新通知发送成功")
-                            finally:
-                                loop.close()
-                        
-                        # 在新线程中执行
-                        thread = threading.Thread(target=run_async_notify, daemon=True)
-                        thread.start()
-                        
-                        logger.network(f"[DEBUG] WebSocket更新通知详情:")
-                        logger.network(f"  - 节点ID: '{node_id}'")
-                        logger.network(f"  - 通知类型: 'update'")
-                        logger.network(f"  - 文件名: {molecular_data.get('filename')}")
-                        
-                    except Exception as e:
-                        logger.error(f"WebSocket通知失败: {e}")
-                        import traceback
-                        traceback.print_exc()
-                
-                return molecular_data
-                
-            except Exception as e:
-                logger.error(f"存储分子数据时出错: {e}")
-                return None
+        if SPILL_STORE is None and SNAPSHOT_STORE is None and SHARED_CACHE is None:
+            return None
+        
+        with NODE_LOCKS.for_key(node_id):
+            return cls._promote_from_spill_locked(node_id)
+    
+    @classmethod
+    def _promote_from_spill_locked(cls, node_id: str) -> Optional[Dict[str, Any]]:
+        """_promote_from_spill 的实现（调用方必须已持有该节点的NODE_LOCKS分片锁）"""
+        with CACHE_LOCK.write():
+            # 等待分片锁期间可能已被其他线程取回
+            data = MOLECULAR_DATA_CACHE.get(node_id)
+            if data is None:
+                data = PENDING_SPILLS.pop(node_id, None)
+                if data is not None:
+                    # 溢出尚未完成：直接取回，_spill_victims 会删除磁盘副本
+                    MOLECULAR_DATA_CACHE[node_id] = data
+                    CACHE_STATS["current_bytes"] += cls._entry_size(data)
+                    CACHE_STATS["spill_promotions"] += 1
+            if data is not None:
+                cls._record_access(node_id, data)
+                return cls._materialize(data)
+        
+        if SPILL_STORE is None or not SPILL_STORE.contains(node_id):
+            return cls._promote_from_snapshot_locked(node_id) or cls._promote_from_shared_locked(node_id)
+        
+        data = SPILL_STORE.pop(node_id)
+        if data is None:
+            return None
+        
+        content = data.pop("content", b"")
+        data["content_hash"] = BLOB_STORE.put(content, data.get("content_hash"))
+        
+        with CACHE_LOCK.write():
+            MOLECULAR_DATA_CACHE[node_id] = data
+            CACHE_STATS["current_bytes"] += cls._entry_size(data)
+            CACHE_STATS["spill_promotions"] += 1
+            cls._record_access(node_id, data)
+            victims = cls._evict_if_needed(protect_node_id=node_id)
+        
+        cls._spill_victims(victims)
+        
+        logger.storage(f"节点 {node_id} 已从磁盘溢出层提升回内存")
+        return cls._materialize(data, content)
     
     @classmethod
-    def get_molecular_data(cls, node_id: str) -> Optional[Dict[str, Any]]:
+    def _promote_from_snapshot_locked(cls, node_id: str, materialize: bool = True) -> Optional[Dict[str, Any]]:
         """
-        从缓存获取分子数据
+        从启动快照恢复节点数据到内存缓存（调用方必须已持有该节点的NODE_LOCKS分片锁）
+        
+        内容按快照中的编码形式直接放入BLOB_STORE，不解压也不重新压缩。
         
         Args:
             node_id: 节点ID
+            materialize: 是否返回带content的数据（后台预热时不需要解压）
             
         Returns:
-            分子数据字典，不存在返回None
+            恢复的数据字典，不存在返回None
         """
-        with CACHE_LOCK:
-            try:
-                # 🔍 调试日志：追踪数据获取
-                logger.debug(f"[DEBUG] 获取分子数据:")
-                logger.debug(f"  - 请求的node_id: '{node_id}'")
-                logger.debug(f"  - 缓存中的keys: {list(MOLECULAR_DATA_CACHE.keys())}")
-                
-                if node_id in MOLECULAR_DATA_CACHE:
-                    data = MOLECULAR_DATA_CACHE[node_id]
-                    
-                    # 更新访问统计
-                    data["last_accessed"] = time.time()
-                    data["access_count"] = data.get("access_count", 0) + 1
-                    
-                    logger.debug(f"[DEBUG] 找到数据:")
-                    logger.debug(f"  - 文件名: {data.get('filename')}")
-                    logger.debug(f"  - tab_id: {data.get('tab_id')}")
-                    logger.debug(f"  - 访问次数: {data.get('access_count')}")
-                    return data
-                else:
-                    logger.warning(f"[DEBUG] 节点 '{node_id}' 的数据不存在!")
-                    logger.warning(f"  - 可用的keys: {list(MOLECULAR_DATA_CACHE.keys())}")
-                    return None
-                    
-            except Exception as e:
-                logger.error(f"获取分子数据时出错: {e}")
-                return None
+        if SNAPSHOT_STORE is None or not SNAPSHOT_STORE.contains(node_id):
+            return None
+        
+        loaded = SNAPSHOT_STORE.load(node_id)
+        if loaded is None:
+            return None
+        
+        data, payload, codec, size = loaded
+        try:
+            BLOB_STORE.put_encoded(data["content_hash"], payload, codec, size)
+        except Exception as e:
+            logger.warning(f"快照内容恢复失败: 节点 {node_id} - {e}")
+            SNAPSHOT_STORE.discard(node_id)
+            return None
+        
+        with CACHE_LOCK.write():
+            if node_id in MOLECULAR_DATA_CACHE or node_id in PENDING_SPILLS:
+                # 已有更新的数据，快照副本作废
+                BLOB_STORE.release(data["content_hash"])
+                data = None
+            else:
+                MOLECULAR_DATA_CACHE[node_id] = data
+                CACHE_STATS["current_bytes"] += cls._entry_size(data)
+                CACHE_STATS["snapshot_promotions"] += 1
+                victims = cls._evict_if_needed(protect_node_id=node_id)
+                if materialize:
+                    # 增加引用，保证锁外解压期间内容不会被并发淘汰释放
+                    BLOB_STORE.retain(data["content_hash"])
+        
+        SNAPSHOT_STORE.discard(node_id)
+        if data is None:
+            return None
+        
+        cls._spill_victims(victims)
+        
+        logger.storage(f"节点 {node_id} 已从启动快照恢复到内存")
+        if not materialize:
+            return data
+        try:
+            return cls._materialize(data)
+        finally:
+            BLOB_STORE.release(data["content_hash"])
     
     @classmethod
-    def get_cache_status(cls) -> Dict[str, Any]:
+    def _promote_from_shared_locked(cls, node_id: str) -> Optional[Dict[str, Any]]:
         """
-        获取缓存状态统计
+        从跨进程共享缓存取回节点数据放入（或替换）本地内存缓存
+        （调用方必须已持有该节点的NODE_LOCKS分片锁）
         
         Returns:
-            缓存状态字典
+            取回的数据字典（带content），共享层中不存在返回None
         """
-        with CACHE_LOCK:
-            try:
-                total_nodes = len(MOLECULAR_DATA_CACHE)
-                total_cache_size = sum(len(data.get("content", "")) for data in MOLECULAR_DATA_CACHE.values())
-                
-                # 构建节点列表（增加tab_id信息）
-                nodes = []
-                for node_id, data in MOLECULAR_DATA_CACHE.items():
-                    nodes.append({
-                        "node_id": node_id,
-                        "filename": data.get("filename"),
-                        "format": data.get("format"),
-                        "atoms": data.get("atoms", 0),
-                        "tab_id": data.get("tab_id"),  # 🔑 新增：Tab标识
-                        "cached_at": data.get("cached_at"),
-                        "access_count": data.get("access_count", 0)
-                    })
-                
-                # 按访问时间排序
-                nodes.sort(key=lambda x: x.get("access_count", 0), reverse=True)
-                
-                return {
-                    "total_nodes": total_nodes,
-                    "total_cache_size": total_cache_size,
-                    "nodes": nodes,
-                    "status": "active" if total_nodes > 0 else "empty"
-                }
-                
-            except Exception as e:
-                logger.error(f"获取缓存状态时出错: {e}")
-                return {"error": str(e)}
+        if SHARED_CACHE is None:
+            return None
+        
+        # 先读代数再读数据：读取期间的其他修改会在下一次访问时再次校验
+        generation = SHARED_CACHE.generation()
+        fetched = SHARED_CACHE.fetch(node_id)
+        if fetched is None:
+            return None
+        
+        data, content = fetched
+        data["content_hash"] = BLOB_STORE.put(content, data.get("content_hash"))
+        data["shared_generation"] = generation
+        
+        with CACHE_LOCK.write():
+            previous = MOLECULAR_DATA_CACHE.pop(node_id, None)
+            if previous is not None:
+                CACHE_STATS["current_bytes"] -= cls._entry_size(previous)
+            else:
+                previous = PENDING_SPILLS.pop(node_id, None)
+            if previous is not None:
+                BLOB_STORE.release(previous.get("content_hash"))
+            MOLECULAR_DATA_CACHE[node_id] = data
+            CACHE_STATS["current_bytes"] += cls._entry_size(data)
+            CACHE_STATS["shared_fetches"] += 1
+            cls._index_node(node_id, data)
+            cls._record_access(node_id, data)
+            victims = cls._evict_if_needed(protect_node_id=node_id)
+        
+        if SPILL_STORE is not None and SPILL_STORE.contains(node_id):
+            SPILL_STORE.remove(node_id)
+        if SNAPSHOT_STORE is not None:
+            SNAPSHOT_STORE.discard(node_id)
+        cls._spill_victims(victims)
+        if previous is not None:
+            # 内容被其他工作进程替换，本地编辑日志和预压缩响应不再适用
+            cls._reset_edit_log(node_id)
+            RESPONSE_CACHE.invalidate(node_id)
+        
+        logger.storage(f"节点 {node_id} 已从共享缓存取回")
+        return cls._materialize(data, content)
     
     @classmethod
-    def edit_molecular_data(cls, node_id: str, edit_type: str, **kwargs) -> Optional[Dict[str, Any]]:
+    def _refresh_from_shared(cls, node_id: str, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
-        编辑分子数据（简单版本，用于概念验证）
+        共享索引代数变化时校验本地条目，被其他工作进程更新过则重新取回
+        （调用方不应持有任何缓存锁）
         
-        Args:
-            node_id: 节点ID
-            edit_type: 编辑类型（'remove_last_atom'）
-            **kwargs: 编辑参数
-            
         Returns:
-            编辑后的数据字典，失败返回None
+            重新取回的数据字典（带content），本地条目仍然有效时返回None
         """
-        with CACHE_LOCK:
-            try:
-                # 🔧 调试：显示缓存中的所有节点ID
-                logger.debug(f"[DEBUG] 编辑分子数据:")
-                logger.debug(f"  - 目标node_id: '{node_id}'")
-                logger.debug(f"  - 编辑类型: {edit_type}")
-                logger.debug(f"  - 缓存中的节点ID列表: {list(MOLECULAR_DATA_CACHE.keys())}")
-                
-                if node_id not in MOLECULAR_DATA_CACHE:
-                    logger.warning(f"节点 {node_id} 的数据不存在，无法编辑")
-                    logger.warning(f"可用的节点ID: {list(MOLECULAR_DATA_CACHE.keys())}")
-                    return None
-                
-                molecular_data = MOLECULAR_DATA_CACHE[node_id]
-                original_content = molecular_data.get("content", "")
-                
-                if edit_type == "remove_last_atom":
-                    # 🧪 简单编辑：删除PDB中最后一个原子
-                    logger.molecular(f"开始编辑: {edit_type}, 原始内容长度: {len(original_content)}")
-                    edited_content = cls._remove_last_atom_from_pdb(original_content)
-                    logger.molecular(f"编辑完成: 新内容长度: {len(edited_content)}")
-                    
-                    if edited_content != original_content:
-                        # 更新数据
-                        molecular_data["content"] = edited_content
-                        molecular_data["atoms"] = cls._simple_atom_count(edited_content, molecular_data.get("format", ""))
-                        molecular_data["last_edited"] = time.time()
-                        molecular_data["edit_history"] = molecular_data.get("edit_history", [])
-                        molecular_data["edit_history"].append({
-                            "type": edit_type,
-                            "timestamp": time.time(),
-                            "description": "删除最后一个原子"
-                        })
-                        
-                        logger.success(f"编辑成功: 节点 {node_id} 删除最后一个原子")
-                        
-                        # 🚀 发送WebSocket编辑通知（改进的安全调用）
-                        if WEBSOCKET_NOTIFY_AVAILABLE:
-                            try:
-                                edit_info = {
-                                    "edit_type": edit_type,
-                                    "description": "删除最后一个原子",
-                                    "atoms_count": molecular_data["atoms"],
-                                    "timestamp": time.time()
-                                }
-                                
-                                # 使用线程池执行异步通知
-                                import asyncio
-                                import threading
-                                
-                                def run_async_notify():
-                                    """在新线程中运行异步通知"""
-                                    # 创建新的事件循环
-                                    loop = asyncio.new_event_loop()
-                                    asyncio.set_event_loop(loop)
-                                    try:
-                                        # 运行异步函数
-                                        loop.run_until_complete(notify_molecular_edit(node_id, edit_info))
-                                        logger.network(f"[DEBUG] WebSocket编辑通知发送成功")
-                                    finally:
-                                        loop.close()
-                                
-                                # 在新线程中执行
-                                thread = threading.Thread(target=run_async_notify, daemon=True)
-                                thread.start()
-                                
-                                logger.network(f"[DEBUG] WebSocket编辑通知详情:")
-                                logger.network(f"  - 节点ID: '{node_id}'")
-                                logger.network(f"  - 通知类型: 'edit'")
-                                logger.network(f"  - 编辑类型: {edit_type}")
-                                
-                            except Exception as e:
-                                logger.error(f"WebSocket编辑通知失败: {e}")
-                                import traceback
-                                traceback.print_exc()
-                        
-                        return molecular_data
-                    else:
-                        logger.warning(f"编辑无效果: 节点 {node_id}")
-                        return None
-                        
-                else:
-                    logger.warning(f"不支持的编辑类型: {edit_type}")
-                    return None
-                    
-            except Exception as e:
-                logger.error(f"编辑分子数据时出错: {e}")
-                return None
+        generation = SHARED_CACHE.generation()
+        if entry.get("shared_generation") == generation:
+            return None
+        
+        shared_hash = SHARED_CACHE.get_hash(node_id)
+        if shared_hash is None or shared_hash == entry.get("content_hash"):
+            # 共享层没有该节点（例如发布失败）或内容一致：本地条目仍然有效
+            entry["shared_generation"] = generation
+            return None
+        
+        with NODE_LOCKS.for_key(node_id):
+            refreshed = cls._promote_from_shared_locked(node_id)
+        if refreshed is not None:
+            SHARED_CACHE.record_refresh()
+        return refreshed
+    
+    @staticmethod
+    def _publish_shared(node_id: str, entry: Dict[str, Any], content: Union[str, bytes]):
+        """发布到跨进程共享缓存（调用方持有该节点的分片锁，不应持有CACHE_LOCK）"""
+        if SHARED_CACHE is None:
+            return
+        generation = SHARED_CACHE.generation()
+        if SHARED_CACHE.publish(node_id, dict(entry), content):
+            entry["shared_generation"] = generation
     
     @classmethod
-    def clear_cache(cls, node_id: str = None) -> bool:
+    def save_snapshot(cls, force: bool = False) -> bool:
         """
-        清除缓存数据（调试用）
+        把内存缓存写入快照文件（缓存内容未变化时跳过）
         
         Args:
-            node_id: 指定节点ID，None则清除所有
+            force: 缓存内容未变化时也保存
             
         Returns:
-            是否成功
+            是否写入了快照
         """
-        with CACHE_LOCK:
-            try:
-                if node_id:
-                    if node_id in MOLECULAR_DATA_CACHE:
-                        del MOLECULAR_DATA_CACHE[node_id]
-                        logger.storage(f"清除节点 {node_id} 的缓存")
-                        return True
-                    else:
-                        logger.warning(f"节点 {node_id} 不存在")
-                        return False
-                else:
-                    MOLECULAR_DATA_CACHE.clear()
-                    logger.storage("清除所有缓存")
-                    return True
-                    
-            except Exception as e:
-                logger.error(f"清除缓存时出错: {e}")
-                return False
+        if SNAPSHOT_STORE is None:
+            return False
+        
+        # 只在读锁内复制元数据并增加引用，导出和写文件在锁外进行
+        with CACHE_LOCK.read():
+            entries = [(node_id, dict(data)) for node_id, data in reversed(MOLECULAR_DATA_CACHE.items())]
+            entries.extend((node_id, dict(data)) for node_id, data in PENDING_SPILLS.items())
+            for _, data in entries:
+                BLOB_STORE.retain(data.get("content_hash"))
+        retained = list(entries)
+        
+        # 溢出层中的节点也写入快照（溢出文件在进程退出时删除），排在内存中的节点之后
+        spilled = {}
+        if SPILL_STORE is not None:
+            seen = {node_id for node_id, _ in entries}
+            for node_id, metadata in SPILL_STORE.entries():
+                if node_id not in seen and metadata.get("content_hash"):
+                    entries.append((node_id, metadata))
+                    spilled[metadata["content_hash"]] = node_id
+        
+        def export(content_hash: str):
+            exported = BLOB_STORE.export(content_hash)
+            if exported is None and content_hash in spilled:
+                # 溢出层保存的是原始字节
+                content = SPILL_STORE.read_content(spilled[content_hash])
+                if content is not None:
+                    exported = (content, "none", len(content))
+            return exported
+        
+        try:
+            return SNAPSHOT_STORE.save(entries, export, force=force)
+        finally:
+            for _, data in retained:
+                BLOB_STORE.release(data.get("content_hash"))
+    
+    @classmethod
+    def warm_from_snapshot(cls) -> int:
+        """
+        把启动快照中最近使用的、当前缓存预算放得下的条目读回内存
+        （剩余条目在 get_molecular_data 未命中时按需恢复）
+        
+        按从冷到热的顺序插入，恢复后的LRU顺序与保存快照时一致。
+        
+        Returns:
+            恢复的条目数
+        """
+        if SNAPSHOT_STORE is None:
+            return 0
+        
+        with CACHE_LOCK.read():
+            free_entries = CACHE_MAX_ENTRIES - len(MOLECULAR_DATA_CACHE) if CACHE_MAX_ENTRIES else None
+            free_bytes = CACHE_MAX_BYTES - CACHE_STATS["current_bytes"] if CACHE_MAX_BYTES else None
+        
+        selected = []
+        for node_id, metadata in SNAPSHOT_STORE.pending_entries():
+            size = cls._entry_size(metadata)
+            if (free_entries is not None and len(selected) >= free_entries) or \
+                    (free_bytes is not None and size > free_bytes):
+                break
+            selected.append(node_id)
+            if free_bytes is not None:
+                free_bytes -= size
+        
+        restored = 0
+        for node_id in reversed(selected):
+            if SNAPSHOT_STORE.stopping:
+                break
+            with NODE_LOCKS.for_key(node_id):
+                if cls._promote_from_snapshot_locked(node_id, materialize=False) is not None:
+                    restored += 1
+        
+        if restored:
+            logger.success(f"缓存快照预热完成: 恢复 {restored} 个节点")
+        return restored
+    
+    @classmethod
+    def start_snapshot_service(cls) -> int:
+        """
+        读入快照索引并启动后台预热/定期保存线程（模块加载时调用）
+        
+        Returns:
+            快照中待恢复的条目数
+        """
+        if SNAPSHOT_STORE is None:
+            return 0
+        
+        pending = SNAPSHOT_STORE.open()
+        with CACHE_LOCK.write():
+            for node_id, metadata in SNAPSHOT_STORE.pending_entries():
+                cls._index_node(node_id, metadata)
+        SNAPSHOT_STORE.start(cls.warm_from_snapshot, cls.save_snapshot, SNAPSHOT_INTERVAL)
+        if pending:
+            logger.storage(f"发现缓存快照: {pending} 个节点，后台预热中")
+        return pending
+    
+    @classmethod
+    def _shutdown_snapshot(cls):
+        """进程退出时停止后台线程并保存最终快照"""
+        if SNAPSHOT_STORE is None:
+            return
+        SNAPSHOT_STORE.stop()
+        cls.save_snapshot()
+        SNAPSHOT_STORE.close()
+    
+    @staticmethod
+    def _send_notification(notify_func, node_id: str, payload: Dict[str, Any], change_type: str):
+        """提交WebSocket通知到服务器事件循环（调用方不应持有任何缓存锁）"""
+        if not WEBSOCKET_NOTIFY_AVAILABLE:
+            return
+        
+        try:
+            # 🔑 不再为每个通知创建线程和事件循环：由分发器在服务器事件循环中统一发送
+            queued = notification_dispatcher.submit(notify_func, node_id, payload)
+            
+            logger.network(f"[DEBUG] WebSocket通知详情:")
+            logger.network(f"  - 节点ID: '{node_id}'")
+            logger.network(f"  - 通知类型: '{change_type}'")
+            logger.network(f"  - 已入队: {queued}")
+            
+        except Exception as e:
+            logger.error(f"WebSocket通知失败: {e}")
     
     # ====================================================================================================
     # 简化的辅助函数 - 只保留必需的
@@ -419,57 +1942,60 @@ class MolecularDataManager:
         return format_names.get(file_format, "Unknown Format")
     
     @staticmethod
-    def _simple_atom_count(content: str, file_format: str) -> int:
-        """简单的原子计数（不做复杂分析）"""
+    def _simple_atom_count(content: Union[str, bytes], file_format: str, content_hash: str = None) -> int:
+        """原子计数：PDB/MOL/SDF/XYZ由原子表得出（有content_hash时复用blob上的表）"""
         try:
-            if file_format == "pdb":
-                return content.count("ATOM") + content.count("HETATM")
-            elif file_format in ["mol", "sdf"]:
-                lines = content.split('\n')
-                if len(lines) > 3:
-                    counts_line = lines[3].split()
-                    return int(counts_line[0]) if counts_line else 0
-            elif file_format == "xyz":
-                lines = content.split('\n')
-                return int(lines[0]) if lines and lines[0].isdigit() else 0
+            if AtomTable.supports(file_format):
+                return len(MolecularDataManager._atom_table_for_blob(content_hash, content, file_format))
             else:
-                # 其他格式的简单估算
-                return len([line for line in content.split('\n') if line.strip() and not line.startswith('#')])
+                # 其他格式的简单估算（bytes内容按字节处理，不解码）
+                newline, comment = (b"\n", b"#") if isinstance(content, bytes) else ("\n", "#")
+                return len([line for line in content.split(newline) if line.strip() and not line.startswith(comment)])
         except:
             return 0
     
     @staticmethod
-    def _save_to_filesystem(filename: str, folder: str, content: str, node_id: str = None):
+    def get_unique_filename(filename: str, node_id: str) -> str:
+        """
+        生成带节点ID后缀的文件名，与 _save_to_filesystem 写入的文件名一致
+        
+        例如: processed_molecule.pdb + workflow_fl40l_node_95 → processed_molecule_node95.pdb
+        """
+        # 提取节点数字部分作为后缀
+        node_suffix = node_id.split('_node_')[-1] if '_node_' in node_id else node_id[-3:]
+        
+        # 分离文件名和扩展名
+        name_parts = filename.rsplit('.', 1)
+        if len(name_parts) == 2:
+            name, ext = name_parts
+            return f"{name}_node{node_suffix}.{ext}"
+        
+        # 没有扩展名的情况
+        return f"{filename}_node{node_suffix}"
+    
+    @staticmethod
+    def _save_to_filesystem(filename: str, folder: str, content: Union[str, bytes], node_id: str = None,
+                            content_hash: str = None):
         """
         保存到文件系统（修复版本） - 添加节点ID避免重名文件冲突
         
+        实际写入由 PERSISTENCE_WRITER 按 ALCHEM_PERSIST_POLICY 完成（默认后台写回）
+        
         Args:
             filename: 原始文件名
             folder: 存储文件夹
             content: 文件内容
             node_id: 节点ID，用于生成唯一文件名
+            content_hash: 内容哈希，与上次写入相同时跳过
         """
         try:
             # 获取ComfyUI的input目录
             input_dir = folder_paths.get_input_directory()
             target_dir = os.path.join(input_dir, folder)
             
-            # 确保目录存在
-            os.makedirs(target_dir, exist_ok=True)
-            
             # 🔑 修复：为重名文件添加节点ID后缀，避免覆盖
             if node_id:
-                # 分离文件名和扩展名
-                name_parts = filename.rsplit('.', 1)
-                if len(name_parts) == 2:
-                    name, ext = name_parts
-                    # 提取节点数字部分作为后缀
-                    node_suffix = node_id.split('_node_')[-1] if '_node_' in node_id else node_id[-3:]
-                    unique_filename = f"{name}_node{node_suffix}.{ext}"
-                else:
-                    # 没有扩展名的情况
-                    node_suffix = node_id.split('_node_')[-1] if '_node_' in node_id else node_id[-3:]
-                    unique_filename = f"{filename}_node{node_suffix}"
+                unique_filename = MolecularDataManager.get_unique_filename(filename, node_id)
                 
                 logger.storage(f"[DEBUG] 文件重名保护:")
                 logger.storage(f"  - 原始文件名: {filename}")
@@ -478,63 +2004,75 @@ class MolecularDataManager:
             else:
                 unique_filename = filename
             
-            # 写入文件（使用唯一文件名）
+            # 写入文件（使用唯一文件名，目录由写回队列按需创建）
             file_path = os.path.join(target_dir, unique_filename)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-                
-            logger.storage(f"文件已保存: {file_path}")
+            PERSISTENCE_WRITER.submit(file_path, content, content_hash)
             
         except Exception as e:
             logger.warning(f"文件系统保存失败: {e}")
             raise
     
     @staticmethod
-    def _remove_last_atom_from_pdb(content: str) -> str:
+    def _remove_atom_record(content: str, atom_table: AtomTable,
+                            atom_index: Optional[int]) -> Optional[Tuple[str, AtomTable]]:
         """
-        从PDB内容中删除最后一个原子（简单编辑功能）
+        删除一个原子记录（单原子编辑，只支持PDB）
+        
+        XYZ的原子数行、MOL/SDF的计数行和键连接块都引用原子数量/序号，只删除记录行会破坏文件，
+        因此其它格式不做编辑。
         
         Args:
-            content: PDB文件内容
+            content: 分子文件内容
+            atom_table: content对应的原子表
+            atom_index: 原子下标
             
         Returns:
-            编辑后的PDB内容
+            (编辑后的内容, 编辑后的原子表)，无法删除返回None
         """
         try:
-            lines = content.split('\n')
-            logger.molecular(f"解析PDB: 总行数 {len(lines)}")
-            
-            # 找到所有原子行的索引
-            atom_line_indices = []
-            for i, line in enumerate(lines):
-                if line.startswith('ATOM') or line.startswith('HETATM'):
-                    atom_line_indices.append(i)
+            if atom_table.file_format != "pdb":
+                logger.warning(f"不支持编辑 {atom_table.file_format or '未知'} 格式，只支持PDB")
+                return None
             
-            logger.molecular(f"找到 {len(atom_line_indices)} 个原子行")
+            logger.molecular(f"解析PDB: 总行数 {atom_table.total_lines}")
+            logger.molecular(f"找到 {len(atom_table)} 个原子行")
             
-            if not atom_line_indices:
+            if not len(atom_table):
                 logger.warning(f"没有找到ATOM或HETATM行，无法删除原子")
-                return content
-            
-            # 删除最后一个原子行
-            last_atom_index = atom_line_indices[-1]
-            removed_line = lines[last_atom_index]
-            logger.molecular(f"删除第 {last_atom_index+1} 行原子: {removed_line[:50]}...")
+                return None
             
-            # 创建新的行列表，跳过最后一个原子行
-            result_lines = []
-            for i, line in enumerate(lines):
-                if i != last_atom_index:
-                    result_lines.append(line)
+            if not isinstance(atom_index, int) or not 0 <= atom_index < len(atom_table):
+                logger.warning(f"原子下标无效: {atom_index}（共 {len(atom_table)} 个原子）")
+                return None
             
-            result_content = '\n'.join(result_lines)
-            logger.molecular(f"编辑完成: {len(lines)} → {len(result_lines)} 行")
+            start, end = atom_table.record_span(atom_index)
+            logger.molecular(f"删除原子记录: {content[start:min(end, start + 50)]}...")
             
-            return result_content
+            result = atom_table.remove_record(content, atom_index)
+            logger.molecular(f"编辑完成: {atom_table.total_lines} → {result[1].total_lines} 行")
+            return result
             
         except Exception as e:
             logger.error(f"删除原子失败: {e}")
-            return content  # 返回原始内容
+            return None
+    
+    @staticmethod
+    def _remove_last_atom_from_pdb(content: str, atom_table: AtomTable = None) -> str:
+        """
+        从PDB内容中删除最后一个原子（简单编辑功能）
+        
+        Args:
+            content: PDB文件内容
+            atom_table: content对应的原子表（不提供或不是按PDB解析的表时临时解析）
+            
+        Returns:
+            编辑后的PDB内容
+        """
+        if atom_table is None or atom_table.file_format != "pdb":
+            # 其它格式的表（XYZ/MOL/SDF）不能按PDB记录删除，否则会破坏计数行和键连接块
+            atom_table = AtomTable.from_content(content, "pdb")
+        result = MolecularDataManager._remove_atom_record(content, atom_table, len(atom_table) - 1)
+        return result[0] if result is not None else content
     
 
 
@@ -542,17 +2080,34 @@ class MolecularDataManager:
 # 便捷全局函数 - 简化版本
 # ====================================================================================================
 
-def store_molecular_data(node_id: str, filename: str, folder: str = "molecules", content: str = None):
+def store_molecular_data(node_id: str, filename: str, folder: str = "molecules", content: Union[str, bytes] = None,
+                         content_hash: str = None):
     """便捷函数 - 存储分子数据"""
-    return MolecularDataManager.store_molecular_data(node_id, filename, folder, content)
+    return MolecularDataManager.store_molecular_data(node_id, filename, folder, content, content_hash)
 
-def get_molecular_data(node_id: str):
-    """便捷函数 - 获取分子数据"""
-    return MolecularDataManager.get_molecular_data(node_id)
+def store_molecular_data_batch(items, folder: str = "molecules"):
+    """便捷函数 - 批量存储分子数据（只发送一条合并通知）"""
+    return MolecularDataManager.store_molecular_data_batch(items, folder)
 
-def get_cache_status():
+def get_molecular_data(node_id: str, content_mode: str = "text"):
+    """便捷函数 - 获取分子数据（content_mode: text / bytes / none）"""
+    return MolecularDataManager.get_molecular_data(node_id, content_mode)
+
+def get_molecular_version(node_id: str):
+    """便捷函数 - 获取内存中条目的版本信息（不读取内容）"""
+    return MolecularDataManager.get_molecular_version(node_id)
+
+def get_molecular_data_batch(node_ids, content_mode: str = "text"):
+    """便捷函数 - 批量获取分子数据（生成器，按顺序产出 (node_id, 数据或None)）"""
+    return MolecularDataManager.get_molecular_data_batch(node_ids, content_mode)
+
+def get_cache_status(include_nodes: bool = False):
     """便捷函数 - 获取缓存状态"""
-    return MolecularDataManager.get_cache_status()
+    return MolecularDataManager.get_cache_status(include_nodes)
+
+def list_cache_nodes(offset: int = 0, limit: int = 100, tab_id: str = None):
+    """便捷函数 - 分页列出缓存节点"""
+    return MolecularDataManager.list_cache_nodes(offset, limit, tab_id)
 
 def clear_cache(node_id: str = None):
     """便捷函数 - 清除缓存"""
@@ -562,6 +2117,136 @@ def edit_molecular_data(node_id: str, edit_type: str, **kwargs):
     """便捷函数 - 编辑分子数据"""
     return MolecularDataManager.edit_molecular_data(node_id, edit_type, **kwargs)
 
+def undo_edit(node_id: str):
+    """便捷函数 - 撤销最近一次编辑"""
+    return MolecularDataManager.undo_edit(node_id)
+
+def redo_edit(node_id: str):
+    """便捷函数 - 重做最近一次撤销的编辑"""
+    return MolecularDataManager.redo_edit(node_id)
+
+def get_atom_table(node_id: str):
+    """便捷函数 - 获取节点内容的原子表"""
+    return MolecularDataManager.get_atom_table(node_id)
+
+def configure_cache(max_bytes: int = None, max_entries: int = None, eviction_policy: str = None):
+    """便捷函数 - 调整缓存容量配置"""
+    return MolecularDataManager.configure_cache(max_bytes, max_entries, eviction_policy)
+
+def has_node(node_id: str):
+    """便捷函数 - 节点是否在缓存中"""
+    return MolecularDataManager.has_node(node_id)
+
+def find_nodes(filename: str = None, content_hash: str = None, tab_id: str = None):
+    """便捷函数 - 按文件名/内容哈希/tab查找节点"""
+    return MolecularDataManager.find_nodes(filename, content_hash, tab_id)
+
+def update_tab_id(node_id: str, tab_id: str):
+    """便捷函数 - 修改节点的tab_id（同步更新索引）"""
+    return MolecularDataManager.update_tab_id(node_id, tab_id)
+
+def find_molecular_data(filename: str = None, content_hash: str = None, tab_id: str = None):
+    """便捷函数 - 按文件名/内容哈希/tab查找分子数据"""
+    return MolecularDataManager.find_molecular_data(filename, content_hash, tab_id)
+
+def purge_tab(tab_id: str):
+    """便捷函数 - 清除一个tab下的所有节点"""
+    return MolecularDataManager.purge_tab(tab_id)
+
+def expire_idle_tabs():
+    """便捷函数 - 清除空闲超时的tab"""
+    return MolecularDataManager.expire_idle_tabs()
+
+def save_snapshot(force: bool = False):
+    """便捷函数 - 立即保存缓存快照"""
+    return MolecularDataManager.save_snapshot(force)
+
+
+# ====================================================================================================
+# ⚙️ 异步门面 - 供aiohttp处理函数使用，缓存操作在 CACHE_EXECUTOR 的工作线程中执行
+# ====================================================================================================
+
+class AsyncMolecularDataManager:
+    """
+    MolecularDataManager 的异步门面
+    
+    原子统计、行拆分、文件写入和锁等待都在有界线程池中完成，事件循环只等待结果。
+    WebSocket通知经 notification_dispatcher 跨线程投递，不受影响。
+    """
+    
+    @staticmethod
+    async def run(func, *args, **kwargs):
+        """在缓存工作线程中执行任意同步函数（组合操作、序列化、压缩）"""
+        return await CACHE_EXECUTOR.run(func, *args, **kwargs)
+    
+    @staticmethod
+    async def store_molecular_data(node_id: str, filename: str, folder: str = "molecules",
+                                   content: Union[str, bytes] = None, content_hash: str = None):
+        return await CACHE_EXECUTOR.run(MolecularDataManager.store_molecular_data,
+                                        node_id, filename, folder, content, content_hash)
+    
+    @staticmethod
+    async def store_molecular_data_batch(items, folder: str = "molecules"):
+        """items可以是生成器（例如逐个读出暂存文件），在工作线程中被消费"""
+        return await CACHE_EXECUTOR.run(MolecularDataManager.store_molecular_data_batch, items, folder)
+    
+    @staticmethod
+    async def get_molecular_data(node_id: str, content_mode: str = "text"):
+        return await CACHE_EXECUTOR.run(MolecularDataManager.get_molecular_data, node_id, content_mode)
+    
+    @staticmethod
+    async def get_molecular_version(node_id: str):
+        return await CACHE_EXECUTOR.run(MolecularDataManager.get_molecular_version, node_id)
+    
+    @staticmethod
+    def iterate(iterator: Iterator, close=None):
+        """
+        在工作线程中逐项推进同步迭代器（例如 get_molecular_data_batch() 的生成器），返回异步迭代器
+        
+        结束或被取消时由工作线程关闭迭代器（close，默认 iterator.close），释放尚未产出的条目的引用；
+        提前退出时调用方应使用 contextlib.aclosing
+        """
+        return CACHE_EXECUTOR.iterate(iterator, close)
+    
+    @staticmethod
+    async def get_cache_status(include_nodes: bool = False):
+        return await CACHE_EXECUTOR.run(MolecularDataManager.get_cache_status, include_nodes)
+    
+    @staticmethod
+    async def list_cache_nodes(offset: int = 0, limit: int = 100, tab_id: str = None):
+        return await CACHE_EXECUTOR.run(MolecularDataManager.list_cache_nodes, offset, limit, tab_id)
+    
+    @staticmethod
+    async def clear_cache(node_id: str = None):
+        return await CACHE_EXECUTOR.run(MolecularDataManager.clear_cache, node_id)
+    
+    @staticmethod
+    async def edit_molecular_data(node_id: str, edit_type: str, **kwargs):
+        return await CACHE_EXECUTOR.run(MolecularDataManager.edit_molecular_data, node_id, edit_type, **kwargs)
+    
+    @staticmethod
+    async def undo_edit(node_id: str):
+        return await CACHE_EXECUTOR.run(MolecularDataManager.undo_edit, node_id)
+    
+    @staticmethod
+    async def redo_edit(node_id: str):
+        return await CACHE_EXECUTOR.run(MolecularDataManager.redo_edit, node_id)
+    
+    @staticmethod
+    async def find_molecular_data(filename: str = None, content_hash: str = None, tab_id: str = None):
+        return await CACHE_EXECUTOR.run(MolecularDataManager.find_molecular_data, filename, content_hash, tab_id)
+    
+    @staticmethod
+    async def purge_tab(tab_id: str):
+        return await CACHE_EXECUTOR.run(MolecularDataManager.purge_tab, tab_id)
+
+
+# 📸 启动时读入快照索引并在后台预热；退出时保存最终快照
+# （在溢出层和写回队列之后注册，atexit按注册的逆序执行，保存快照时它们仍然可用）
+if SNAPSHOT_STORE is not None:
+    MolecularDataManager.start_snapshot_service()
+    atexit.register(MolecularDataManager._shutdown_snapshot)
+
 
 # ====================================================================================================
 # 🔑 Active Tab ID 管理功能
@@ -76,11 +76,9 @@ def get_molecular_content(input_value: str, node_id: Optional[str] = None, fallb
         content = None
         
         try:
-            from .memory import get_cache_status, get_molecular_data
+            from .memory import get_molecular_data, has_node, find_nodes
             
-            # 🔑 改进的内存查找策略，支持tab_id匹配
-            cache_status = get_cache_status()
-            logger.debug(f"🧠 内存缓存状态: {cache_status.get('total_nodes', 0)} 个节点")
+            # 🔑 改进的内存查找策略，支持tab_id匹配（只查索引，不遍历整个缓存）
             
             # 🎯 提取当前节点的tab_id（如果node_id可用）
             current_tab_id = None
@@ -91,8 +89,8 @@ def get_molecular_content(input_value: str, node_id: Optional[str] = None, fallb
                 logger.debug(f"  - 提取的tab_id: '{current_tab_id}'")
                 logger.debug(f"  - 节点编号部分: '{node_id.split('_node_')[1] if len(node_id.split('_node_')) > 1 else 'None'}")
             
-            # 🎯 优先级1: 精确匹配（完整node_id匹配）
-            if node_id and node_id in [node.get('node_id') for node in cache_status.get('nodes', [])]:
+            # 🎯 优先级1: 精确匹配（完整node_id匹配，内存未命中时会透明地从磁盘溢出层取回）
+            if node_id and has_node(node_id):
                 source_data = get_molecular_data(node_id)
                 if source_data and 'content' in source_data and source_data.get('filename') == filename:
                     content = source_data['content']
@@ -134,7 +132,8 @@ def get_molecular_content(input_value: str, node_id: Optional[str] = None, fallb
             logger.warning(f"  - 查找的文件名: '{filename}'")
             logger.warning(f"  - 当前节点ID: '{node_id}'")
             logger.warning(f"  - 当前Tab ID: '{current_tab_id}'")
-            logger.warning(f"  - 缓存中的所有节点: {[node.get('node_id') for node in cache_status.get('nodes', [])]}")
+            if current_tab_id:
+                logger.warning(f"  - 同一Tab中的节点: {find_nodes(tab_id=current_tab_id)}")
             logger.warning(f"  - 跳过文件名回退查找避免数据混乱")
             
         except Exception as memory_error:
@@ -153,6 +152,13 @@ def get_molecular_content(input_value: str, node_id: Optional[str] = None, fallb
                 molecules_dir = os.path.join(input_dir, 'molecules')
                 file_path = os.path.join(molecules_dir, filename)
                 
+                # 🔑 优先查找 _save_to_filesystem 写入的带节点后缀的文件
+                if node_id:
+                    from .memory import MolecularDataManager
+                    node_file_path = os.path.join(molecules_dir, MolecularDataManager.get_unique_filename(filename, node_id))
+                    if os.path.exists(node_file_path):
+                        file_path = node_file_path
+                
                 if os.path.exists(file_path):
                     with open(file_path, 'r', encoding='utf-8') as f:
                         content = f.read()
@@ -248,46 +254,48 @@ def _detect_input_type(input_value: str) -> Tuple[str, bool]:
 def _analyze_molecular_content(content: str) -> Dict[str, Any]:
     """
     分析分子内容，提取格式和统计信息
+    
+    原子数由原子表得出：内容已在缓存中时直接复用已解析的表，不再逐行切分
     """
     try:
-        lines = content.split('\n')
+        from .memory import MolecularDataManager
         
         analysis = {
-            "total_lines": len(lines),
+            "total_lines": content.count('\n') + 1 if content else 0,
             "content_length": len(content),
             "format": "unknown",
             "format_name": "Unknown"
         }
         
+        first_line = content[:content.find('\n')] if '\n' in content else content
+        
         # PDB格式检测
-        if any(line.startswith(('HEADER', 'ATOM', 'HETATM')) for line in lines):
+        if content.startswith(('HEADER', 'ATOM', 'HETATM')) or \
+                any(f"\n{record}" in content for record in ('HEADER', 'ATOM', 'HETATM')):
             analysis["format"] = ".pdb"
             analysis["format_name"] = "Protein Data Bank"
             
-            # 统计原子数
-            atom_lines = [line for line in lines if line.startswith('ATOM')]
-            analysis["atoms"] = len(atom_lines)
+            # 统计原子数（只统计ATOM记录）
+            atom_table = MolecularDataManager.get_atom_table_for_content(content, "pdb")
+            analysis["atoms"] = atom_table.count(hetatm=False)
             
         # SDF格式检测
         elif '$$$$' in content:
             analysis["format"] = ".sdf"
             analysis["format_name"] = "Structure Data Format"
             
-            # 尝试解析原子数（SDF格式第4行的前3位）
-            if len(lines) >= 4:
-                try:
-                    atom_count = int(lines[3][:3].strip())
-                    analysis["atoms"] = atom_count
-                except:
-                    pass
+            # 原子数来自SDF第4行的计数行
+            atom_table = MolecularDataManager.get_atom_table_for_content(content, "sdf")
+            if len(atom_table):
+                analysis["atoms"] = len(atom_table)
                     
         # XYZ格式检测
-        elif len(lines) > 0 and lines[0].strip().isdigit():
+        elif first_line.strip().isdigit():
             analysis["format"] = ".xyz"
             analysis["format_name"] = "XYZ Coordinates"
             
             try:
-                analysis["atoms"] = int(lines[0].strip())
+                analysis["atoms"] = int(first_line.strip())
             except:
                 pass
                 
@@ -304,7 +312,7 @@ def _analyze_molecular_content(content: str) -> Dict[str, Any]:
     except Exception as e:
         logger.warning(f"分析分子内容时出错: {e}")
         return {
-            "total_lines": len(content.split('\n')) if content else 0,
+            "total_lines": content.count('\n') + 1 if content else 0,
             "content_length": len(content),
             "format": "unknown",
             "format_name": "Unknown",
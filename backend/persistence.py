@@ -0,0 +1,211 @@
+"""
+💾 ALCHEM_PropBtn 文件系统写回队列 (persistence.py)
+
+store_molecular_data 不再同步写文件，而是把写请求交给后台线程：
+- 合并写入：同一文件在写入前被多次更新时只写最后一次
+- 跳过未变化的内容：与上次写入的内容哈希相同则不写
+- 原子写入：先写临时文件再 os.replace，读者不会看到写了一半的文件
+- 进程退出时自动刷新队列
+
+持久化策略（durability policy）：
+- off:          不写文件系统（只保留内存缓存）
+- async:        后台写回（默认）
+- async_fsync:  后台写回，每个文件写完后fsync
+- sync:         在调用线程中立即写入并fsync
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Any, Optional, Tuple, Union
+
+# 使用统一的ALCHEM日志系统
+from .logging_config import get_alchem_logger
+
+logger = get_alchem_logger('Persistence')
+
+SUPPORTED_PERSIST_POLICIES = ("off", "async", "async_fsync", "sync")
+
+
+class WriteBehindWriter:
+    """
+    💾 后台写回文件的写入器
+
+    submit() 是线程安全的，只在内存中登记写请求，不做任何磁盘IO（sync策略除外）。
+    """
+
+    def __init__(self, policy: str = "async"):
+        if policy not in SUPPORTED_PERSIST_POLICIES:
+            logger.warning(f"不支持的持久化策略: {policy}，使用async")
+            policy = "async"
+        self.policy = policy
+
+        self._cond = threading.Condition(threading.Lock())
+        # 待写入: path -> (content, content_hash)
+        self._pending: Dict[str, Tuple[str, Optional[str]]] = {}
+        # 每个文件最后一次写入（或正在写入）的内容哈希
+        self._written_hashes: Dict[str, Optional[str]] = {}
+        self._known_dirs = set()
+        self._in_flight = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        self._stats = {
+            "submitted": 0,
+            "coalesced": 0,
+            "skipped_unchanged": 0,
+            "written": 0,
+            "failed": 0,
+            "bytes_written": 0,
+            "last_write_at": None
+        }
+
+    def submit(self, path: str, content: Union[str, bytes], content_hash: str = None) -> bool:
+        """
+        登记一次文件写入
+
+        Args:
+            path: 目标文件路径
+            content: 文件内容（bytes按原样写入，str按UTF-8写入）
+            content_hash: 内容哈希（用于跳过未变化的写入，可选）
+
+        Returns:
+            是否登记（或执行）了写入；被跳过时返回False
+        """
+        if self.policy == "off":
+            return False
+
+        with self._cond:
+            self._stats["submitted"] += 1
+
+            if content_hash is not None and path not in self._pending \
+                    and self._written_hashes.get(path) == content_hash:
+                self._stats["skipped_unchanged"] += 1
+                return False
+
+            if self.policy == "sync":
+                self._written_hashes[path] = content_hash
+            else:
+                if path in self._pending:
+                    self._stats["coalesced"] += 1
+                self._pending[path] = (content, content_hash)
+                self._ensure_worker()
+                self._cond.notify_all()
+                return True
+
+        # sync策略：在调用线程中写入
+        self._write_file(path, content)
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        等待所有待写入的文件落盘
+
+        Returns:
+            是否在超时前全部写完
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._pending or self._in_flight:
+                if self._thread is None or not self._thread.is_alive():
+                    # 后台线程不存在时直接在当前线程写完
+                    self._drain_locked()
+                    continue
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: float = 30.0):
+        """刷新队列并停止后台线程（进程退出时调用）"""
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if not flushed:
+            logger.warning(f"写回队列未能在 {timeout} 秒内刷新完成，剩余 {len(self._pending)} 个文件")
+
+    def forget(self, path: str):
+        """丢弃某个文件的待写入请求和哈希记录"""
+        with self._cond:
+            self._pending.pop(path, None)
+            self._written_hashes.pop(path, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取写回队列统计信息"""
+        with self._cond:
+            return dict(self._stats, policy=self.policy, pending=len(self._pending), in_flight=self._in_flight)
+
+    # ====================================================================================================
+    # 内部函数
+    # ====================================================================================================
+
+    def _ensure_worker(self):
+        """按需启动后台写入线程（调用方必须已持有self._cond）"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="ALCHEM-WriteBehind", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """后台线程主循环"""
+        with self._cond:
+            while True:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if not self._pending and self._stopping:
+                    return
+                self._drain_locked()
+
+    def _drain_locked(self):
+        """写出当前所有待写入文件（调用方必须已持有self._cond，写入期间会临时释放）"""
+        batch = self._pending
+        self._pending = {}
+        self._in_flight += len(batch)
+        for path, (_, content_hash) in batch.items():
+            self._written_hashes[path] = content_hash
+
+        self._cond.release()
+        try:
+            for path, (content, _) in batch.items():
+                self._write_file(path, content)
+        finally:
+            self._cond.acquire()
+            self._in_flight -= len(batch)
+            self._cond.notify_all()
+
+    def _write_file(self, path: str, content: Union[str, bytes]):
+        """原子写入单个文件：临时文件 + os.replace"""
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            directory = os.path.dirname(path)
+            if directory not in self._known_dirs:
+                os.makedirs(directory, exist_ok=True)
+                self._known_dirs.add(directory)
+
+            # 上传的原始字节按原样写入，不经过解码/重新编码
+            f = open(tmp_path, 'w', encoding='utf-8') if isinstance(content, str) else open(tmp_path, 'wb')
+            with f:
+                f.write(content)
+                if self.policy in ("async_fsync", "sync"):
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+            with self._cond:
+                self._stats["written"] += 1
+                self._stats["bytes_written"] += len(content)
+                self._stats["last_write_at"] = time.time()
+            logger.storage(f"文件已保存: {path}")
+
+        except Exception as e:
+            with self._cond:
+                self._stats["failed"] += 1
+                # 写入失败时清除哈希记录，下次相同内容仍会重试
+                self._written_hashes.pop(path, None)
+            logger.warning(f"文件系统保存失败: {path} - {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,195 @@
+"""
+🗜️ ALCHEM_PropBtn 预压缩响应缓存 (response_cache.py)
+
+查看器每次打开面板都会把同一个缓存条目重新序列化为JSON，且响应不压缩。
+本模块缓存序列化并压缩后的响应体，键为 (node_id, version, variant, encoding)：
+- variant 区分响应表示（JSON/二进制封装、字段投影），encoding 为 gzip 或 deflate
+- 首次请求时填充，之后同一版本的重复请求直接返回预压缩的字节
+- version 在存储/编辑时递增，旧版本不会被命中；memory.py 在存储/编辑/清除时
+  调用 invalidate() 及时释放旧版本占用的内存
+- 按字节数上限做LRU淘汰，小于 ALCHEM_RESPONSE_COMPRESS_MIN_BYTES 的响应不压缩也不缓存
+"""
+
+import os
+import gzip
+import zlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# 使用统一的ALCHEM日志系统
+from .logging_config import get_alchem_logger
+
+logger = get_alchem_logger('ResponseCache')
+
+# 预压缩响应缓存的字节上限，0表示禁用
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("ALCHEM_RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# 小于该字节数的响应直接返回（压缩收益不抵开销）
+RESPONSE_COMPRESS_MIN_BYTES = int(os.environ.get("ALCHEM_RESPONSE_COMPRESS_MIN_BYTES", 8192))
+# 压缩级别（1最快，9最小）
+RESPONSE_COMPRESS_LEVEL = int(os.environ.get("ALCHEM_RESPONSE_COMPRESS_LEVEL", 6))
+
+# 支持的编码，按优先顺序
+SUPPORTED_ENCODINGS = ("gzip", "deflate")
+
+
+def compress_body(body: bytes, encoding: str, level: int = None) -> bytes:
+    """按HTTP Content-Encoding压缩响应体（deflate为zlib封装格式）"""
+    level = RESPONSE_COMPRESS_LEVEL if level is None else level
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == "deflate":
+        return zlib.compress(body, level)
+    raise ValueError(f"不支持的编码: {encoding}")
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    按Accept-Encoding选择压缩编码（q值最高者，相同时优先gzip）
+
+    Returns:
+        "gzip"、"deflate"，客户端不接受压缩时返回None
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for coding in accept_encoding.split(","):
+        parts = [part.strip() for part in coding.split(";")]
+        name = parts[0].lower()
+        weight = 1.0
+        for param in parts[1:]:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class CompressedResponseCache:
+    """
+    🗜️ 预压缩响应缓存（线程安全，LRU按字节数淘汰）
+    """
+
+    def __init__(self, max_bytes: int = None, min_bytes: int = None):
+        """
+        Args:
+            max_bytes: 缓存字节上限（默认 RESPONSE_CACHE_MAX_BYTES，0表示禁用）
+            min_bytes: 参与压缩的最小响应字节数（默认 RESPONSE_COMPRESS_MIN_BYTES）
+        """
+        self.max_bytes = RESPONSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.min_bytes = RESPONSE_COMPRESS_MIN_BYTES if min_bytes is None else min_bytes
+        self._lock = threading.Lock()
+        # (node_id, version, variant, encoding) -> 压缩后的响应体
+        self._entries: "OrderedDict[Tuple[str, Any, str, str], bytes]" = OrderedDict()
+        # node_id -> 该节点的键集合（按节点失效）
+        self._node_keys: Dict[str, set] = {}
+        self._bytes = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "fills": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "uncompressed_bytes": 0,
+            "compressed_bytes": 0
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def should_compress(self, size: int) -> bool:
+        """响应体是否值得压缩"""
+        return size >= self.min_bytes
+
+    def get(self, node_id: str, version: Any, variant: str, encoding: str) -> Optional[bytes]:
+        """获取预压缩的响应体，不存在返回None"""
+        if not self.enabled:
+            return None
+        key = (node_id, version, variant, encoding)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return body
+
+    def put(self, node_id: str, version: Any, variant: str, encoding: str, body: bytes,
+            uncompressed_size: int = 0):
+        """保存预压缩的响应体（超过上限时淘汰最久未使用的）"""
+        if not self.enabled or len(body) > self.max_bytes:
+            return
+        key = (node_id, version, variant, encoding)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = body
+            self._node_keys.setdefault(node_id, set()).add(key)
+            self._bytes += len(body)
+            self._stats["fills"] += 1
+            self._stats["uncompressed_bytes"] += uncompressed_size
+            self._stats["compressed_bytes"] += len(body)
+
+            while self._bytes > self.max_bytes and self._entries:
+                old_key, old_body = self._entries.popitem(last=False)
+                self._forget_key(old_key)
+                self._bytes -= len(old_body)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, node_id: str = None) -> int:
+        """
+        删除节点（None表示所有节点）的所有预压缩响应
+
+        Returns:
+            删除的响应数
+        """
+        with self._lock:
+            if node_id is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._node_keys.clear()
+                self._bytes = 0
+            else:
+                keys = self._node_keys.pop(node_id, ())
+                removed = 0
+                for key in keys:
+                    body = self._entries.pop(key, None)
+                    if body is not None:
+                        self._bytes -= len(body)
+                        removed += 1
+            if removed:
+                self._stats["invalidations"] += removed
+            return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), bytes=self._bytes,
+                         max_bytes=self.max_bytes, min_bytes=self.min_bytes)
+        if stats["uncompressed_bytes"]:
+            stats["compression_ratio"] = round(stats["compressed_bytes"] / stats["uncompressed_bytes"], 4)
+        return stats
+
+    def _forget_key(self, key: Tuple[str, Any, str, str]):
+        """从节点键集合中移除（调用方必须已持有self._lock）"""
+        keys = self._node_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._node_keys[key[0]]
+
+
+# 全局预压缩响应缓存（api.py 填充和读取，memory.py 在数据变化时失效）
+RESPONSE_CACHE = CompressedResponseCache()
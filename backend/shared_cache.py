@@ -0,0 +1,353 @@
+"""
+🔗 ALCHEM_PropBtn 跨进程共享缓存 (shared_cache.py)
+
+同一主机上的多个ComfyUI工作进程共享分子数据：
+- 内容放在 multiprocessing.shared_memory 段中（按content_hash命名，相同内容只有一份）
+- 节点元数据和段的对应关系放在一个小的SQLite索引文件中，由SQLite的文件锁串行化写入
+- 每个进程仍保留自己的内存缓存，只在本地未命中或其他进程更新过索引时才访问共享层
+  （用 PRAGMA data_version 检测其他进程的提交，本地命中的检查不访问磁盘内容）
+
+共享内存段的生命周期由索引中的引用决定：最后一个引用该内容的节点被删除时，
+删除它的进程负责unlink。段不随创建它的进程退出而消失。
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Any, Optional, Tuple, Union
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+    SHARED_MEMORY_AVAILABLE = True
+except ImportError:
+    SHARED_MEMORY_AVAILABLE = False
+
+# 使用统一的ALCHEM日志系统
+from .logging_config import get_alchem_logger
+
+logger = get_alchem_logger('SharedCache')
+
+# 共享索引中不保存这些进程内的运行时字段
+LOCAL_FIELDS = ("content", "edit_state", "edit_history", "shared_generation")
+
+
+class SharedMolecularCache:
+    """
+    🔗 基于共享内存段 + SQLite索引的跨进程缓存
+
+    所有公开方法都是线程安全的（每个进程一个数据库连接，由self._lock串行化）。
+    """
+
+    def __init__(self, index_path: str, segment_prefix: str = "alchem_"):
+        """
+        Args:
+            index_path: SQLite索引文件路径（同一主机上的所有工作进程必须相同）
+            segment_prefix: 共享内存段名前缀
+        """
+        if not SHARED_MEMORY_AVAILABLE:
+            raise RuntimeError("当前Python不支持 multiprocessing.shared_memory")
+
+        self.index_path = index_path
+        self.segment_prefix = segment_prefix
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+        # 其他进程提交过修改的次数（本进程观察到的代数）
+        self._generation = 0
+        self._data_version = None
+
+        self._stats = {
+            "published": 0,
+            "fetched": 0,
+            "refreshed": 0,
+            "removed": 0,
+            "segments_created": 0,
+            "segments_unlinked": 0,
+            "failed": 0
+        }
+
+    # ====================================================================================================
+    # 读取
+    # ====================================================================================================
+
+    def generation(self) -> int:
+        """
+        其他进程修改共享索引的代数（变化时本地缓存需要校验）
+
+        只执行 PRAGMA data_version，不读取任何表。
+        """
+        with self._lock:
+            try:
+                data_version = self._get_connection().execute("PRAGMA data_version").fetchone()[0]
+            except Exception as e:
+                logger.warning(f"读取共享索引版本失败: {e}")
+                return self._generation
+            if data_version != self._data_version:
+                self._data_version = data_version
+                self._generation += 1
+            return self._generation
+
+    def get_hash(self, node_id: str) -> Optional[str]:
+        """节点在共享索引中的内容哈希，不存在返回None"""
+        with self._lock:
+            try:
+                row = self._get_connection().execute(
+                    "SELECT content_hash FROM entries WHERE node_id = ?", (node_id,)
+                ).fetchone()
+                return row[0] if row is not None else None
+            except Exception as e:
+                logger.warning(f"查询共享索引失败: 节点 {node_id} - {e}")
+                return None
+
+    def fetch(self, node_id: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        """
+        从共享层读取节点的元数据和内容
+
+        Returns:
+            (元数据, 原始字节内容)，不存在返回None
+        """
+        with self._lock:
+            try:
+                row = self._get_connection().execute(
+                    "SELECT e.metadata, s.shm_name, s.size FROM entries e "
+                    "JOIN segments s ON s.content_hash = e.content_hash WHERE e.node_id = ?",
+                    (node_id,)
+                ).fetchone()
+            except Exception as e:
+                logger.warning(f"查询共享索引失败: 节点 {node_id} - {e}")
+                return None
+            if row is None:
+                return None
+
+            metadata_json, shm_name, size = row
+            content = self._read_segment(shm_name, size)
+            if content is None:
+                return None
+            self._stats["fetched"] += 1
+
+        return json.loads(metadata_json), content
+
+    # ====================================================================================================
+    # 写入
+    # ====================================================================================================
+
+    def publish(self, node_id: str, metadata: Dict[str, Any], content: Union[str, bytes]) -> bool:
+        """
+        发布节点数据到共享层（内容相同的段直接复用）
+
+        Args:
+            node_id: 节点ID
+            metadata: 缓存条目（必须包含content_hash）
+            content: 内容（str按UTF-8编码，bytes直接写入）
+
+        Returns:
+            是否发布成功
+        """
+        content_hash = metadata.get("content_hash")
+        if not content_hash:
+            return False
+
+        try:
+            metadata_json = json.dumps({k: v for k, v in metadata.items() if k not in LOCAL_FIELDS},
+                                       ensure_ascii=False, default=str)
+        except Exception as e:
+            logger.warning(f"共享元数据序列化失败: 节点 {node_id} - {e}")
+            return False
+
+        with self._lock:
+            try:
+                conn = self._get_connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    segment = conn.execute(
+                        "SELECT shm_name FROM segments WHERE content_hash = ?", (content_hash,)
+                    ).fetchone()
+                    if segment is None:
+                        payload = content.encode("utf-8") if isinstance(content, str) else content
+                        shm_name = self._write_segment(content_hash, payload)
+                        conn.execute(
+                            "INSERT INTO segments (content_hash, shm_name, size) VALUES (?, ?, ?)",
+                            (content_hash, shm_name, len(payload))
+                        )
+
+                    old = conn.execute(
+                        "SELECT content_hash, version FROM entries WHERE node_id = ?", (node_id,)
+                    ).fetchone()
+                    conn.execute(
+                        "INSERT OR REPLACE INTO entries (node_id, metadata, content_hash, version, updated_at, owner_pid) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (node_id, metadata_json, content_hash, (old[1] + 1) if old else 1, time.time(), os.getpid())
+                    )
+                    if old is not None and old[0] != content_hash:
+                        self._release_segment_locked(conn, old[0])
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+
+                # 本连接自己的提交不会改变 data_version，本地缓存不会因此重新校验
+                self._stats["published"] += 1
+                return True
+
+            except Exception as e:
+                self._stats["failed"] += 1
+                logger.warning(f"发布到共享缓存失败: 节点 {node_id} - {e}")
+                return False
+
+    def remove(self, node_id: str = None) -> int:
+        """
+        从共享层删除节点（None表示所有节点），不再被引用的共享内存段会被unlink
+
+        Returns:
+            删除的节点数
+        """
+        with self._lock:
+            try:
+                conn = self._get_connection()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if node_id is None:
+                        hashes = [row[0] for row in conn.execute("SELECT DISTINCT content_hash FROM entries")]
+                        removed = conn.execute("DELETE FROM entries").rowcount
+                    else:
+                        row = conn.execute(
+                            "SELECT content_hash FROM entries WHERE node_id = ?", (node_id,)
+                        ).fetchone()
+                        hashes = [row[0]] if row is not None else []
+                        removed = conn.execute("DELETE FROM entries WHERE node_id = ?", (node_id,)).rowcount
+                    for content_hash in hashes:
+                        self._release_segment_locked(conn, content_hash)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+
+                self._stats["removed"] += removed
+                return removed
+
+            except Exception as e:
+                self._stats["failed"] += 1
+                logger.warning(f"从共享缓存删除失败: {node_id} - {e}")
+                return 0
+
+    def record_refresh(self):
+        """记录一次因其他进程更新而刷新本地条目"""
+        with self._lock:
+            self._stats["refreshed"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取共享缓存统计信息"""
+        with self._lock:
+            return dict(self._stats, generation=self._generation, index_path=self.index_path)
+
+    def close(self):
+        """关闭索引连接（共享内存段保留给其他进程）"""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+                self._conn = None
+
+    # ====================================================================================================
+    # 内部函数 - 调用方必须已持有self._lock
+    # ====================================================================================================
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """懒加载索引连接"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.index_path, check_same_thread=False,
+                                         isolation_level=None, timeout=10.0)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS segments ("
+                "content_hash TEXT PRIMARY KEY, "
+                "shm_name TEXT NOT NULL, "
+                "size INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "node_id TEXT PRIMARY KEY, "
+                "metadata TEXT NOT NULL, "
+                "content_hash TEXT NOT NULL, "
+                "version INTEGER NOT NULL, "
+                "updated_at REAL NOT NULL, "
+                "owner_pid INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_by_hash ON entries (content_hash)")
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            logger.storage(f"共享缓存索引已打开: {self.index_path}")
+        return self._conn
+
+    def _segment_name(self, content_hash: str) -> str:
+        """共享内存段名（macOS限制段名长度，只取哈希前缀）"""
+        return f"{self.segment_prefix}{content_hash[:22]}"
+
+    def _write_segment(self, content_hash: str, payload: bytes) -> str:
+        """创建共享内存段并写入内容（段已存在时复用）"""
+        shm_name = self._segment_name(content_hash)
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name, create=True, size=max(1, len(payload)))
+            self._stats["segments_created"] += 1
+        except FileExistsError:
+            # 其他进程在索引提交前崩溃留下的段，或并发创建：直接覆盖
+            shm = shared_memory.SharedMemory(name=shm_name)
+            if shm.size < len(payload):
+                shm.close()
+                shm.unlink()
+                shm = shared_memory.SharedMemory(name=shm_name, create=True, size=max(1, len(payload)))
+        self._untrack(shm)
+        try:
+            shm.buf[:len(payload)] = payload
+        finally:
+            shm.close()
+        return shm_name
+
+    def _read_segment(self, shm_name: str, size: int) -> Optional[bytes]:
+        """读取共享内存段内容"""
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name)
+        except FileNotFoundError:
+            logger.warning(f"共享内存段不存在: {shm_name}")
+            return None
+        self._untrack(shm)
+        try:
+            return bytes(shm.buf[:size])
+        finally:
+            shm.close()
+
+    def _release_segment_locked(self, conn: sqlite3.Connection, content_hash: str):
+        """内容不再被任何节点引用时删除段（调用方已在写事务中）"""
+        still_used = conn.execute(
+            "SELECT 1 FROM entries WHERE content_hash = ? LIMIT 1", (content_hash,)
+        ).fetchone()
+        if still_used is not None:
+            return
+        row = conn.execute("SELECT shm_name FROM segments WHERE content_hash = ?", (content_hash,)).fetchone()
+        conn.execute("DELETE FROM segments WHERE content_hash = ?", (content_hash,))
+        if row is None:
+            return
+        try:
+            # unlink() 会自行注销 resource_tracker 的登记，这里不需要 _untrack()
+            shm = shared_memory.SharedMemory(name=row[0])
+            shm.close()
+            shm.unlink()
+            self._stats["segments_unlinked"] += 1
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _untrack(shm):
+        """
+        不让 resource_tracker 在本进程退出时unlink共享内存段
+        （段的生命周期由索引中的引用决定，而不是由创建或读取它的进程决定）
+        """
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
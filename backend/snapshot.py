@@ -0,0 +1,348 @@
+"""
+📸 ALCHEM_PropBtn 缓存快照 (snapshot.py)
+
+定期（以及进程退出时）把内存缓存的元数据和内容blob写入本地SQLite快照，
+服务器重启后先只读回轻量索引，内容在后台按最近使用顺序预热，
+预热完成前未命中的节点在 get_molecular_data 时按需读回。
+
+设计要点：
+- 快照文件跨进程保留（与磁盘溢出层不同，溢出层只服务于当前进程）
+- 多个工作进程共用同一个快照文件：按node_id合并写入，只删除本进程写过、已不在缓存中的条目，
+  不会覆盖其他进程保存的节点
+- blob按content_hash存储且保持原有的压缩形式，增量保存：在写事务内重新读取文件中已有的blob，
+  只写缺少的blob，删除不再被任何条目引用的blob
+- 缓存内容未变化（node_id与content_hash的集合相同）且其他进程没有修改快照文件时跳过保存
+- 单个事务内完成保存，进程中途退出时保留上一次完整的快照
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple, Callable
+
+# 使用统一的ALCHEM日志系统
+from .logging_config import get_alchem_logger
+
+logger = get_alchem_logger('Snapshot')
+
+# 快照中的条目不保存这些运行时字段（编辑日志不进入快照，重启后不能撤销）
+VOLATILE_FIELDS = ("content", "edit_state", "shared_generation")
+
+
+class MolecularSnapshotStore:
+    """
+    📸 基于SQLite的缓存快照
+
+    所有公开方法都是线程安全的。open() 之后，快照中尚未恢复到内存的条目
+    保存在待恢复索引中（只含元数据），load()/discard() 按节点取出或丢弃。
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: SQLite快照文件路径
+        """
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+        # 待恢复索引: node_id -> 元数据（按快照时的顺序，最近使用的在最前面）
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # 快照文件中已有的blob（上一次保存或打开时读取，仅用于统计）
+        self._saved_hashes = set()
+        # 本进程写入（或打开时读入）的条目: node_id -> content_hash，不再在缓存中时从文件删除
+        self._owned: Dict[str, str] = {}
+        # 上一次保存的缓存签名，以及当时快照文件的版本（PRAGMA data_version，其他连接提交后改变）
+        self._signature = None
+        self._data_version = None
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        # 统计信息
+        self._stats = {
+            "loaded_entries": 0,
+            "restored": 0,
+            "saves": 0,
+            "skipped_unchanged": 0,
+            "failed": 0,
+            "blobs_written": 0,
+            "bytes_written": 0,
+            "last_saved_at": None,
+            "last_save_seconds": None
+        }
+
+    def open(self) -> int:
+        """
+        打开快照文件并读入待恢复索引（不读取内容）
+
+        Returns:
+            待恢复的条目数
+        """
+        with self._lock:
+            try:
+                conn = self._get_connection()
+                self._saved_hashes = {row[0] for row in conn.execute("SELECT content_hash FROM blobs")}
+                self._pending.clear()
+                for node_id, metadata_json in conn.execute(
+                        "SELECT node_id, metadata FROM entries ORDER BY position"):
+                    metadata = json.loads(metadata_json)
+                    if metadata.get("content_hash") in self._saved_hashes:
+                        self._pending[node_id] = metadata
+                self._owned = {node_id: metadata.get("content_hash") for node_id, metadata in self._pending.items()}
+                self._signature = self._compute_signature(self._pending.items())
+                self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+                self._stats["loaded_entries"] = len(self._pending)
+            except Exception as e:
+                logger.warning(f"读取缓存快照失败，从空缓存启动: {self.db_path} - {e}")
+                self._pending.clear()
+                self._saved_hashes = set()
+                self._owned = {}
+                self._stats["failed"] += 1
+            return len(self._pending)
+
+    def contains(self, node_id: str) -> bool:
+        """检查节点是否在待恢复索引中（只查内存索引）"""
+        return node_id in self._pending
+
+    def pending_nodes(self) -> List[str]:
+        """待恢复的节点ID（最近使用的在最前面）"""
+        with self._lock:
+            return list(self._pending.keys())
+
+    def pending_entries(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """待恢复的条目（元数据副本）"""
+        with self._lock:
+            return [(node_id, dict(metadata)) for node_id, metadata in self._pending.items()]
+
+    def get_metadata(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """获取待恢复条目的元数据副本（只查内存索引）"""
+        metadata = self._pending.get(node_id)
+        return dict(metadata) if metadata is not None else None
+
+    def load(self, node_id: str) -> Optional[Tuple[Dict[str, Any], bytes, str, int]]:
+        """
+        读取一个待恢复条目的元数据和内容（不从待恢复索引中移除，恢复完成后调用 discard()）
+
+        Returns:
+            (元数据, 编码后的内容, 编解码器名称, 原文字节数)，不存在返回None
+        """
+        with self._lock:
+            metadata = self._pending.get(node_id)
+            if metadata is None:
+                return None
+            try:
+                row = self._get_connection().execute(
+                    "SELECT data, codec, size FROM blobs WHERE content_hash = ?",
+                    (metadata.get("content_hash"),)
+                ).fetchone()
+            except Exception as e:
+                logger.warning(f"快照读取失败: 节点 {node_id} - {e}")
+                return None
+            if row is None:
+                self._pending.pop(node_id, None)
+                return None
+            self._stats["restored"] += 1
+            return dict(metadata), bytes(row[0]), row[1], row[2]
+
+    def discard(self, node_id: str = None) -> bool:
+        """
+        从待恢复索引中移除节点（已恢复或已被新数据覆盖），None则移除所有
+
+        Returns:
+            是否移除了条目
+        """
+        with self._lock:
+            if node_id is None:
+                removed = bool(self._pending)
+                self._pending.clear()
+                return removed
+            return self._pending.pop(node_id, None) is not None
+
+    def save(self, entries: List[Tuple[str, Dict[str, Any]]],
+             export: Callable[[str], Optional[Tuple[bytes, str, int]]], force: bool = False) -> bool:
+        """
+        保存快照（按node_id合并写入，增量写入blob，单个事务完成）
+
+        Args:
+            entries: (node_id, 元数据) 列表，最近使用的在最前面；元数据必须包含content_hash
+            export: content_hash -> (编码后的内容, 编解码器名称, 原文字节数)，不存在返回None
+            force: 缓存内容未变化时也保存
+
+        Returns:
+            是否写入了快照
+        """
+        start_time = time.time()
+        with self._lock:
+            # 尚未恢复到内存的条目仍保留在快照中（内容已在快照文件里）
+            seen = {node_id for node_id, _ in entries}
+            entries = list(entries) + [(node_id, dict(metadata)) for node_id, metadata in self._pending.items()
+                                       if node_id not in seen]
+
+            signature = self._compute_signature(entries)
+
+            try:
+                conn = self._get_connection()
+                data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+                if not force and signature == self._signature and data_version == self._data_version:
+                    self._stats["skipped_unchanged"] += 1
+                    return False
+
+                # 立即获取写锁：其他进程的保存在此期间不能修改blob集合
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    existing = {row[0] for row in conn.execute("SELECT content_hash FROM blobs")}
+                    blobs = []
+                    kept_entries = []
+                    for node_id, metadata in entries:
+                        content_hash = metadata.get("content_hash")
+                        if content_hash not in existing:
+                            exported = export(content_hash)
+                            if exported is None:
+                                continue
+                            blobs.append((content_hash,) + tuple(exported))
+                            existing.add(content_hash)
+                        kept_entries.append((node_id, metadata))
+                    kept_ids = {node_id for node_id, _ in kept_entries}
+
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO blobs (content_hash, data, codec, size) VALUES (?, ?, ?, ?)",
+                        [(content_hash, sqlite3.Binary(data), codec, size)
+                         for content_hash, data, codec, size in blobs]
+                    )
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO entries (node_id, metadata, content_hash, position) VALUES (?, ?, ?, ?)",
+                        [(node_id, self._serialize(metadata), metadata.get("content_hash"), position)
+                         for position, (node_id, metadata) in enumerate(kept_entries)]
+                    )
+                    # 只删除本进程写过且内容未被其他进程覆盖的条目
+                    conn.executemany(
+                        "DELETE FROM entries WHERE node_id = ? AND content_hash = ?",
+                        [(node_id, content_hash) for node_id, content_hash in self._owned.items()
+                         if node_id not in kept_ids]
+                    )
+                    conn.execute("DELETE FROM blobs WHERE content_hash NOT IN (SELECT content_hash FROM entries)")
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+
+                self._saved_hashes = {row[0] for row in conn.execute("SELECT content_hash FROM blobs")}
+                self._owned = {node_id: metadata.get("content_hash") for node_id, metadata in kept_entries}
+                self._signature = self._compute_signature(kept_entries)
+                self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+                self._stats["saves"] += 1
+                self._stats["blobs_written"] += len(blobs)
+                self._stats["bytes_written"] += sum(len(blob[1]) for blob in blobs)
+                self._stats["last_saved_at"] = time.time()
+                self._stats["last_save_seconds"] = round(time.time() - start_time, 4)
+
+                logger.storage(f"缓存快照已保存: {len(kept_entries)} 个节点，新写入 {len(blobs)} 个blob")
+                return True
+
+            except Exception as e:
+                self._stats["failed"] += 1
+                logger.warning(f"缓存快照保存失败: {e}")
+                return False
+
+    def start(self, warm: Callable[[], None], save: Callable[[], Any], interval: float):
+        """
+        启动后台线程：先执行预热，再每隔interval秒执行一次保存
+
+        Args:
+            warm: 预热函数（把待恢复条目读回内存）
+            save: 保存函数
+            interval: 保存间隔秒数，0表示只在退出时保存
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def run():
+            try:
+                warm()
+            except Exception as e:
+                logger.warning(f"缓存快照预热失败: {e}")
+            while interval > 0 and not self._stop_event.wait(interval):
+                try:
+                    save()
+                except Exception as e:
+                    logger.warning(f"定期保存缓存快照失败: {e}")
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=run, name="ALCHEM-Snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """停止后台线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def stopping(self) -> bool:
+        """是否正在停止（预热循环用来提前退出）"""
+        return self._stop_event.is_set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取快照统计信息"""
+        with self._lock:
+            return dict(
+                self._stats,
+                pending=len(self._pending),
+                blobs=len(self._saved_hashes),
+                path=self.db_path
+            )
+
+    def close(self):
+        """关闭数据库连接（保留快照文件）"""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+                self._conn = None
+            self._pending.clear()
+
+    # ====================================================================================================
+    # 内部函数
+    # ====================================================================================================
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """懒加载数据库连接（调用方必须已持有self._lock）"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                "content_hash TEXT PRIMARY KEY, "
+                "data BLOB NOT NULL, "
+                "codec TEXT NOT NULL, "
+                "size INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "node_id TEXT PRIMARY KEY, "
+                "metadata TEXT NOT NULL, "
+                "content_hash TEXT NOT NULL, "
+                "position INTEGER NOT NULL)"
+            )
+            self._conn.commit()
+            logger.storage(f"缓存快照文件已打开: {self.db_path}")
+        return self._conn
+
+    @staticmethod
+    def _serialize(metadata: Dict[str, Any]) -> str:
+        """元数据序列化（去掉运行时字段）"""
+        return json.dumps({k: v for k, v in metadata.items() if k not in VOLATILE_FIELDS},
+                          ensure_ascii=False, default=str)
+
+    @staticmethod
+    def _compute_signature(entries) -> frozenset:
+        """缓存签名：node_id与content_hash的集合（只有访问统计变化时不重写快照）"""
+        return frozenset((node_id, metadata.get("content_hash")) for node_id, metadata in entries)
@@ -0,0 +1,335 @@
+"""
+💾 ALCHEM_PropBtn 磁盘溢出层 (spill_store.py)
+
+内存缓存淘汰的分子数据不直接丢弃，而是落到本地SQLite文件中，
+get_molecular_data 未命中时可以透明地从这里取回。
+
+设计要点：
+- 每个进程独立的SQLite文件，进程退出时删除（只作为缓存层，不做持久化）
+- 内存中维护轻量索引（不含content），查询是否存在和状态列表无需访问磁盘
+- 支持磁盘字节预算，超出时按溢出时间淘汰最旧的数据
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
+
+# 使用统一的ALCHEM日志系统
+from .logging_config import get_alchem_logger
+
+logger = get_alchem_logger('SpillStore')
+
+
+class MolecularSpillStore:
+    """
+    💾 基于SQLite的分子数据溢出存储
+
+    所有公开方法都是线程安全的，数据库连接在第一次使用时才创建。
+    """
+
+    def __init__(self, db_path: str, max_bytes: int = 0):
+        """
+        Args:
+            db_path: SQLite数据库文件路径
+            max_bytes: 磁盘字节预算，0表示不限制
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+        # 轻量索引: node_id -> 摘要信息（按溢出时间排序，最旧的在最前面）
+        self._index: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._total_bytes = 0
+
+        # 统计信息
+        self._stats = {
+            "spills": 0,
+            "hits": 0,
+            "dropped": 0
+        }
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """懒加载数据库连接（调用方必须已持有self._lock）"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=OFF")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS molecular_entries ("
+                "node_id TEXT PRIMARY KEY, "
+                "metadata TEXT NOT NULL, "
+                "content BLOB NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "spilled_at REAL NOT NULL)"
+            )
+            # 溢出层只服务于当前进程，启动时清空残留数据
+            self._conn.execute("DELETE FROM molecular_entries")
+            self._conn.commit()
+            logger.storage(f"磁盘溢出层已初始化: {self.db_path}")
+        return self._conn
+
+    def contains(self, node_id: str) -> bool:
+        """检查节点是否在溢出层中（只查内存索引）"""
+        return node_id in self._index
+
+    def put(self, node_id: str, entry: Dict[str, Any], dropped: List[str] = None) -> bool:
+        """
+        将一个缓存条目写入溢出层
+
+        Args:
+            node_id: 节点ID
+            entry: 内存缓存中的条目（包含content，str或bytes）
+            dropped: 可选，追加因超出磁盘预算而被丢弃的旧节点ID（调用方据此更新索引）
+
+        Returns:
+            是否写入成功
+        """
+        content = entry.get("content") or b""
+        metadata = {k: v for k, v in entry.items() if k != "content"}
+
+        try:
+            payload = content.encode("utf-8") if isinstance(content, str) else bytes(content)
+            metadata_json = json.dumps(metadata, ensure_ascii=False, default=str)
+        except Exception as e:
+            logger.warning(f"溢出序列化失败: 节点 {node_id} - {e}")
+            return False
+
+        if self.max_bytes and len(payload) > self.max_bytes:
+            logger.warning(f"条目大小 {len(payload)} 超过磁盘预算，丢弃节点 {node_id}")
+            with self._lock:
+                self._stats["dropped"] += 1
+            return False
+
+        with self._lock:
+            old = None
+            removed: List[Tuple[str, Dict[str, Any]]] = []
+            conn = None
+            try:
+                conn = self._get_connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO molecular_entries (node_id, metadata, content, size, spilled_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (node_id, metadata_json, payload, len(payload), time.time())
+                )
+
+                old = self._index.pop(node_id, None)
+                if old is not None:
+                    self._total_bytes -= old["size"]
+                self._index[node_id] = {
+                    "node_id": node_id,
+                    "filename": metadata.get("filename"),
+                    "format": metadata.get("format"),
+                    "atoms": metadata.get("atoms", 0),
+                    "tab_id": metadata.get("tab_id"),
+                    "cached_at": metadata.get("cached_at"),
+                    "access_count": metadata.get("access_count", 0),
+                    "size": len(payload)
+                }
+                self._total_bytes += len(payload)
+
+                removed = self._enforce_budget(conn)
+                conn.commit()
+
+                self._stats["spills"] += 1
+                self._stats["dropped"] += len(removed)
+                if dropped is not None:
+                    dropped.extend(removed_id for removed_id, _ in removed)
+                for removed_id, _ in removed:
+                    logger.storage(f"磁盘溢出层超出预算，丢弃节点 {removed_id}")
+                logger.storage(f"节点 {node_id} 已溢出到磁盘 ({len(payload)} 字节)")
+                return True
+
+            except Exception as e:
+                logger.warning(f"溢出写入失败: 节点 {node_id} - {e}")
+                if conn is not None:
+                    self._rollback_put(conn, node_id, old, removed)
+                return False
+
+    def pop(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """
+        从溢出层取回条目并删除磁盘副本（用于提升回内存）
+
+        Returns:
+            完整的缓存条目（content为原始bytes），不存在返回None
+        """
+        if node_id not in self._index:
+            return None
+
+        with self._lock:
+            try:
+                conn = self._get_connection()
+                row = conn.execute(
+                    "SELECT metadata, content FROM molecular_entries WHERE node_id = ?",
+                    (node_id,)
+                ).fetchone()
+
+                self._remove_locked(conn, node_id)
+                conn.commit()
+
+                if row is None:
+                    return None
+
+                entry = json.loads(row[0])
+                entry["content"] = bytes(row[1])
+                self._stats["hits"] += 1
+
+                logger.storage(f"节点 {node_id} 从磁盘溢出层取回")
+                return entry
+
+            except Exception as e:
+                logger.warning(f"溢出读取失败: 节点 {node_id} - {e}")
+                return None
+
+    def entries(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        列出溢出层中条目的元数据（不含content，最近溢出的在最前面），用于写快照
+
+        溢出文件在进程退出时删除，快照需要同时保存溢出层中的节点。
+        """
+        with self._lock:
+            if not self._index:
+                return []
+            try:
+                rows = self._get_connection().execute(
+                    "SELECT node_id, metadata FROM molecular_entries ORDER BY spilled_at DESC"
+                ).fetchall()
+                return [(node_id, json.loads(metadata_json)) for node_id, metadata_json in rows]
+            except Exception as e:
+                logger.warning(f"读取溢出层元数据失败: {e}")
+                return []
+
+    def read_content(self, node_id: str) -> Optional[bytes]:
+        """读取节点内容（原始bytes，不从溢出层删除），不存在返回None"""
+        if node_id not in self._index:
+            return None
+
+        with self._lock:
+            try:
+                row = self._get_connection().execute(
+                    "SELECT content FROM molecular_entries WHERE node_id = ?", (node_id,)
+                ).fetchone()
+                return bytes(row[0]) if row is not None else None
+            except Exception as e:
+                logger.warning(f"溢出读取失败: 节点 {node_id} - {e}")
+                return None
+
+    def remove(self, node_id: str) -> bool:
+        """删除溢出层中的节点数据"""
+        if node_id not in self._index:
+            return False
+
+        with self._lock:
+            try:
+                conn = self._get_connection()
+                self._remove_locked(conn, node_id)
+                conn.commit()
+                return True
+            except Exception as e:
+                logger.warning(f"溢出删除失败: 节点 {node_id} - {e}")
+                return False
+
+    def clear(self):
+        """清空溢出层"""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM molecular_entries")
+                    self._conn.commit()
+                except Exception as e:
+                    logger.warning(f"清空溢出层失败: {e}")
+            self._index.clear()
+            self._total_bytes = 0
+
+    def get_info(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """获取单个节点的摘要（不访问磁盘）"""
+        info = self._index.get(node_id)
+        return dict(info) if info is not None else None
+
+    def list_nodes(self) -> List[Dict[str, Any]]:
+        """列出溢出层中的节点摘要（不访问磁盘）"""
+        with self._lock:
+            return [dict(info) for info in self._index.values()]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取溢出层统计信息"""
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "spills": self._stats["spills"],
+                "hits": self._stats["hits"],
+                "dropped": self._stats["dropped"],
+                "path": self.db_path if self._conn is not None else None
+            }
+
+    def close(self, remove_file: bool = True):
+        """关闭数据库连接，默认删除数据库文件"""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+                self._conn = None
+
+                if remove_file:
+                    for suffix in ("", "-wal", "-shm"):
+                        try:
+                            os.remove(self.db_path + suffix)
+                        except OSError:
+                            pass
+            self._index.clear()
+            self._total_bytes = 0
+
+    # ====================================================================================================
+    # 内部函数 - 调用方必须已持有self._lock
+    # ====================================================================================================
+
+    def _remove_locked(self, conn: sqlite3.Connection, node_id: str) -> Optional[Dict[str, Any]]:
+        """删除一个节点的磁盘数据和索引，返回被删除的索引项"""
+        conn.execute("DELETE FROM molecular_entries WHERE node_id = ?", (node_id,))
+        info = self._index.pop(node_id, None)
+        if info is not None:
+            self._total_bytes -= info["size"]
+        return info
+
+    def _enforce_budget(self, conn: sqlite3.Connection) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        超出磁盘预算时删除最早溢出的数据（未提交）
+
+        Returns:
+            被删除的 (node_id, 索引项) 列表，按溢出时间从旧到新
+        """
+        removed = []
+        while self.max_bytes and self._total_bytes > self.max_bytes and len(self._index) > 1:
+            oldest_id = next(iter(self._index))
+            removed.append((oldest_id, self._remove_locked(conn, oldest_id)))
+        return removed
+
+    def _rollback_put(self, conn: sqlite3.Connection, node_id: str, old: Optional[Dict[str, Any]],
+                      removed: List[Tuple[str, Dict[str, Any]]]):
+        """put() 失败时回滚事务，并把内存索引和字节统计恢复到写入之前"""
+        try:
+            conn.rollback()
+        except Exception as e:
+            logger.warning(f"溢出回滚失败: {e}")
+
+        info = self._index.pop(node_id, None)
+        if info is not None:
+            self._total_bytes -= info["size"]
+        # 被预算淘汰的是最旧的条目，按原顺序放回队首
+        for removed_id, removed_info in reversed(removed):
+            self._index[removed_id] = removed_info
+            self._index.move_to_end(removed_id, last=False)
+            self._total_bytes += removed_info["size"]
+        if old is not None:
+            # 原有条目放回队尾（只影响它的淘汰顺序）
+            self._index[node_id] = old
+            self._total_bytes += old["size"]
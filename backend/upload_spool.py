@@ -0,0 +1,727 @@
+"""
+📥 ALCHEM_PropBtn 上传暂存 (upload_spool.py)
+
+大文件上传不再一次性 `await field.read()` 读入内存：
+- multipart字段按块读取，边接收边写入暂存文件（默认 input/.alchem_cache/uploads/）
+- 接收过程中同时计算content_hash（与BLOB_STORE相同的blake2b-128）、检查大小上限、嗅探格式，
+  超限或明显不是分子文件（二进制内容）时立即中止，不必等整个文件传完
+- 接收完成后从暂存文件读出一份bytes交给缓存（内存中只保留这一份），暂存文件随即删除
+
+🧩 可续传的分块上传（ChunkedUpload / ChunkedUploadRegistry）：
+- init 时按总大小预分配暂存文件，按固定块大小划分块
+- 每个块单独PUT，带校验和（sha256或crc32），按下标写入对应偏移，可以乱序、并行
+- 连接中断后按会话ID查询缺失的块，从断点继续；全部到齐后 complete 读出内容存入缓存
+- 空闲超过 ALCHEM_UPLOAD_SESSION_TTL 的会话连同暂存文件一起清除
+
+📦 批量/压缩包上传（iter_archive_members）：
+- zip/tar（含gz/bz2/xz）先整体暂存到磁盘，再逐个成员读出交给缓存，内存中同一时刻只有一个成员
+- 成员大小、成员数和解出的总字节数都有上限（防止压缩炸弹），超限的成员逐个报告而不是中止整个批次
+"""
+
+import os
+import time
+import uuid
+import zlib
+import tarfile
+import zipfile
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple, Iterator
+import folder_paths
+
+# 使用统一的ALCHEM日志系统
+from .logging_config import get_alchem_logger
+# 暂存文件写入和哈希在缓存工作线程中执行，不阻塞事件循环
+from .cache_executor import CACHE_EXECUTOR
+
+logger = get_alchem_logger('Upload')
+
+# 单个上传文件的字节上限，0表示不限制
+UPLOAD_MAX_BYTES = int(os.environ.get("ALCHEM_UPLOAD_MAX_BYTES", 1024 * 1024 * 1024))
+# 每次从multipart字段读取的块大小
+UPLOAD_CHUNK_SIZE = int(os.environ.get("ALCHEM_UPLOAD_CHUNK_SIZE", 256 * 1024))
+UPLOAD_SPOOL_DIR = os.environ.get("ALCHEM_UPLOAD_SPOOL_DIR") or os.path.join(
+    folder_paths.get_input_directory(), ".alchem_cache", "uploads")
+
+# 分块上传：默认块大小（客户端可在允许范围内另行指定）
+UPLOAD_SESSION_CHUNK_SIZE = int(os.environ.get("ALCHEM_UPLOAD_SESSION_CHUNK_SIZE", 4 * 1024 * 1024))
+MIN_SESSION_CHUNK_SIZE = 64 * 1024
+MAX_SESSION_CHUNK_SIZE = 64 * 1024 * 1024
+# 分块上传会话的空闲超时秒数，以及同时存在的会话上限
+UPLOAD_SESSION_TTL = float(os.environ.get("ALCHEM_UPLOAD_SESSION_TTL", 3600))
+UPLOAD_MAX_SESSIONS = int(os.environ.get("ALCHEM_UPLOAD_MAX_SESSIONS", 32))
+
+# 批量上传：一次请求中的文件（含压缩包成员）数上限，以及压缩包解出内容的总字节上限
+UPLOAD_BATCH_MAX_FILES = int(os.environ.get("ALCHEM_UPLOAD_BATCH_MAX_FILES", 1000))
+UPLOAD_ARCHIVE_MAX_BYTES = int(os.environ.get("ALCHEM_UPLOAD_ARCHIVE_MAX_BYTES", 4 * 1024 * 1024 * 1024))
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# 格式嗅探最多检查的前缀字节数
+SNIFF_BYTES = 8192
+
+
+class UploadError(Exception):
+    """上传被拒绝（status为建议的HTTP状态码）"""
+
+    status = 400
+
+
+class UploadTooLarge(UploadError):
+    """超过 ALCHEM_UPLOAD_MAX_BYTES"""
+
+    status = 413
+
+
+class UnsupportedContent(UploadError):
+    """内容不是文本分子文件（例如压缩包或其它二进制文件）"""
+
+    status = 415
+
+
+class UploadNotFound(UploadError):
+    """分块上传会话不存在（已完成、已过期或服务器已重启）"""
+
+    status = 404
+
+
+class ChecksumMismatch(UploadError):
+    """分块校验失败（客户端应重传该块）"""
+
+    status = 422
+
+
+class ChunkInProgress(UploadError):
+    """同一分块正在被另一个请求上传（客户端稍后重试）"""
+
+    status = 409
+
+
+class TooManySessions(UploadError):
+    """同时存在的分块上传会话超过 ALCHEM_UPLOAD_MAX_SESSIONS"""
+
+    status = 429
+
+
+def verify_checksum(data: bytes, checksum: Optional[str]) -> bool:
+    """
+    校验分块数据
+
+    Args:
+        data: 分块内容
+        checksum: "sha256=<hex>" 或 "crc32=<hex>"（浏览器不在安全上下文时没有WebCrypto，使用crc32）
+
+    Returns:
+        是否通过；未提供校验和时返回True
+
+    Raises:
+        UploadError: 校验和格式不支持
+    """
+    verifier = ChecksumVerifier(checksum)
+    verifier.update(data)
+    return verifier.matches()
+
+
+class ChecksumVerifier:
+    """
+    增量校验（分块按网络块流式写入时边写边算）
+
+    checksum格式与 verify_checksum 相同，未提供时总是通过。
+    """
+
+    def __init__(self, checksum: Optional[str]):
+        """
+        Raises:
+            UploadError: 校验和格式不支持
+        """
+        self.algorithm = None
+        self.expected = None
+        self._hasher = None
+        self._crc = 0
+        if not checksum:
+            return
+        algorithm, _, expected = checksum.partition("=")
+        self.algorithm, self.expected = algorithm.strip().lower(), expected.strip().lower()
+        if self.algorithm == "sha256":
+            self._hasher = hashlib.sha256()
+        elif self.algorithm == "crc32":
+            self.expected = self.expected.rjust(8, "0")
+        else:
+            raise UploadError(f"不支持的校验算法: {self.algorithm}")
+
+    def update(self, data: bytes):
+        if self._hasher is not None:
+            self._hasher.update(data)
+        elif self.algorithm == "crc32":
+            self._crc = zlib.crc32(data, self._crc)
+
+    def matches(self) -> bool:
+        if self.algorithm is None:
+            return True
+        if self._hasher is not None:
+            return self._hasher.hexdigest() == self.expected
+        return f"{self._crc & 0xffffffff:08x}" == self.expected
+
+
+def sniff_molecular_format(head: bytes, final: bool = False) -> Optional[str]:
+    """
+    根据文件开头的字节猜测格式
+
+    Args:
+        head: 已收到的前缀（最多 SNIFF_BYTES）
+        final: 是否已收到整个前缀（为False时无法确定的情况返回None，等待更多数据）
+
+    Returns:
+        "pdb" / "cif" / "mol2" / "sdf" / "mol" / "xyz" / "binary" / "unknown"；
+        还不能确定时返回None
+    """
+    if b"\x00" in head:
+        return "binary"
+
+    # 最后一行可能不完整，未收完前缀时不参与判断
+    complete = final or len(head) >= SNIFF_BYTES
+    lines = head.split(b"\n")
+    if not final:
+        lines = lines[:-1]
+    if not lines:
+        return "unknown" if complete else None
+
+    has_mol_end = False
+    for line in lines:
+        if line.startswith(b"@<TRIPOS>"):
+            return "mol2"
+        if line.startswith(b"data_"):
+            return "cif"
+        if line.startswith((b"ATOM  ", b"HETATM", b"HEADER", b"CRYST1", b"MODEL ", b"COMPND")):
+            return "pdb"
+        if line.startswith(b"$$$$"):
+            return "sdf"
+        if line.startswith(b"M  END"):
+            has_mol_end = True
+
+    if has_mol_end:
+        # 之后没有 $$$$ 的是单个MOL
+        return "mol" if complete else None
+    if len(lines) >= 3 and lines[0].strip().isdigit():
+        return "xyz"
+    if complete:
+        return "unknown"
+    return None
+
+
+class UploadSpool:
+    """
+    📥 单个上传文件的暂存
+
+    用法：
+        with UploadSpool() as spool:
+            await spool.receive(field)
+            content = spool.read()
+
+    不是线程安全的（一个请求一个实例）。
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = None, sniff: bool = True):
+        """
+        Args:
+            directory: 暂存目录（默认 UPLOAD_SPOOL_DIR）
+            max_bytes: 字节上限（默认 UPLOAD_MAX_BYTES，0表示不限制）
+            sniff: 是否嗅探格式并拒绝二进制内容（暂存压缩包时关闭）
+        """
+        self.directory = directory or UPLOAD_SPOOL_DIR
+        self.max_bytes = UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+        self.path: Optional[str] = None
+        self.size = 0
+        self.detected_format: Optional[str] = None if sniff else "archive"
+        self._file = None
+        self._hasher = hashlib.blake2b(digest_size=16)
+        self._head = bytearray()
+
+    @property
+    def content_hash(self) -> str:
+        """已接收内容的哈希（与 compute_content_hash 一致）"""
+        return self._hasher.hexdigest()
+
+    async def receive(self, field, chunk_size: int = None) -> int:
+        """
+        按块读取一个multipart字段直到结束
+
+        Args:
+            field: aiohttp的BodyPartReader
+            chunk_size: 每次读取的块大小（默认 UPLOAD_CHUNK_SIZE）
+
+        Returns:
+            接收的字节数
+
+        Raises:
+            UploadError: 超过上限或内容不是分子文件
+        """
+        chunk_size = chunk_size or UPLOAD_CHUNK_SIZE
+        while True:
+            chunk = await field.read_chunk(chunk_size)
+            if not chunk:
+                break
+            await CACHE_EXECUTOR.run(self.write, chunk)
+        await CACHE_EXECUTOR.run(self.finish)
+        return self.size
+
+    def write(self, chunk: bytes):
+        """
+        追加一块数据（哈希、大小检查和格式嗅探都在这里增量完成）
+
+        Raises:
+            UploadError: 超过上限或内容不是分子文件
+        """
+        if self.max_bytes and self.size + len(chunk) > self.max_bytes:
+            raise UploadTooLarge(f"文件超过上传上限 {self.max_bytes} 字节")
+
+        if self.detected_format is None:
+            self._head += chunk[:SNIFF_BYTES - len(self._head)]
+            self._sniff(final=False)
+
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = tempfile.NamedTemporaryFile(dir=self.directory, prefix="upload_",
+                                                     suffix=".part", delete=False)
+            self.path = self._file.name
+
+        self._file.write(chunk)
+        self._hasher.update(chunk)
+        self.size += len(chunk)
+
+    def finish(self):
+        """所有数据已接收：完成格式嗅探并刷新暂存文件"""
+        if self.detected_format is None:
+            self._sniff(final=True)
+        if self._file is not None:
+            self._file.flush()
+
+    def read(self) -> bytes:
+        """读出完整内容（一次分配，大小与文件相同）"""
+        if self._file is None:
+            return b""
+        self._file.flush()
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def close(self):
+        """关闭并删除暂存文件"""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+    def __enter__(self) -> "UploadSpool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _sniff(self, final: bool):
+        """根据已收到的前缀嗅探格式，二进制内容立即拒绝"""
+        detected = sniff_molecular_format(bytes(self._head), final=final)
+        if detected is None:
+            return
+        self.detected_format = detected
+        self._head = bytearray()
+        if detected == "binary":
+            raise UnsupportedContent("文件不是文本格式的分子文件")
+        logger.debug(f"上传内容格式嗅探: {detected}")
+
+
+def is_archive_name(filename: Optional[str]) -> bool:
+    """按文件名判断是否是支持的压缩包"""
+    return bool(filename) and filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def iter_archive_members(path: str, max_members: int = None,
+                         name: str = None) -> Iterator[Tuple[str, Optional[bytes], Optional[str]]]:
+    """
+    逐个读出压缩包中的文件（跳过目录、隐藏文件和 __MACOSX）
+
+    不会抛出异常：压缩包损坏、成员超限等问题都以错误项的形式产出，已读出的成员不受影响。
+
+    Args:
+        path: 暂存的压缩包路径（zip或tar，tar可以是gz/bz2/xz压缩）
+        max_members: 最多读出的成员数（默认 UPLOAD_BATCH_MAX_FILES）
+        name: 压缩包的原始文件名（用于错误项，默认取path的文件名）
+
+    Yields:
+        (成员文件名, 内容, None) 或 (成员文件名, None, 错误信息)
+    """
+    max_members = UPLOAD_BATCH_MAX_FILES if max_members is None else max_members
+    total_bytes = 0
+    count = 0
+
+    def accepted(name: str) -> bool:
+        base = os.path.basename(name.rstrip("/"))
+        return bool(base) and not base.startswith(".") and not name.startswith("__MACOSX/")
+
+    def check_limits(name: str, size: int) -> Optional[str]:
+        if max_members and count >= max_members:
+            return f"超过批量上传文件数上限 {max_members}"
+        if UPLOAD_MAX_BYTES and size > UPLOAD_MAX_BYTES:
+            return f"文件超过上传上限 {UPLOAD_MAX_BYTES} 字节"
+        if UPLOAD_ARCHIVE_MAX_BYTES and total_bytes + size > UPLOAD_ARCHIVE_MAX_BYTES:
+            return f"压缩包解出的内容超过上限 {UPLOAD_ARCHIVE_MAX_BYTES} 字节"
+        return None
+
+    def checked(name: str, content: bytes) -> Tuple[str, Optional[bytes], Optional[str]]:
+        if sniff_molecular_format(content[:SNIFF_BYTES], final=True) == "binary":
+            return os.path.basename(name), None, "文件不是文本格式的分子文件"
+        return os.path.basename(name), content, None
+
+    try:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    if info.is_dir() or not accepted(info.filename):
+                        continue
+                    error = check_limits(info.filename, info.file_size)
+                    if error is None:
+                        # 按声明的大小限量读取，声明不实的成员不会解出更多数据
+                        with archive.open(info) as member:
+                            content = member.read(info.file_size + 1)
+                        if len(content) > info.file_size:
+                            error = "压缩包成员大小与声明不符"
+                    count += 1
+                    if error is not None:
+                        yield os.path.basename(info.filename), None, error
+                        continue
+                    total_bytes += len(content)
+                    yield checked(info.filename, content)
+        else:
+            with tarfile.open(path, "r:*") as archive:
+                for info in archive:
+                    if not info.isfile() or not accepted(info.name):
+                        continue
+                    error = check_limits(info.name, info.size)
+                    count += 1
+                    if error is not None:
+                        yield os.path.basename(info.name), None, error
+                        continue
+                    content = archive.extractfile(info).read()
+                    total_bytes += len(content)
+                    yield checked(info.name, content)
+    except (zipfile.BadZipFile, tarfile.TarError, OSError, EOFError) as e:
+        logger.warning(f"读取压缩包失败: {path} - {e}")
+        yield name or os.path.basename(path), None, f"无法读取压缩包: {e}"
+
+
+class ChunkedUpload:
+    """
+    🧩 一个可续传的分块上传会话
+
+    会话状态只在服务器事件循环中修改；块数据在缓存工作线程中写入，
+    文件的seek+write由 _file_lock 互斥（同一会话的多个块可以并行上传）。
+    """
+
+    def __init__(self, upload_id: str, node_id: str, filename: str, total_size: int, chunk_size: int,
+                 folder: str = "molecules", custom_filename: str = None, directory: str = None):
+        self.upload_id = upload_id
+        self.node_id = node_id
+        self.filename = filename
+        self.folder = folder
+        self.custom_filename = custom_filename
+        self.total_size = total_size
+        self.chunk_size = chunk_size
+        self.total_chunks = max(1, -(-total_size // chunk_size))
+        self.received = set()
+        self.received_bytes = 0
+        # 正在写入的块下标（同一块的并发上传会交错写入同一段文件）
+        self.writing = set()
+        self.detected_format: Optional[str] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+
+        directory = directory or UPLOAD_SPOOL_DIR
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"session_{upload_id}.part")
+        # 并行上传的块在不同工作线程中写入同一个文件，seek+write 需要互斥
+        self._file_lock = threading.Lock()
+        self._file = open(self.path, "w+b")
+        # 预分配到总大小，块可以按任意顺序写入
+        self._file.truncate(total_size)
+
+    def chunk_range(self, index: int) -> Tuple[int, int]:
+        """第index块的 [start, end) 字节范围"""
+        start = index * self.chunk_size
+        return start, min(start + self.chunk_size, self.total_size)
+
+    async def receive_chunk(self, index: int, content, checksum: str = None) -> bool:
+        """
+        从请求体流式写入一个块（重复上传同一块时覆盖）
+
+        网络块直接写到预分配文件中的对应偏移，边写边校验，内存中不保留整块；
+        写入和校验在缓存工作线程中执行。重传的块在写完并校验通过之前不算已收到，
+        校验失败时需要再次上传。
+
+        Args:
+            index: 块下标
+            content: aiohttp的StreamReader（request.content）
+            checksum: "sha256=<hex>" 或 "crc32=<hex>"
+
+        Returns:
+            该块是否是第一次收到
+
+        Raises:
+            UploadError: 下标或大小不符、校验失败、内容不是分子文件
+        """
+        if not 0 <= index < self.total_chunks:
+            raise UploadError(f"分块下标超出范围: {index}（共 {self.total_chunks} 块）")
+        if index in self.writing:
+            raise ChunkInProgress(f"分块 {index} 正在上传")
+        start, end = self.chunk_range(index)
+        verifier = ChecksumVerifier(checksum)
+
+        first = index not in self.received
+        if not first:
+            self.received.discard(index)
+            self.received_bytes -= end - start
+
+        self.writing.add(index)
+        try:
+            offset = start
+            head = bytearray()
+            async for block in content.iter_chunked(UPLOAD_CHUNK_SIZE):
+                if offset + len(block) > end:
+                    raise UploadError(f"分块 {index} 大小不符: 期望 {end - start} 字节")
+                if index == 0 and len(head) < SNIFF_BYTES:
+                    head += block[:SNIFF_BYTES - len(head)]
+                await CACHE_EXECUTOR.run(self._write_block, offset, block, verifier)
+                offset += len(block)
+        finally:
+            self.writing.discard(index)
+        if offset != end:
+            raise UploadError(f"分块 {index} 大小不符: 期望 {end - start} 字节，收到 {offset - start} 字节")
+        if not verifier.matches():
+            raise ChecksumMismatch(f"分块 {index} 校验失败，请重传")
+
+        if index == 0 and self.detected_format is None:
+            # 第一块到达时就嗅探格式，二进制内容不必等全部上传完
+            self.detected_format = sniff_molecular_format(bytes(head), final=True)
+            if self.detected_format == "binary":
+                raise UnsupportedContent("文件不是文本格式的分子文件")
+
+        self.updated_at = time.time()
+        self.received.add(index)
+        self.received_bytes += end - start
+        return first
+
+    def _write_block(self, offset: int, block: bytes, verifier: ChecksumVerifier):
+        """校验并写入一个网络块（在工作线程中执行）"""
+        verifier.update(block)
+        with self._file_lock:
+            if self._file is None:
+                raise UploadNotFound(f"上传会话已关闭: {self.upload_id}")
+            self._file.seek(offset)
+            self._file.write(block)
+
+    def missing(self) -> List[int]:
+        """尚未收到的块下标"""
+        return [i for i in range(self.total_chunks) if i not in self.received]
+
+    @property
+    def next_offset(self) -> int:
+        """顺序续传的起点：第一个缺失块的字节偏移（全部收到时为总大小）"""
+        for i in range(self.total_chunks):
+            if i not in self.received:
+                return self.chunk_range(i)[0]
+        return self.total_size
+
+    @property
+    def complete(self) -> bool:
+        return len(self.received) == self.total_chunks and not self.writing
+
+    def read(self) -> bytes:
+        """
+        读出完整内容（只能在全部块到齐后调用）
+
+        Raises:
+            UploadNotFound: 会话已关闭（过期或已完成）
+        """
+        with self._file_lock:
+            if self._file is None:
+                raise UploadNotFound(f"上传会话已关闭: {self.upload_id}")
+            self._file.flush()
+            self._file.seek(0)
+            return self._file.read(self.total_size)
+
+    def describe(self) -> Dict[str, Any]:
+        """会话状态（返回给客户端，用于续传）"""
+        return {
+            "upload_id": self.upload_id,
+            "node_id": self.node_id,
+            "filename": self.filename,
+            "total_size": self.total_size,
+            "chunk_size": self.chunk_size,
+            "total_chunks": self.total_chunks,
+            "received_chunks": len(self.received),
+            "received_bytes": self.received_bytes,
+            "missing": self.missing(),
+            "next_offset": self.next_offset,
+            "complete": self.complete,
+            "detected_format": self.detected_format
+        }
+
+    def close(self):
+        """关闭并删除暂存文件"""
+        if self._file is not None:
+            with self._file_lock:
+                try:
+                    self._file.close()
+                except Exception:
+                    pass
+                self._file = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class ChunkedUploadRegistry:
+    """
+    🧩 分块上传会话表
+
+    会话只保存在当前进程内存中（服务器重启后客户端会收到404并重新开始）。
+    只在服务器事件循环中访问。
+    """
+
+    def __init__(self, directory: str = None, ttl: float = None, max_sessions: int = None):
+        self.directory = directory or UPLOAD_SPOOL_DIR
+        self.ttl = UPLOAD_SESSION_TTL if ttl is None else ttl
+        self.max_sessions = UPLOAD_MAX_SESSIONS if max_sessions is None else max_sessions
+        self._sessions: "OrderedDict[str, ChunkedUpload]" = OrderedDict()
+        self._stats = {"created": 0, "resumed": 0, "completed": 0, "expired": 0, "aborted": 0, "chunks": 0}
+
+    def open(self, node_id: str, filename: str, total_size: int, chunk_size: int = None,
+             folder: str = "molecules", custom_filename: str = None, upload_id: str = None) -> ChunkedUpload:
+        """
+        创建会话；提供upload_id且会话仍然存在（同一节点、文件和大小）时续传
+
+        Raises:
+            UploadError: 参数无效、超过大小上限或会话数上限
+        """
+        self.expire_idle()
+
+        # bool是int的子类，json中的true/false不能当作大小
+        if isinstance(total_size, bool) or not isinstance(total_size, int) or total_size <= 0:
+            raise UploadError(f"无效的文件大小: {total_size}")
+        if chunk_size is not None and (isinstance(chunk_size, bool) or not isinstance(chunk_size, int)
+                                       or chunk_size <= 0):
+            raise UploadError(f"无效的分块大小: {chunk_size}")
+
+        existing = self._sessions.get(upload_id) if upload_id else None
+        if existing is not None and (existing.node_id, existing.filename, existing.total_size) == \
+                (node_id, filename, total_size):
+            existing.folder = folder
+            existing.custom_filename = custom_filename
+            existing.updated_at = time.time()
+            self._sessions.move_to_end(existing.upload_id)
+            self._stats["resumed"] += 1
+            return existing
+
+        if not node_id or not filename:
+            raise UploadError("缺少必需字段: node_id, filename")
+        if UPLOAD_MAX_BYTES and total_size > UPLOAD_MAX_BYTES:
+            raise UploadTooLarge(f"文件超过上传上限 {UPLOAD_MAX_BYTES} 字节")
+        if self.max_sessions and len(self._sessions) >= self.max_sessions:
+            raise TooManySessions(f"同时进行的分块上传过多（上限 {self.max_sessions}）")
+
+        chunk_size = min(max(chunk_size or UPLOAD_SESSION_CHUNK_SIZE, MIN_SESSION_CHUNK_SIZE),
+                         MAX_SESSION_CHUNK_SIZE)
+        session = ChunkedUpload(uuid.uuid4().hex, node_id, filename, total_size, chunk_size,
+                                folder=folder, custom_filename=custom_filename, directory=self.directory)
+        self._sessions[session.upload_id] = session
+        self._stats["created"] += 1
+        logger.info(f"分块上传开始: {filename} ({total_size} 字节, {session.total_chunks} 块) -> 节点 {node_id}")
+        return session
+
+    def get(self, upload_id: str) -> ChunkedUpload:
+        """
+        Raises:
+            UploadNotFound: 会话不存在
+        """
+        session = self._sessions.get(upload_id)
+        if session is None:
+            raise UploadNotFound(f"上传会话不存在或已过期: {upload_id}")
+        return session
+
+    async def receive_chunk(self, upload_id: str, index: int, content, checksum: str = None) -> ChunkedUpload:
+        """从请求体流式写入一个块（内容不是分子文件时整个会话作废）"""
+        session = self.get(upload_id)
+        try:
+            await session.receive_chunk(index, content, checksum)
+        except UnsupportedContent:
+            self.remove(upload_id)
+            raise
+        if upload_id not in self._sessions:
+            # 写入期间会话被放弃或过期
+            raise UploadNotFound(f"上传会话不存在或已过期: {upload_id}")
+        self._sessions.move_to_end(upload_id)
+        self._stats["chunks"] += 1
+        return session
+
+    def ready(self, upload_id: str) -> ChunkedUpload:
+        """
+        获取所有块都已到齐的会话（会话仍保留在会话表中，存储成功后再调用 finish()）
+
+        Raises:
+            UploadError: 仍有缺失或正在上传的块
+        """
+        session = self.get(upload_id)
+        if not session.complete:
+            raise UploadError(f"仍有 {len(session.missing()) + len(session.writing)} 个分块未上传完成")
+        session.updated_at = time.time()
+        return session
+
+    def finish(self, session: ChunkedUpload) -> bool:
+        """
+        内容存入缓存后结束会话并删除暂存文件
+
+        校验失败或存储失败时不要调用，会话保留，客户端可以重传有问题的块后再次完成。
+        """
+        if self._sessions.get(session.upload_id) is not session:
+            # 同一会话被并发完成，或者已被放弃/过期
+            return False
+        del self._sessions[session.upload_id]
+        session.close()
+        self._stats["completed"] += 1
+        return True
+
+    def remove(self, upload_id: str) -> bool:
+        """放弃会话并删除暂存文件"""
+        session = self._sessions.pop(upload_id, None)
+        if session is None:
+            return False
+        session.close()
+        self._stats["aborted"] += 1
+        return True
+
+    def expire_idle(self) -> int:
+        """清除空闲超时的会话"""
+        if not self.ttl:
+            return 0
+        deadline = time.time() - self.ttl
+        expired = [upload_id for upload_id, session in self._sessions.items() if session.updated_at < deadline]
+        for upload_id in expired:
+            self._sessions.pop(upload_id).close()
+        self._stats["expired"] += len(expired)
+        if expired:
+            logger.info(f"清除 {len(expired)} 个超时的分块上传会话")
+        return len(expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """会话统计"""
+        return dict(self._stats, active=len(self._sessions),
+                    pending_bytes=sum(s.total_size - s.received_bytes for s in self._sessions.values()))
@@ -11,14 +11,25 @@
 
 import asyncio
 import json
+import os
 import time
-from typing import Dict, Set, Any, Optional
+import threading
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import Dict, Set, Any, Optional, Callable, Tuple, List, Union
 from aiohttp import web, WSMsgType
 import server
 
 # 使用统一的ALCHEM日志系统
 from .logging_config import get_websocket_logger
 
+# 二进制传输封装（订阅时 binary=true 的客户端以二进制帧接收带内容的推送）
+from .binary_envelope import encode_envelope
+from .blob_store import decode_content
+
+# 带完整内容的推送在缓存工作线程中序列化
+from .cache_executor import CACHE_EXECUTOR
+
 # 初始化统一Logger
 logger = get_websocket_logger()
 
@@ -52,12 +63,19 @@ class WebSocketManager:
     
     async def send_to_client(self, ws: web.WebSocketResponse, message: Dict[str, Any]):
         """发送消息给特定客户端"""
+        return await self.send_encoded(ws, json.dumps(message))
+    
+    async def send_encoded(self, ws: web.WebSocketResponse, payload: Union[str, bytes]):
+        """发送已编码的消息（str为文本帧，bytes为二进制帧），同一消息发给多个客户端时只编码一次"""
         try:
             if ws.closed:
                 await self.remove_connection(ws)
                 return False
                 
-            await ws.send_str(json.dumps(message))
+            if isinstance(payload, str):
+                await ws.send_str(payload)
+            else:
+                await ws.send_bytes(payload)
             return True
         except Exception as e:
             logger.warning(f"⚠️ 发送消息失败: {e}")
@@ -104,11 +122,181 @@ class WebSocketManager:
 # 全局WebSocket管理器实例
 ws_manager = WebSocketManager()
 
+
+def _estimate_payload_bytes(value: Any) -> int:
+    """估算通知数据占用的字节数（主要是其中的分子内容）"""
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, memoryview):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_estimate_payload_bytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_payload_bytes(v) for v in value)
+    return 8
+
+
+class NotificationDispatcher:
+    """
+    📡 跨线程的WebSocket通知分发器
+
+    缓存在任意线程中被修改，但WebSocketResponse属于PromptServer的事件循环。
+    submit() 只把通知放入有界队列，并在需要时用 call_soon_threadsafe 唤醒
+    事件循环上的单个消费协程，由它依次发送。
+
+    - 同一节点同一类型的待发送通知会合并，只发送最新的数据，并按最新一次提交的顺序排队
+    - 队列同时按条数（max_pending）和字节数（max_bytes，通知中带有完整的分子内容）限制，
+      超出时丢弃最旧的通知并计数；单个超过字节上限的通知仍会发送（队列中只保留它）
+    - 没有WebSocket连接时直接跳过
+    """
+
+    def __init__(self, max_pending: int = 1024, max_bytes: int = 0):
+        """
+        Args:
+            max_pending: 待发送通知条数上限
+            max_bytes: 待发送通知的估算字节数上限，0表示不限制
+        """
+        self.max_pending = max(1, max_pending)
+        self.max_bytes = max(0, max_bytes)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        # (通知函数名, node_id) -> (通知函数, node_id, payload, 估算字节数)
+        self._queue: "OrderedDict[Tuple[str, str], Tuple[Callable, str, Dict[str, Any], int]]" = OrderedDict()
+        self._queued_bytes = 0
+        self._drain_scheduled = False
+        self._stats = {
+            "submitted": 0,
+            "sent": 0,
+            "failed": 0,
+            "coalesced": 0,
+            "dropped_overflow": 0,
+            "dropped_bytes": 0,
+            "dropped_no_loop": 0,
+            "skipped_no_clients": 0
+        }
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """绑定服务器事件循环（第一个WebSocket连接时自动调用）"""
+        if self._loop is not loop:
+            self._loop = loop
+            logger.debug("📡 通知分发器已绑定服务器事件循环")
+
+    def submit(self, notify_func: Callable, node_id: str, payload: Dict[str, Any]) -> bool:
+        """
+        提交一个通知（线程安全，不阻塞）
+
+        Args:
+            notify_func: 通知协程函数，签名为 notify_func(node_id, payload)
+            node_id: 节点ID
+            payload: 通知数据
+
+        Returns:
+            是否进入了发送队列
+        """
+        with self._lock:
+            self._stats["submitted"] += 1
+            if not ws_manager.connections:
+                self._stats["skipped_no_clients"] += 1
+                return False
+
+            loop = self._resolve_loop()
+            if loop is None:
+                self._stats["dropped_no_loop"] += 1
+                return False
+
+            key = (getattr(notify_func, "__name__", repr(notify_func)), node_id)
+            size = _estimate_payload_bytes(payload)
+            old = self._queue.pop(key, None)
+            if old is not None:
+                # 合并后放到队尾：最新的通知按提交顺序发送，不会越过之后提交的其他通知
+                self._stats["coalesced"] += 1
+                self._queued_bytes -= old[3]
+            while self._queue and (len(self._queue) >= self.max_pending or
+                                   (self.max_bytes and self._queued_bytes + size > self.max_bytes)):
+                _, dropped = self._queue.popitem(last=False)
+                self._queued_bytes -= dropped[3]
+                self._stats["dropped_overflow"] += 1
+                self._stats["dropped_bytes"] += dropped[3]
+            self._queue[key] = (notify_func, node_id, payload, size)
+            self._queued_bytes += size
+
+            schedule = not self._drain_scheduled
+            self._drain_scheduled = True
+
+        if schedule:
+            try:
+                loop.call_soon_threadsafe(self._start_drain)
+            except RuntimeError as e:
+                # 事件循环已关闭
+                logger.warning(f"⚠️ 通知调度失败: {e}")
+                with self._lock:
+                    self._drain_scheduled = False
+                    self._stats["dropped_no_loop"] += len(self._queue)
+                    self._queue.clear()
+                    self._queued_bytes = 0
+                    self._loop = None
+                return False
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取分发统计信息"""
+        with self._lock:
+            return dict(self._stats, pending=len(self._queue), max_pending=self.max_pending,
+                        pending_bytes=self._queued_bytes, max_bytes=self.max_bytes,
+                        loop_bound=self._loop is not None)
+
+    # ====================================================================================================
+    # 内部函数
+    # ====================================================================================================
+
+    def _resolve_loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """获取服务器事件循环（调用方必须已持有self._lock）"""
+        if self._loop is not None and not self._loop.is_closed():
+            return self._loop
+        loop = getattr(getattr(server.PromptServer, "instance", None), "loop", None)
+        if loop is not None and not loop.is_closed():
+            self._loop = loop
+            return loop
+        return None
+
+    def _start_drain(self):
+        """在事件循环中启动消费协程"""
+        asyncio.ensure_future(self._drain(), loop=self._loop)
+
+    async def _drain(self):
+        """依次发送队列中的通知，队列为空时退出"""
+        while True:
+            with self._lock:
+                if not self._queue:
+                    self._drain_scheduled = False
+                    return
+                _, (notify_func, node_id, payload, size) = self._queue.popitem(last=False)
+                self._queued_bytes -= size
+
+            try:
+                await notify_func(node_id, payload)
+                with self._lock:
+                    self._stats["sent"] += 1
+            except Exception as e:
+                with self._lock:
+                    self._stats["failed"] += 1
+                logger.warning(f"⚠️ 节点 {node_id} 的通知发送失败: {e}")
+
+
+# 全局通知分发器实例（待发送通知的条数和字节数上限可通过环境变量调整）
+notification_dispatcher = NotificationDispatcher(
+    int(os.environ.get("ALCHEM_NOTIFY_MAX_PENDING", 1024)),
+    int(os.environ.get("ALCHEM_NOTIFY_MAX_BYTES", 256 * 1024 * 1024))
+)
+
 async def handle_websocket(request: web.Request) -> web.WebSocketResponse:
     """处理WebSocket连接"""
     ws = web.WebSocketResponse(heartbeat=30)  # 30秒心跳
     await ws.prepare(request)
     
+    # 通知分发器需要知道WebSocket所在的事件循环
+    notification_dispatcher.bind_loop(asyncio.get_running_loop())
+    
     # 获取客户端信息
     client_ip = request.remote
     client_info = {
@@ -164,6 +352,9 @@ async def handle_websocket_message(ws: web.WebSocketResponse, data: Dict[str, An
                 ws_manager.client_info[ws]['subscribed_nodes'] = \
                     ws_manager.client_info[ws].get('subscribed_nodes', set())
                 ws_manager.client_info[ws]['subscribed_nodes'].add(node_id)
+                if data.get('binary'):
+                    # 📦 该客户端希望以二进制封装接收带内容的推送
+                    ws_manager.client_info[ws]['binary'] = True
                 
                 await ws_manager.send_to_client(ws, {
                     'type': 'subscribed',
@@ -186,6 +377,65 @@ async def handle_websocket_message(ws: web.WebSocketResponse, data: Dict[str, An
                 })
                 logger.info(f"🔕 客户端取消订阅节点 {node_id}")
                 
+        elif message_type == 'purge_tab':
+            # 清除整个tab的缓存（例如前端关闭工作流tab时）
+            tab_id = data.get('tab_id')
+            if not tab_id:
+                await ws_manager.send_to_client(ws, {
+                    'type': 'error',
+                    'message': 'purge_tab 缺少 tab_id'
+                })
+                return
+            
+            from .memory import AsyncMolecularDataManager
+            result = await AsyncMolecularDataManager.purge_tab(tab_id)
+            await ws_manager.send_to_client(ws, {
+                'type': 'tab_purged',
+                'data': result
+            })
+            logger.info(f"🗂️ 客户端请求清除tab {tab_id}: {result['purged']} 个节点")
+            
+        elif message_type == 'get_molecular_data_batch':
+            # 批量获取分子数据：每取回一个节点就推送一条消息，最后推送完成消息
+            from .api import _valid_node_ids, _format_batch_item, _parse_fields, _content_mode
+            from .memory import get_molecular_data_batch, AsyncMolecularDataManager
+            request_id = data.get('request_id')
+            node_ids = data.get('node_ids')
+            if not _valid_node_ids(node_ids):
+                await ws_manager.send_to_client(ws, {
+                    'type': 'error',
+                    'request_id': request_id,
+                    'message': 'get_molecular_data_batch 需要非空的 node_ids 列表'
+                })
+                return
+            
+            fields = _parse_fields(data.get('fields'), data.get('include_content', True))
+            binary = bool(data.get('binary', ws_manager.client_info[ws].get('binary')))
+            content_mode = _content_mode(fields)
+            found = 0
+            results = get_molecular_data_batch(node_ids, "bytes" if binary and content_mode == "text" else content_mode)
+            # 每个节点的读取和编码在缓存工作线程中完成，事件循环只负责发送
+            items = (dict(_format_batch_item(node_id, molecular_data, fields),
+                          type='molecular_data_batch_item', request_id=request_id)
+                     for node_id, molecular_data in results)
+            encoded = ((item['success'], _encode_message(item, binary)) for item in items)
+            # 结束、断开或取消时由工作线程关闭 results（等正在执行的一步完成），释放尚未产出的条目的引用
+            stream = AsyncMolecularDataManager.iterate(encoded, close=results.close)
+            async with aclosing(stream):
+                async for success, payload in stream:
+                    found += success
+                    sent = await ws_manager.send_encoded(ws, payload)
+                    if not sent:
+                        # 客户端已断开，不再读取剩余节点
+                        return
+            await ws_manager.send_to_client(ws, {
+                'type': 'molecular_data_batch_complete',
+                'request_id': request_id,
+                'found': found,
+                'missing': len(set(node_ids)) - found
+            })
+            logger.info(f"📚 客户端批量获取 {len(node_ids)} 个节点: 找到 {found} 个")
+        
         elif message_type == 'get_status':
             # 获取服务器状态
             await ws_manager.send_to_client(ws, {
@@ -234,7 +484,7 @@ async def notify_molecular_data_change(node_id: str, change_type: str, data: Dic
     for ws, client_info in ws_manager.client_info.items():
         subscribed_nodes = client_info.get('subscribed_nodes', set())
         if node_id in subscribed_nodes:
-            subscribers.append(ws)
+            subscribers.append((ws, bool(client_info.get('binary'))))
     
     if subscribers:
         logger.info(f"[DEBUG] WebSocket通知详情:")
@@ -244,12 +494,62 @@ async def notify_molecular_data_change(node_id: str, change_type: str, data: Dic
         logger.info(f"  - 数据文件名: {data.get('filename', 'N/A')}")
         logger.info(f"  - 消息时间戳: {message['timestamp']}")
         
-        # 并发发送给所有订阅者
-        tasks = [ws_manager.send_to_client(ws, message) for ws in subscribers]
+        # 每种编码只序列化一次（在工作线程中，消息带有完整内容），再并发发送给所有订阅者
+        encoded = {}
+        for _, binary in subscribers:
+            if binary not in encoded:
+                encoded[binary] = await CACHE_EXECUTOR.run(_encode_message, message, binary)
+        tasks = [ws_manager.send_encoded(ws, encoded[binary]) for ws, binary in subscribers]
         await asyncio.gather(*tasks, return_exceptions=True)
     else:
         logger.debug(f"📡 节点 {node_id} 没有订阅者，跳过通知")
 
+def _encode_message(message: Dict[str, Any], binary: bool = False) -> Union[str, bytes]:
+    """
+    编码推送消息：binary为True且消息带有content时使用二进制封装
+    （消息的其余部分作为头，content作为原始字节），否则编码为JSON文本
+    """
+    data = message.get('data')
+    if binary and isinstance(data, dict) and data.get('content') is not None:
+        header = dict(message, data={key: value for key, value in data.items() if key != 'content'})
+        return encode_envelope(header, data['content'])
+    if isinstance(data, dict) and isinstance(data.get('content'), (bytes, bytearray, memoryview)):
+        # 文本客户端：字节内容在这里才解码
+        message = dict(message, data=dict(data, content=decode_content(data['content'])))
+    return json.dumps(message)
+
+async def notify_molecular_data_batch(batch_id: str, change_type: str, items: List[Dict[str, Any]]):
+    """
+    批量变更的合并通知：每个客户端只收到一条消息，其中只包含它订阅的节点
+    
+    Args:
+        batch_id: 批次ID
+        change_type: 变更类型（'update'）
+        items: 各节点的摘要（不含content）
+    """
+    if not ws_manager.connections:
+        return
+    
+    timestamp = time.time()
+    tasks = []
+    for ws, client_info in ws_manager.client_info.items():
+        subscribed_nodes = client_info.get('subscribed_nodes', set())
+        subscribed_items = [item for item in items if item.get('node_id') in subscribed_nodes]
+        if subscribed_items:
+            tasks.append(ws_manager.send_to_client(ws, {
+                'type': 'molecular_data_batch_changed',
+                'batch_id': batch_id,
+                'change_type': change_type,
+                'items': subscribed_items,
+                'timestamp': timestamp
+            }))
+    
+    if tasks:
+        logger.info(f"📡 批量变更通知: {batch_id}, {len(items)} 个节点, {len(tasks)} 个客户端")
+        await asyncio.gather(*tasks, return_exceptions=True)
+    else:
+        logger.debug(f"📡 批次 {batch_id} 的节点没有订阅者，跳过通知")
+
 def register_websocket_routes():
     """注册WebSocket路由到ComfyUI服务器"""
     try:
@@ -266,6 +566,10 @@ def get_websocket_manager() -> WebSocketManager:
     """获取WebSocket管理器实例"""
     return ws_manager
 
+def get_notification_dispatcher() -> NotificationDispatcher:
+    """获取通知分发器实例"""
+    return notification_dispatcher
+
 # 便捷函数 - 修改为返回协程而不是task
 async def notify_molecular_update(node_id: str, molecular_data: Dict[str, Any]):
     """便捷函数：通知分子数据更新"""
@@ -275,6 +579,10 @@ async def notify_molecular_edit(node_id: str, edit_info: Dict[str, Any]):
     """便捷函数：通知分子数据编辑"""
     await notify_molecular_data_change(node_id, 'edit', edit_info)
 
-async def notify_molecular_delete(node_id: str):
-    """便捷函数：通知分子数据删除"""
-    await notify_molecular_data_change(node_id, 'delete', {})
\ No newline at end of file
+async def notify_molecular_batch_update(batch_id: str, batch: Dict[str, Any]):
+    """便捷函数：批量上传的合并通知"""
+    await notify_molecular_data_batch(batch_id, 'update', batch.get('items', []))
+
+async def notify_molecular_delete(node_id: str, data: Dict[str, Any] = None):
+    """便捷函数：通知分子数据删除（签名与其它通知函数一致，可经 notification_dispatcher 提交）"""
+    await notify_molecular_data_change(node_id, 'delete', data or {})
\ No newline at end of file
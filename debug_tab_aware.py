@@ -66,7 +66,7 @@ END"""
         print("\n🎯 步骤2: 查看缓存状态")
         print("-" * 40)
         
-        cache_status = get_cache_status()
+        cache_status = get_cache_status(include_nodes=True)
         print(f"📊 缓存统计:")
         print(f"   总节点数: {cache_status['total_nodes']}")
         print(f"   总缓存大小: {cache_status['total_cache_size']} 字符")
@@ -165,7 +165,7 @@ END"""
         print("\n🎯 步骤5: 最终缓存状态")
         print("-" * 40)
         
-        final_cache = get_cache_status()
+        final_cache = get_cache_status(include_nodes=True)
         print(f"📊 最终统计:")
         print(f"   总节点数: {final_cache['total_nodes']}")
         
@@ -198,27 +198,24 @@ class SimpleMolecularAnalyzer(MolstarDisplayMixin):
     
     def _perform_analysis(self, content: str, metadata: dict, analysis_type: str) -> str:
         """业务逻辑：分子分析"""
-        lines = content.split('\n')
-        atom_lines = [line for line in lines if line.startswith('ATOM')]
+        # ⚛️ 使用原子表，不再逐行切分内容
+        atom_table = self.get_atom_table(content)
+        atom_count = atom_table.count(hetatm=False)
         
         if analysis_type == "basic":
             return f"""🧪 基础分析结果:
 - 格式: {metadata.get('format_name', 'Unknown')}
-- 总行数: {len(lines)}
-- 原子数: {len(atom_lines)}
+- 总行数: {atom_table.total_lines}
+- 原子数: {atom_count}
 - 数据来源: {metadata.get('source')}"""
         
         else:  # detailed
-            elements = {}
-            for line in atom_lines:
-                if len(line) > 76:
-                    element = line[76:78].strip() or line[12:14].strip()[0]
-                    elements[element] = elements.get(element, 0) + 1
+            elements = atom_table.element_counts(hetatm=False)
             
             return f"""🧪 详细分析结果:
 - 格式: {metadata.get('format_name', 'Unknown')}
-- 总行数: {len(lines)}
-- 原子数: {len(atom_lines)}
+- 总行数: {atom_table.total_lines}
+- 原子数: {atom_count}
 - 元素分布: {elements}
 - 数据来源: {metadata.get('source')}"""
     
@@ -327,40 +324,14 @@ class SimpleTabAwareProcessor(MolstarDisplayMixin):
         return '\n'.join(processed_lines)
     
     def _center_molecule(self, content: str) -> str:
-        """分子居中（简化版）"""
-        lines = content.split('\n')
-        coords = []
-        
-        for line in lines:
-            if line.startswith('ATOM') and len(line) > 54:
-                try:
-                    x, y, z = float(line[30:38]), float(line[38:46]), float(line[46:54])
-                    coords.append((x, y, z))
-                except:
-                    continue
+        """分子居中（简化版）- 中心由原子表的坐标数组计算，只改写ATOM记录的坐标列"""
+        atom_table = self.get_atom_table(content)
+        center = atom_table.centroid(hetatm=False)
         
-        if not coords:
+        if center is None:
             return content
         
-        center_x = sum(x for x, y, z in coords) / len(coords)
-        center_y = sum(y for x, y, z in coords) / len(coords) 
-        center_z = sum(z for x, y, z in coords) / len(coords)
-        
-        processed_lines = []
-        for line in lines:
-            if line.startswith('ATOM') and len(line) > 54:
-                try:
-                    x = float(line[30:38]) - center_x
-                    y = float(line[38:46]) - center_y
-                    z = float(line[46:54]) - center_z
-                    new_line = line[:30] + f"{x:8.3f}{y:8.3f}{z:8.3f}" + line[54:]
-                    processed_lines.append(new_line)
-                except:
-                    processed_lines.append(line)
-            else:
-                processed_lines.append(line)
-        
-        return '\n'.join(processed_lines)
+        return atom_table.translate_pdb(content, (-center[0], -center[1], -center[2]), hetatm=False)
     
     def _simple_edit(self, content: str) -> str:
         """简单编辑：删除最后一个原子"""
@@ -329,8 +329,10 @@ class MolstarDisplayMixin:
             storage_success = bool(store_result and 'node_id' in store_result and not store_result.get('error'))
             
             # 生成处理报告
-            input_atoms = len([l for l in content.split('\n') if l.startswith(('ATOM', 'HETATM'))])
-            output_atoms = len([l for l in processed_content.split('\n') if l.startswith(('ATOM', 'HETATM'))])
+            # ⚛️ 原子数来自原子表（已缓存的内容直接复用解析结果）
+            input_atoms = self.get_atom_table(content).atom_count
+            output_table = self.get_atom_table(processed_content)
+            output_atoms = output_table.atom_count
             
             processing_report = f"""✅ 处理完成 (使用MolstarDisplayMixin)
 
@@ -354,7 +356,7 @@ class MolstarDisplayMixin:
                 'source': 'direct_input',
                 'atoms': output_atoms,
                 'format_name': 'PDB',  # 简化假设
-                'total_lines': len(processed_content.split('\n'))
+                'total_lines': output_table.total_lines
             }
             debug_info = self.generate_debug_info(node_id, metadata)
             
@@ -477,7 +479,7 @@ class MolstarDisplayMixin:
             
             # 全局CACHE状态
             debug_lines.append("📊 === 全局CACHE状态 ===")
-            with CACHE_LOCK:
+            with CACHE_LOCK.read():
                 if not MOLECULAR_DATA_CACHE:
                     debug_lines.append("CACHE为空")
                 else:
@@ -551,6 +553,32 @@ class MolstarDisplayMixin:
             })
             return content, error_metadata
     
+    def get_atom_table(self, content: str, file_format: str = "pdb"):
+        """
+        ⚛️ 获取分子内容的原子表（坐标、元素、残基、记录偏移）
+        
+        内容已在后端缓存中时复用已解析的表，否则临时解析一次
+        
+        Args:
+            content: 分子文件内容
+            file_format: 格式（默认pdb）
+            
+        Returns:
+            AtomTable实例
+        """
+        # 尝试相对导入，失败则使用绝对导入
+        try:
+            from ...backend.memory import MolecularDataManager
+        except ImportError:
+            import sys
+            import os
+            current_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            if current_dir not in sys.path:
+                sys.path.insert(0, current_dir)
+            from backend.memory import MolecularDataManager
+        
+        return MolecularDataManager.get_atom_table_for_content(content, file_format)
+    
     def store_processed_data(
         self, 
         content: str, 
@@ -676,7 +704,7 @@ class MolstarDisplayMixin:
             from ...backend.memory import MOLECULAR_DATA_CACHE, CACHE_LOCK
             
             # 🔧 新方案：从现有缓存数据推断当前tab，避免全局状态依赖
-            with CACHE_LOCK:
+            with CACHE_LOCK.read():
                 if not MOLECULAR_DATA_CACHE:
                     # 缓存为空时，使用与前端一致的默认tab_id
                     default_tab_id = "workflow_fl40l"  # 与前端simpleHash()一致
@@ -399,54 +399,33 @@ class StandardMolecularAnalysisNode:
     
     def _structural_analysis(self, content: str) -> dict:
         """结构分析"""
-        lines = content.split('\n')
+        from ..backend.memory import MolecularDataManager
+        
+        # ⚛️ 坐标和残基来自原子表（已缓存的内容不会重复解析）
+        atom_table = MolecularDataManager.get_atom_table_for_content(content, "pdb")
         
         structural = {
             "coordinates": {"x_range": None, "y_range": None, "z_range": None},
             "bonds": {"count": 0, "types": []},
-            "residues": {"count": 0, "types": set()}
+            "residues": {"count": 0, "types": []}
         }
         
-        # PDB格式的坐标分析
-        atom_lines = [line for line in lines if line.startswith('ATOM')]
-        if atom_lines:
-            x_coords = []
-            y_coords = []
-            z_coords = []
-            
-            for line in atom_lines:
-                try:
-                    x = float(line[30:38].strip())
-                    y = float(line[38:46].strip())
-                    z = float(line[46:54].strip())
-                    x_coords.append(x)
-                    y_coords.append(y)
-                    z_coords.append(z)
-                    
-                    # 残基类型
-                    residue = line[17:20].strip()
-                    structural["residues"]["types"].add(residue)
-                except:
-                    continue
-            
-            if x_coords:
-                structural["coordinates"] = {
-                    "x_range": [min(x_coords), max(x_coords)],
-                    "y_range": [min(y_coords), max(y_coords)],
-                    "z_range": [min(z_coords), max(z_coords)]
-                }
-                structural["residues"]["count"] = len(structural["residues"]["types"])
-                structural["residues"]["types"] = list(structural["residues"]["types"])
+        # PDB格式的坐标分析（只统计ATOM记录）
+        coordinate_ranges = atom_table.coordinate_ranges(hetatm=False)
+        if coordinate_ranges:
+            structural["coordinates"] = coordinate_ranges
+            residue_types = atom_table.residue_types(hetatm=False)
+            structural["residues"]["count"] = len(residue_types)
+            structural["residues"]["types"] = residue_types
         
         # 连接信息
-        connect_lines = [line for line in lines if line.startswith('CONECT')]
-        structural["bonds"]["count"] = len(connect_lines)
+        structural["bonds"]["count"] = content.count('\nCONECT') + (1 if content.startswith('CONECT') else 0)
         
         return structural
     
     def _chemical_analysis(self, content: str) -> dict:
         """化学分析"""
-        lines = content.split('\n')
+        from ..backend.memory import MolecularDataManager
         
         chemical = {
             "elements": {},
@@ -456,15 +435,8 @@ class StandardMolecularAnalysisNode:
         }
         
         # 元素统计（从PDB ATOM记录）
-        atom_lines = [line for line in lines if line.startswith('ATOM')]
-        element_counts = {}
-        
-        for line in atom_lines:
-            try:
-                element = line[76:78].strip() or line[12:14].strip()[0]
-                element_counts[element] = element_counts.get(element, 0) + 1
-            except:
-                continue
+        atom_table = MolecularDataManager.get_atom_table_for_content(content, "pdb")
+        element_counts = atom_table.element_counts(hetatm=False)
         
         chemical["elements"] = element_counts
         
@@ -571,7 +543,7 @@ class StandardMolecularAnalysisNode:
             
             # 全局CACHE状态
             debug_lines.append("📊 === 全局CACHE状态 ===")
-            with CACHE_LOCK:
+            with CACHE_LOCK.read():
                 if not MOLECULAR_DATA_CACHE:
                     debug_lines.append("CACHE为空")
                 else:
@@ -587,7 +559,7 @@ class StandardMolecularAnalysisNode:
                         debug_lines.append(f"    filename: {cache_data.get('filename', 'N/A')}")
                         debug_lines.append(f"    atoms: {cache_data.get('atoms', 'N/A')}")
                         debug_lines.append(f"    format: {cache_data.get('format', 'N/A')}")
-                        debug_lines.append(f"    size: {len(cache_data.get('content', ''))} chars")
+                        debug_lines.append(f"    size: {cache_data.get('file_stats', {}).get('size', 0)} chars")
                         debug_lines.append("")
             
             # ID匹配分析
@@ -600,7 +572,7 @@ class StandardMolecularAnalysisNode:
                     debug_lines.append(f"node部分: {node_part}")
                     
                     # 查找同tab的其他节点
-                    with CACHE_LOCK:
+                    with CACHE_LOCK.read():
                         same_tab_nodes = [k for k in MOLECULAR_DATA_CACHE.keys() if k.startswith(tab_part + "_node_")]
                         debug_lines.append(f"相同tab的节点: {same_tab_nodes}")
                 else:
@@ -611,7 +583,7 @@ class StandardMolecularAnalysisNode:
             debug_lines.append("")
             debug_lines.append("🎆 === 3D显示状态 ===")
             debug_lines.append("检查molstar_3d_display属性: ✓ 已启用")
-            with CACHE_LOCK:
+            with CACHE_LOCK.read():
                 debug_lines.append(f"存储ID可用性: {'\u2713' if node_id in MOLECULAR_DATA_CACHE else '\u2717'}")
                 debug_lines.append(f"预期3D显示按钮可点击: {'\u2713' if node_id in MOLECULAR_DATA_CACHE else '\u2717'}")
             
@@ -66,18 +66,16 @@ class SimpleUploadAndDisplayTestNode:
             # 🔑 关键：如果是upload节点，先同步tab_id到CACHE
             if _alchem_node_id and "_node_" in _alchem_node_id:
                 try:
-                    from ..backend.memory import MOLECULAR_DATA_CACHE, CACHE_LOCK
+                    from ..backend.memory import update_tab_id
                     
                     tab_id = _alchem_node_id.split("_node_")[0]
                     print(f"🔑 upload节点执行时同步tab_id: {tab_id} -> {_alchem_node_id}")
                     
                     # 如果节点数据已存在，确保tab_id字段正确
-                    with CACHE_LOCK:
-                        if _alchem_node_id in MOLECULAR_DATA_CACHE:
-                            MOLECULAR_DATA_CACHE[_alchem_node_id]["tab_id"] = tab_id
-                            print(f"✅ 同步tab_id到CACHE成功: {_alchem_node_id} -> {tab_id}")
-                        else:
-                            print(f"⚠️ 节点数据尚不存在，无需同步: {_alchem_node_id}")
+                    if update_tab_id(_alchem_node_id, tab_id):
+                        print(f"✅ 同步tab_id到CACHE成功: {_alchem_node_id} -> {tab_id}")
+                    else:
+                        print(f"⚠️ 节点数据尚不存在，无需同步: {_alchem_node_id}")
                             
                 except Exception as sync_error:
                     print(f"⚠️ tab_id同步失败，但不影响执行: {sync_error}")
@@ -200,7 +198,7 @@ class SimpleUploadAndDisplayTestNode:
             
             # 全局CACHE状态
             debug_lines.append("📊 === 全局CACHE状态 ===")
-            with CACHE_LOCK:
+            with CACHE_LOCK.read():
                 if not MOLECULAR_DATA_CACHE:
                     debug_lines.append("CACHE为空")
                 else:
@@ -213,7 +211,7 @@ class SimpleUploadAndDisplayTestNode:
                         debug_lines.append(f"  - filename: {cache_data.get('filename', 'N/A')}")
                         debug_lines.append(f"  - atoms: {cache_data.get('atoms', 'N/A')}")
                         debug_lines.append(f"  - format: {cache_data.get('format', 'N/A')}")
-                        debug_lines.append(f"  - size: {len(cache_data.get('content', ''))} chars")
+                        debug_lines.append(f"  - size: {cache_data.get('file_stats', {}).get('size', 0)} chars")
                         debug_lines.append("")
             
             # 当前节点的查找结果
@@ -239,7 +237,7 @@ class SimpleUploadAndDisplayTestNode:
                     debug_lines.append(f"解析node_num: {node_part}")
                     
                     # 查找同tab的其他节点
-                    with CACHE_LOCK:
+                    with CACHE_LOCK.read():
                         same_tab_nodes = [k for k in MOLECULAR_DATA_CACHE.keys() if k.startswith(tab_part + "_node_")]
                         debug_lines.append(f"相同tab的节点: {same_tab_nodes}")
                 else:
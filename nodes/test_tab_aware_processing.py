@@ -207,44 +207,21 @@ class TabAwareProcessingNode:
     
     def _center_molecule(self, content: str) -> str:
         """分子居中处理"""
-        lines = content.split('\n')
-        coords = []
+        from ..backend.memory import MolecularDataManager
         
-        # 收集原子坐标
-        for line in lines:
-            if line.startswith('ATOM') and len(line) > 54:
-                try:
-                    x, y, z = float(line[30:38]), float(line[38:46]), float(line[46:54])
-                    coords.append((x, y, z))
-                except:
-                    continue
+        # 质心由原子表的坐标数组计算（已缓存的内容不会重复解析）
+        atom_table = MolecularDataManager.get_atom_table_for_content(content, "pdb")
+        center = atom_table.centroid(hetatm=False)
         
-        if not coords:
+        if center is None:
             return content
         
-        # 计算质心
-        center_x = sum(x for x, y, z in coords) / len(coords)
-        center_y = sum(y for x, y, z in coords) / len(coords)
-        center_z = sum(z for x, y, z in coords) / len(coords)
-        
-        # 应用居中
-        processed_lines = []
-        for line in lines:
-            if line.startswith('ATOM') and len(line) > 54:
-                try:
-                    x = float(line[30:38]) - center_x
-                    y = float(line[38:46]) - center_y
-                    z = float(line[46:54]) - center_z
-                    
-                    new_line = line[:30] + f"{x:8.3f}{y:8.3f}{z:8.3f}" + line[54:]
-                    processed_lines.append(new_line)
-                except:
-                    processed_lines.append(line)
-            else:
-                processed_lines.append(line)
+        # 应用居中：只改写ATOM记录的坐标列
+        center_x, center_y, center_z = center
+        processed_content = atom_table.translate_pdb(content, (-center_x, -center_y, -center_z), hetatm=False)
         
         print(f"🔧 分子居中: 质心偏移 ({center_x:.3f}, {center_y:.3f}, {center_z:.3f})")
-        return '\n'.join(processed_lines)
+        return processed_content
     
     def _simple_edit(self, content: str) -> str:
         """简单编辑：删除最后一个原子"""
@@ -273,7 +250,7 @@ class TabAwareProcessingNode:
         """简化的tab_id获取"""
         from ..backend.memory import MOLECULAR_DATA_CACHE, CACHE_LOCK
         
-        with CACHE_LOCK:
+        with CACHE_LOCK.read():
             for node_data in MOLECULAR_DATA_CACHE.values():
                 if node_data.get('tab_id'):
                     tab_id = node_data.get('tab_id')
@@ -301,7 +278,7 @@ class TabAwareProcessingNode:
                 ])
             
             debug_lines.append("\n📊 === 全局CACHE状态 ===")
-            with CACHE_LOCK:
+            with CACHE_LOCK.read():
                 if not MOLECULAR_DATA_CACHE:
                     debug_lines.append("CACHE为空")
                 else:
@@ -0,0 +1,59 @@
+"""
+🧪 后端测试的公共配置
+
+后端模块依赖ComfyUI提供的 server / folder_paths；不在ComfyUI环境中运行时
+用最小的替身模块代替（只提供路由表、事件循环和输入目录）。
+"""
+
+import os
+import sys
+import types
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# 导入后端之前设置：测试不写快照和文件，输入目录放在临时目录中
+INPUT_DIR = tempfile.mkdtemp(prefix="alchem_test_input_")
+os.environ.setdefault("ALCHEM_SNAPSHOT_ENABLED", "0")
+os.environ.setdefault("ALCHEM_PERSIST_POLICY", "off")
+
+try:
+    import folder_paths  # noqa: F401
+except ImportError:
+    folder_paths = types.ModuleType("folder_paths")
+    folder_paths.get_input_directory = lambda: INPUT_DIR
+    sys.modules["folder_paths"] = folder_paths
+
+try:
+    import server  # noqa: F401
+except ImportError:
+    from aiohttp import web
+
+    class _PromptServer:
+        def __init__(self):
+            self.routes = web.RouteTableDef()
+            self.loop = None
+
+    server = types.ModuleType("server")
+    server.PromptServer = type("PromptServer", (), {"instance": _PromptServer()})
+    sys.modules["server"] = server
+
+
+@pytest.fixture
+def memory():
+    """后端内存模块（每个测试前后清空缓存）"""
+    from backend import memory as memory_module
+    memory_module.clear_cache()
+    yield memory_module
+    memory_module.clear_cache()
+
+
+def make_pdb(atoms: int, seed: float = 0.0) -> str:
+    """生成一个只含ATOM记录的PDB内容"""
+    lines = [f"ATOM  {i + 1:5d}  CA  ALA A{i + 1:4d}    {seed + i * 0.1:8.3f}{1.0:8.3f}{2.0:8.3f}  1.00  0.00           C"
+             for i in range(atoms)]
+    return "\n".join(lines + ["END", ""])
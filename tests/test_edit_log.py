@@ -0,0 +1,109 @@
+"""
+🧪 编辑日志：撤销/重做必须恢复逐字节相同的内容，并正确维护blob引用
+"""
+
+import pytest
+
+from conftest import make_pdb
+
+
+def _bytes(memory, node_id):
+    return bytes(memory.get_molecular_data(node_id, "bytes")["content"])
+
+
+def _references(memory):
+    return memory.BLOB_STORE.get_stats()["references"]
+
+
+@pytest.mark.parametrize("original", [
+    make_pdb(20).encode("utf-8"),
+    # 非UTF-8内容（Latin-1）：撤销后必须恢复原始字节，而不是UTF-8重新编码的结果
+    b"REMARK caf\xe9\n" + make_pdb(20).encode("ascii"),
+], ids=["utf8", "latin1"])
+def test_remove_undo_redo_restores_exact_bytes(memory, original):
+    from backend.blob_store import compute_content_hash
+
+    memory.store_molecular_data("wf_node_1", "a.pdb", "molecules", original)
+    original_hash = memory.MOLECULAR_DATA_CACHE["wf_node_1"]["content_hash"]
+    assert original_hash == compute_content_hash(original)
+
+    edited = memory.edit_molecular_data("wf_node_1", "remove_atom", atom_index=5)
+    assert edited["atoms"] == 19
+    edited_bytes = _bytes(memory, "wf_node_1")
+    edited_hash = memory.MOLECULAR_DATA_CACHE["wf_node_1"]["content_hash"]
+
+    undone = memory.undo_edit("wf_node_1")
+    assert undone["atoms"] == 20
+    assert _bytes(memory, "wf_node_1") == original
+    assert memory.MOLECULAR_DATA_CACHE["wf_node_1"]["content_hash"] == original_hash
+
+    redone = memory.redo_edit("wf_node_1")
+    assert redone["atoms"] == 19
+    assert _bytes(memory, "wf_node_1") == edited_bytes
+    assert memory.MOLECULAR_DATA_CACHE["wf_node_1"]["content_hash"] == edited_hash
+    assert compute_content_hash(edited_bytes) == edited_hash
+
+
+def test_undo_redo_across_checkpoints(memory, monkeypatch):
+    monkeypatch.setattr(memory, "EDIT_CHECKPOINT_INTERVAL", 2)
+    memory.store_molecular_data("wf_node_1", "a.pdb", "molecules", make_pdb(12))
+    states = [_bytes(memory, "wf_node_1")]
+    for _ in range(6):
+        memory.edit_molecular_data("wf_node_1", "remove_last_atom")
+        states.append(_bytes(memory, "wf_node_1"))
+
+    for expected in reversed(states[:-1]):
+        memory.undo_edit("wf_node_1")
+        assert _bytes(memory, "wf_node_1") == expected
+    assert memory.undo_edit("wf_node_1") is None
+
+    for expected in states[1:]:
+        memory.redo_edit("wf_node_1")
+        assert _bytes(memory, "wf_node_1") == expected
+    assert memory.redo_edit("wf_node_1") is None
+
+
+def test_ring_eviction_releases_checkpoint_references(memory, monkeypatch):
+    monkeypatch.setattr(memory, "EDIT_LOG_MAX_OPS", 3)
+    monkeypatch.setattr(memory, "EDIT_CHECKPOINT_INTERVAL", 1)
+    memory.store_molecular_data("wf_node_1", "a.pdb", "molecules", make_pdb(12))
+    # 另一个节点共享初始内容：释放错误会把它的内容一起删掉
+    memory.store_molecular_data("wf_node_2", "a.pdb", "molecules", make_pdb(12))
+    shared_hash = memory.MOLECULAR_DATA_CACHE["wf_node_2"]["content_hash"]
+
+    for _ in range(8):
+        memory.edit_molecular_data("wf_node_1", "remove_last_atom")
+
+    edit_log = memory.EDIT_LOGS["wf_node_1"]
+    assert edit_log.get_state()["applied"] == 3
+    # 当前内容1个引用 + 3个检查点；被环形缓冲区丢弃的检查点已释放
+    assert _references(memory) == 1 + 3 + 1
+    assert memory.BLOB_STORE.get_refcount(shared_hash) == 1
+    assert _bytes(memory, "wf_node_2") == make_pdb(12).encode()
+
+    for _ in range(3):
+        assert memory.undo_edit("wf_node_1") is not None
+    assert memory.undo_edit("wf_node_1") is None
+    assert memory.get_molecular_data("wf_node_1")["atoms"] == 12 - 5
+
+    # 撤销后的新编辑丢弃可重做的操作及其检查点
+    memory.edit_molecular_data("wf_node_1", "remove_last_atom")
+    assert memory.redo_edit("wf_node_1") is None
+
+    memory.clear_cache()
+    assert _references(memory) == 0
+    assert memory.BLOB_STORE.get_stats()["blobs"] == 0
+
+
+@pytest.mark.parametrize("filename, content", [
+    ("a.xyz", "3\ncomment\nC 0.0 0.0 0.0\nO 1.0 0.0 0.0\nH 0.0 1.0 0.0\n"),
+    ("a.mol", "x\n  test\n\n  2  1  0  0  0  0  0  0  0  0999 V2000\n"
+              "    0.0000    0.0000    0.0000 C   0  0\n"
+              "    1.0000    0.0000    0.0000 O   0  0\n"
+              "  1  2  1  0\nM  END\n"),
+], ids=["xyz", "mol"])
+def test_atom_removal_leaves_non_pdb_content_unchanged(memory, filename, content):
+    memory.store_molecular_data("wf_node_1", filename, "molecules", content)
+    assert memory.edit_molecular_data("wf_node_1", "remove_last_atom") is None
+    assert memory.edit_molecular_data("wf_node_1", "remove_atom", atom_index=0) is None
+    assert memory.get_molecular_data("wf_node_1")["content"] == content
@@ -0,0 +1,130 @@
+"""
+🧪 可续传分块上传：校验失败时会话和已收到的块必须保留
+"""
+
+import asyncio
+import hashlib
+import zlib
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from conftest import make_pdb
+
+SESSION_URL = "/alchem_propbtn/api/upload_session"
+CHUNK_SIZE = 64 * 1024
+CONTENT = make_pdb(2000).encode("ascii")
+
+
+@pytest.fixture(scope="module")
+def routes():
+    import server
+    from backend import api
+
+    api.register_api_routes()
+    return server.PromptServer.instance.routes
+
+
+@pytest.fixture
+def app(routes):
+    # 每个用例各自的事件循环，Application 不能跨循环复用
+    application = web.Application()
+    application.add_routes(routes)
+    return application
+
+
+def _chunk(index: int) -> bytes:
+    return CONTENT[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]
+
+
+def _run(app, scenario):
+    async def main():
+        async with TestClient(TestServer(app)) as client:
+            await scenario(client)
+    asyncio.run(main())
+
+
+async def _open_session(client, **fields):
+    body = {"node_id": "wf_node_1", "filename": "a.pdb", "total_size": len(CONTENT), "chunk_size": CHUNK_SIZE}
+    body.update(fields)
+    response = await client.post(SESSION_URL, json=body)
+    assert response.status == 200
+    return (await response.json())["data"]
+
+
+async def _put(client, upload_id, index, data, checksum=None):
+    headers = {"X-Chunk-Checksum": checksum} if checksum else {}
+    return await client.put(f"{SESSION_URL}/{upload_id}/chunks/{index}", data=data, headers=headers)
+
+
+async def _describe(client, upload_id):
+    response = await client.get(f"{SESSION_URL}/{upload_id}")
+    return response.status, (await response.json()).get("data")
+
+
+def test_bad_chunk_checksum_marks_chunk_missing(app, memory):
+    async def scenario(client):
+        session = await _open_session(client)
+        upload_id = session["upload_id"]
+        for index in range(session["total_chunks"]):
+            response = await _put(client, upload_id, index, _chunk(index),
+                                  f"crc32={zlib.crc32(_chunk(index)):08x}")
+            assert response.status == 200
+
+        # 重传的块校验失败：该块重新算作缺失，其它块保留
+        response = await _put(client, upload_id, 1, _chunk(1), "sha256=" + "0" * 64)
+        assert response.status == 422
+        status, data = await _describe(client, upload_id)
+        assert status == 200
+        assert data["missing"] == [1]
+        assert data["received_bytes"] == len(CONTENT) - len(_chunk(1))
+
+        response = await _put(client, upload_id, 1, _chunk(1), "sha256=" + hashlib.sha256(_chunk(1)).hexdigest())
+        assert response.status == 200
+        response = await client.post(f"{SESSION_URL}/{upload_id}/complete", json={})
+        assert response.status == 200
+        assert bytes(memory.get_molecular_data("wf_node_1", "bytes")["content"]) == CONTENT
+
+    _run(app, scenario)
+
+
+def test_whole_file_checksum_failure_keeps_session(app, memory):
+    async def scenario(client):
+        session = await _open_session(client)
+        upload_id = session["upload_id"]
+        corrupted = b"X" * len(_chunk(2))
+        for index in range(session["total_chunks"]):
+            assert (await _put(client, upload_id, index, corrupted if index == 2 else _chunk(index))).status == 200
+
+        checksum = {"checksum": "sha256=" + hashlib.sha256(CONTENT).hexdigest()}
+        response = await client.post(f"{SESSION_URL}/{upload_id}/complete", json=checksum)
+        assert response.status == 422
+        assert not memory.has_node("wf_node_1")
+
+        # 会话和暂存文件仍在：重传有问题的块后可以再次完成
+        status, data = await _describe(client, upload_id)
+        assert status == 200
+        assert data["complete"]
+        assert (await _put(client, upload_id, 2, _chunk(2))).status == 200
+        response = await client.post(f"{SESSION_URL}/{upload_id}/complete", json=checksum)
+        assert response.status == 200
+        assert bytes(memory.get_molecular_data("wf_node_1", "bytes")["content"]) == CONTENT
+
+        # 存储成功后会话结束
+        status, _ = await _describe(client, upload_id)
+        assert status == 404
+
+    _run(app, scenario)
+
+
+@pytest.mark.parametrize("fields", [{"total_size": True}, {"chunk_size": False}, {"total_size": 0}],
+                         ids=["bool-total-size", "bool-chunk-size", "zero-total-size"])
+def test_invalid_session_sizes_rejected(app, fields):
+    async def scenario(client):
+        body = {"node_id": "wf_node_1", "filename": "a.pdb", "total_size": len(CONTENT), "chunk_size": CHUNK_SIZE}
+        body.update(fields)
+        response = await client.post(SESSION_URL, json=body)
+        assert response.status == 400
+
+    _run(app, scenario)
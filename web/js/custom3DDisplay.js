@@ -358,6 +358,43 @@ export const editMolecularData = async (node, inputName, editType) => {
     }
 };
 
+// ↩️ 撤销/重做分子数据编辑（action: 'undo_edit' 或 'redo_edit'）
+export const undoRedoMolecularEdit = async (node, action = 'undo_edit') => {
+    try {
+        const dataProcessor = alchem3DCoordinator.getDataProcessor();
+        const targetNodeId = dataProcessor.generateUniqueNodeId(node);
+        
+        console.log(`[DEBUG] ${action}: 节点ID '${targetNodeId}'`);
+        
+        const response = await fetch('/alchem_propbtn/api/molecular', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                request_type: action,
+                node_id: targetNodeId
+            })
+        });
+        
+        const result = await response.json();
+        
+        if (result.success) {
+            console.log(`✅ ${result.message}, 原子数量: ${result.data.atoms_count}`);
+            
+            // WebSocket会自动推送更新，无需手动刷新
+            return result;
+        } else {
+            console.error(`❌ ${action} 失败: ${result.error}`);
+            throw new Error(result.error);
+        }
+        
+    } catch (error) {
+        console.error(`🚨 ${action} 失败:`, error);
+        throw error;
+    }
+};
+
 // 创建3D显示Widget - 重构版本
 export const createMolstar3DDisplayWidget = () => {
     return (node, inputName, inputData) => {
@@ -407,6 +444,23 @@ export const createMolstar3DDisplayWidget = () => {
             }
         );
 
+        // ↩️ 撤销上一次编辑
+        const undoWidget = node.addWidget(
+            'button',
+            `${inputName}_undo`,
+            '↩️ 撤销编辑',
+            async () => {
+                try {
+                    await undoRedoMolecularEdit(node, 'undo_edit');
+                } catch (error) {
+                    alert(`撤销失败: ${error.message}`);
+                }
+            },
+            { 
+                serialize: false
+            }
+        );
+
         // 自定义按钮样式
         displayWidget.computeSize = function() {
             return [200, 30];
@@ -415,6 +469,10 @@ export const createMolstar3DDisplayWidget = () => {
         editWidget.computeSize = function() {
             return [200, 30];
         };
+        
+        undoWidget.computeSize = function() {
+            return [200, 30];
+        };
 
         
         return { widget: displayWidget };
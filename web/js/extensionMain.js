@@ -248,6 +248,24 @@ window.getCustomWidgetStatus = () => {
     return status;
 };
 
+// 📋 分页获取后端缓存节点列表并打印（状态接口不再附带完整节点列表）
+const printCacheNodes = (title, limit = 100) => {
+    return fetch('/alchem_propbtn/api/molecular', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ request_type: 'list_cache_nodes', offset: 0, limit: limit })
+    })
+        .then(r => r.json())
+        .then(result => {
+            if (result.success && result.data.nodes.length > 0) {
+                console.log(`  ${title} (${result.data.nodes.length}/${result.data.total}):`);
+                result.data.nodes.forEach(node => {
+                    console.log(`    - ${node.node_id}: ${node.filename} (${node.atoms} 原子, ${node.tier})`);
+                });
+            }
+        });
+};
+
 // 🆕 多tab调试工具
 window.debugMultiTabMemory = () => {
     logger.debug(" 多Tab内存调试工具");
@@ -272,12 +290,7 @@ window.debugMultiTabMemory = () => {
                 console.log(`\n后端内存状态:`);
                 console.log(`  总节点数: ${cache.total_nodes || 0}`);
                 console.log(`  缓存大小: ${(cache.total_cache_size || 0)} 字符`);
-                if (cache.nodes && cache.nodes.length > 0) {
-                    console.log(`  节点列表:`);
-                    cache.nodes.forEach(node => {
-                        console.log(`    - ${node.node_id}: ${node.filename} (${node.atoms} 原子)`);
-                    });
-                }
+                return printCacheNodes('节点列表');
             }
         })
         .catch(e => console.error('获取后端状态失败:', e));
@@ -315,12 +328,7 @@ window.debugNodeIds = () => {
                 const cache = data.data.cache;
                 console.log(`\n后端内存状态:`);
                 console.log(`  总节点数: ${cache.total_nodes || 0}`);
-                if (cache.nodes && cache.nodes.length > 0) {
-                    console.log(`  内存中的节点ID列表:`);
-                    cache.nodes.forEach(node => {
-                        console.log(`    - ${node.node_id}: ${node.filename} (${node.atoms} 原子)`);
-                    });
-                }
+                return printCacheNodes('缓存中的节点ID列表');
             }
         })
         .catch(e => console.error('获取后端状态失败:', e));
@@ -0,0 +1,46 @@
+/**
+ * 📦 ALCHEM二进制传输封装 - 解码后端的 application/vnd.alchem.molecular+binary
+ * 格式见 backend/binary_envelope.py：
+ *   "ALCM" | version(1) | reserved(3) | header_len(uint32 BE) | JSON头 | 内容原始字节
+ */
+
+export const BINARY_MEDIA_TYPE = 'application/vnd.alchem.molecular+binary';
+
+const MAGIC = 'ALCM';
+const VERSION = 1;
+const PREFIX_SIZE = 12;
+
+/**
+ * 解码二进制封装
+ * @param {ArrayBuffer} buffer - 封装字节
+ * @returns {{header: Object, content: string}} 头（原JSON结构，不含content）和解码后的内容
+ */
+export function decodeMolecularEnvelope(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+    if (magic !== MAGIC) {
+        throw new Error('Not an ALCHEM binary envelope');
+    }
+    if (view.getUint8(4) !== VERSION) {
+        throw new Error(`Unsupported envelope version: ${view.getUint8(4)}`);
+    }
+
+    const headerLength = view.getUint32(8, false);
+    const decoder = new TextDecoder('utf-8');
+    const header = JSON.parse(decoder.decode(new Uint8Array(buffer, PREFIX_SIZE, headerLength)));
+    const content = decoder.decode(new Uint8Array(buffer, PREFIX_SIZE + headerLength));
+    return { header, content };
+}
+
+/**
+ * 解码封装并把内容放回 data.content（得到与JSON接口相同的结构；未请求内容时不添加content）
+ * @param {ArrayBuffer} buffer - 封装字节
+ * @returns {Object} 例如 { success, data: { ..., content } }
+ */
+export function decodeMolecularMessage(buffer) {
+    const { header, content } = decodeMolecularEnvelope(buffer);
+    if (header.has_content && header.data && typeof header.data === 'object') {
+        header.data.content = content;
+    }
+    return header;
+}
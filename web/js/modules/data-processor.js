@@ -3,6 +3,8 @@
  * 从custom3DDisplay.js重构而来
  */
 
+import { BINARY_MEDIA_TYPE, decodeMolecularMessage } from './binary-envelope.js';
+
 // 简单默认PDB数据
 const DEFAULT_PDB = `HEADER    DEFAULT MOLECULE
 COMPND    DEFAULT
@@ -19,26 +21,35 @@ export class MolecularDataProcessor {
     }
     
     // 从后端API获取分子数据
-    async fetchMolecularDataFromBackend(nodeId) {
+    // 使用可缓存的GET路由：浏览器自动带上If-None-Match，数据未变化时服务器只返回304
+    // fields: 可选，只获取指定字段（如 ['filename', 'atoms']），不含content时后端不读取内容
+    async fetchMolecularDataFromBackend(nodeId, fields = null) {
         try {
             
-            const apiUrl = '/alchem_propbtn/api/molecular';
+            let apiUrl = `/alchem_propbtn/api/molecular/${encodeURIComponent(nodeId)}`;
+            if (fields && fields.length) {
+                apiUrl += `?fields=${encodeURIComponent(fields.join(','))}`;
+            }
+            // 📦 优先请求二进制封装（内容为原始字节，不经过JSON转义），服务器不支持时回退JSON
             const response = await fetch(apiUrl, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    request_type: 'get_molecular_data',
-                    node_id: nodeId
-                })
+                method: 'GET',
+                cache: 'no-cache',
+                headers: { 'Accept': `${BINARY_MEDIA_TYPE}, application/json;q=0.9` }
             });
             
+            if (response.status === 404) {
+                // 节点不存在（与旧的POST接口一样返回 success: false）
+                return await response.json();
+            }
+            
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status} - ${response.statusText}`);
             }
             
-            const responseData = await response.json();
+            const contentType = response.headers.get('Content-Type') || '';
+            const responseData = contentType.startsWith(BINARY_MEDIA_TYPE)
+                ? decodeMolecularMessage(await response.arrayBuffer())
+                : await response.json();
             
             if (responseData.success) {
             }
@@ -55,6 +66,71 @@ export class MolecularDataProcessor {
         }
     }
     
+    // 批量获取多个节点的分子数据（一次请求）；传入onItem时以NDJSON流式接收，每到一个节点回调一次
+    async fetchMolecularDataBatchFromBackend(nodeIds, onItem = null) {
+        try {
+            const response = await fetch('/alchem_propbtn/api/molecular', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    request_type: 'get_molecular_data_batch',
+                    node_ids: nodeIds,
+                    stream: Boolean(onItem)
+                })
+            });
+
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status} - ${response.statusText}`);
+            }
+
+            if (!onItem) {
+                return await response.json();
+            }
+
+            // NDJSON：每行一个节点，最后一行是 {done, found, missing}
+            const items = [];
+            let summary = null;
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffered = '';
+            const handleLine = (line) => {
+                if (!line.trim()) return;
+                const parsed = JSON.parse(line);
+                if (parsed.done) {
+                    summary = parsed;
+                } else {
+                    items.push(parsed);
+                    onItem(parsed);
+                }
+            };
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffered += decoder.decode(value, { stream: true });
+                const lines = buffered.split('\n');
+                buffered = lines.pop();
+                lines.forEach(handleLine);
+            }
+            handleLine(buffered + decoder.decode());
+
+            return {
+                success: Boolean(summary) && !summary.error,
+                error: summary ? summary.error : 'Batch stream ended early',
+                data: { items, found: summary?.found ?? 0, missing: summary?.missing ?? 0 }
+            };
+
+        } catch (error) {
+            console.error('🚨 Error fetching molecular data batch from backend:', error);
+            return {
+                success: false,
+                error: `Network error: ${error.message}`,
+                data: null
+            };
+        }
+    }
+
     // 获取后端缓存状态
     async fetchCacheStatusFromBackend() {
         try {
@@ -89,23 +165,27 @@ export class MolecularDataProcessor {
     // 通过文件名查找分子数据
     // ⚠️ 警告：此函数可能导致节点数据混乱，当多个节点使用相同文件名时
     // 🔑 已从3D显示流程中移除，仅保留用于特殊调试场景
-    async findMolecularDataByFilename(filename) {
+    async findMolecularDataByFilename(filename, tabId = null) {
         try {
+            // 🔎 后端按文件名索引查找，一次请求返回匹配节点的数据
+            const response = await fetch('/alchem_propbtn/api/molecular', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    request_type: 'find_molecular_data',
+                    filename: filename,
+                    tab_id: tabId
+                })
+            });
             
-            const cacheStatus = await this.fetchCacheStatusFromBackend();
-            if (cacheStatus && cacheStatus.success && cacheStatus.data.nodes) {
-                for (const cachedNode of cacheStatus.data.nodes) {
-                    if (cachedNode.filename === filename) {
-                        // 使用找到的节点ID获取完整数据
-                        const backendData = await this.fetchMolecularDataFromBackend(cachedNode.node_id);
-                        if (backendData && backendData.success) {
-                            return backendData;
-                        }
-                    }
-                }
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
             }
             
-            return null;
+            const responseData = await response.json();
+            return responseData && responseData.success ? responseData : null;
             
         } catch (error) {
             console.error('🚨 Error finding molecular data by filename:', error);
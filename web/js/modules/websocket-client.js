@@ -10,6 +10,7 @@
  */
 
 import { getWebSocketLogger } from "../utils/logger.js";
+import { decodeMolecularMessage } from "./binary-envelope.js";
 
 // 使用统一的ALCHEM日志系统
 const logger = getWebSocketLogger();
@@ -30,6 +31,13 @@ class ALCHEMWebSocketClient {
         // 订阅的节点
         this.subscribedNodes = new Set();
         
+        // 📦 订阅时请求二进制封装：带内容的推送以二进制帧接收，内容不经过JSON转义
+        this.binaryTransport = true;
+        
+        // 进行中的批量获取请求: request_id -> { items, onItem, resolve, reject }
+        this.pendingBatches = new Map();
+        this.nextBatchId = 1;
+        
         // 事件监听器
         this.eventListeners = {
             'connected': [],
@@ -65,6 +73,7 @@ class ALCHEMWebSocketClient {
             logger.info(`正在连接到WebSocket服务器: ${wsUrl}`);
             
             this.ws = new WebSocket(wsUrl);
+            this.ws.binaryType = 'arraybuffer';
             
             // 设置事件处理器
             this.ws.onopen = this.onOpen.bind(this);
@@ -120,7 +129,9 @@ class ALCHEMWebSocketClient {
      */
     onMessage(event) {
         try {
-            const message = JSON.parse(event.data);
+            const message = typeof event.data === 'string'
+                ? JSON.parse(event.data)
+                : decodeMolecularMessage(event.data);
             logger.debug(`收到消息: ${message.type}`);
             
             this.handleMessage(message);
@@ -177,6 +188,41 @@ class ALCHEMWebSocketClient {
                 logger.info(`分子数据变更: 节点 ${message.node_id}, 类型 ${message.change_type}`);
                 this.emit('molecular_data_changed', message);
                 break;
+
+            case 'molecular_data_batch_changed':
+                // 批量上传的合并通知：拆成逐个节点的变更事件（条目不含content，监听方按需拉取）
+                logger.info(`批量分子数据变更: ${message.batch_id}, ${message.items.length} 个节点`);
+                for (const item of message.items) {
+                    this.emit('molecular_data_changed', {
+                        type: 'molecular_data_changed',
+                        node_id: item.node_id,
+                        change_type: message.change_type,
+                        data: item,
+                        timestamp: message.timestamp
+                    });
+                }
+                break;
+
+            case 'molecular_data_batch_item': {
+                // 批量获取：每个节点一条消息，边到边交给调用方
+                const batch = this.pendingBatches.get(message.request_id);
+                if (batch) {
+                    batch.items.push(message);
+                    if (batch.onItem) {
+                        batch.onItem(message);
+                    }
+                }
+                break;
+            }
+            
+            case 'molecular_data_batch_complete': {
+                const batch = this.pendingBatches.get(message.request_id);
+                if (batch) {
+                    this.pendingBatches.delete(message.request_id);
+                    batch.resolve({ items: batch.items, found: message.found, missing: message.missing });
+                }
+                break;
+            }
                 
             case 'subscribed':
                 logger.info(`订阅成功: ${message.message}`);
@@ -188,6 +234,10 @@ class ALCHEMWebSocketClient {
                 
             case 'error':
                 logger.error(`服务器错误: ${message.message}`);
+                if (message.request_id && this.pendingBatches.has(message.request_id)) {
+                    this.pendingBatches.get(message.request_id).reject(new Error(message.message));
+                    this.pendingBatches.delete(message.request_id);
+                }
                 this.emit('error', message);
                 break;
                 
@@ -229,7 +279,8 @@ class ALCHEMWebSocketClient {
         if (this.isConnected) {
             return this.send({
                 type: 'subscribe_node',
-                node_id: nodeId
+                node_id: nodeId,
+                binary: this.binaryTransport
             });
         } else {
             logger.info(`WebSocket未连接，节点 ${nodeId} 将在连接后自动订阅`);
@@ -237,6 +288,28 @@ class ALCHEMWebSocketClient {
         }
     }
     
+    /**
+     * 批量获取多个节点的分子数据（一次请求，服务器逐个节点推送）
+     * @param {string[]} nodeIds - 节点ID列表
+     * @param {Function} onItem - 可选，每收到一个节点的结果时调用
+     * @returns {Promise<{items, found, missing}>}
+     */
+    getMolecularDataBatch(nodeIds, onItem = null) {
+        return new Promise((resolve, reject) => {
+            const requestId = `batch_${this.nextBatchId++}`;
+            this.pendingBatches.set(requestId, { items: [], onItem, resolve, reject });
+            const sent = this.send({
+                type: 'get_molecular_data_batch',
+                request_id: requestId,
+                node_ids: nodeIds
+            });
+            if (!sent) {
+                this.pendingBatches.delete(requestId);
+                reject(new Error('WebSocket未连接'));
+            }
+        });
+    }
+    
     /**
      * 取消订阅节点
      */
@@ -259,7 +332,8 @@ class ALCHEMWebSocketClient {
         for (const nodeId of this.subscribedNodes) {
             this.send({
                 type: 'subscribe_node',
-                node_id: nodeId
+                node_id: nodeId,
+                binary: this.binaryTransport
             });
         }
     }
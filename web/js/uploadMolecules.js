@@ -404,8 +404,138 @@ export const analyzeMolecularFile = async (file) => {
     });
 };
 
+// 🧩 分块上传：超过阈值的文件走可续传的分块协议（upload_session）
+const CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+const CHUNKED_UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024;
+const CHUNKED_UPLOAD_CONCURRENCY = 4;
+const CHUNKED_UPLOAD_MAX_RETRIES = 3;
+const UPLOAD_SESSION_URL = '/alchem_propbtn/api/upload_session';
+
+let crc32Table = null;
+
+// CRC32（非安全上下文中没有WebCrypto时用于分块校验）
+const crc32Hex = (buffer) => {
+    if (!crc32Table) {
+        crc32Table = new Uint32Array(256);
+        for (let n = 0; n < 256; n++) {
+            let c = n;
+            for (let k = 0; k < 8; k++) {
+                c = c & 1 ? 0xEDB88320 ^ (c >>> 1) : c >>> 1;
+            }
+            crc32Table[n] = c >>> 0;
+        }
+    }
+    const bytes = new Uint8Array(buffer);
+    let crc = 0xFFFFFFFF;
+    for (let i = 0; i < bytes.length; i++) {
+        crc = crc32Table[(crc ^ bytes[i]) & 0xFF] ^ (crc >>> 8);
+    }
+    return ((crc ^ 0xFFFFFFFF) >>> 0).toString(16).padStart(8, '0');
+};
+
+// 分块校验和：优先sha256（WebCrypto），否则crc32
+const computeChunkChecksum = async (buffer) => {
+    if (window.crypto?.subtle) {
+        const digest = await window.crypto.subtle.digest('SHA-256', buffer);
+        const hex = Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+        return `sha256=${hex}`;
+    }
+    return `crc32=${crc32Hex(buffer)}`;
+};
+
+const postSessionJson = async (url, body) => {
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body)
+    });
+    const result = await response.json();
+    if (!response.ok || !result.success) {
+        const error = new Error(result.error || `Upload session request failed: ${response.status}`);
+        error.status = response.status;
+        throw error;
+    }
+    return result;
+};
+
+// 分块上传到后端内存：块并行上传，每块带校验和，失败重试；中断后再次调用会从断点续传
+export const uploadMolecularFileChunked = async (file, molecularFolder, nodeId, customFileName = null, onProgress = null) => {
+    // 同一节点、同一文件的会话ID保存在localStorage中，用于续传
+    const resumeKey = `alchem_upload:${nodeId}:${file.name}:${file.size}:${file.lastModified}`;
+    const init = await postSessionJson(UPLOAD_SESSION_URL, {
+        node_id: nodeId,
+        filename: file.name,
+        folder: molecularFolder,
+        custom_filename: customFileName,
+        total_size: file.size,
+        chunk_size: CHUNKED_UPLOAD_CHUNK_SIZE,
+        upload_id: localStorage.getItem(resumeKey)
+    });
+    const session = init.data;
+    localStorage.setItem(resumeKey, session.upload_id);
+
+    const queue = [...session.missing];
+    let doneChunks = session.total_chunks - queue.length;
+    if (doneChunks) {
+        logger.molecular(`Resuming chunked upload ${session.upload_id}: ${doneChunks}/${session.total_chunks} chunks already received`);
+    }
+    onProgress?.(doneChunks / session.total_chunks);
+
+    const uploadChunk = async (index) => {
+        const start = index * session.chunk_size;
+        const buffer = await file.slice(start, Math.min(start + session.chunk_size, file.size)).arrayBuffer();
+        const checksum = await computeChunkChecksum(buffer);
+
+        for (let attempt = 1; ; attempt++) {
+            try {
+                const response = await fetch(`${UPLOAD_SESSION_URL}/${session.upload_id}/chunks/${index}`, {
+                    method: 'PUT',
+                    headers: { 'Content-Type': 'application/octet-stream', 'X-Chunk-Checksum': checksum },
+                    body: buffer
+                });
+                if (response.ok) return;
+                const result = await response.json().catch(() => ({}));
+                const error = new Error(result.error || `Chunk ${index} failed: ${response.status}`);
+                // 会话不存在 / 内容被拒绝时重试无意义
+                error.fatal = [400, 404, 413, 415].includes(response.status);
+                throw error;
+            } catch (error) {
+                if (error.fatal || attempt >= CHUNKED_UPLOAD_MAX_RETRIES) throw error;
+                await new Promise(resolve => setTimeout(resolve, 500 * attempt));
+            }
+        }
+    };
+
+    const worker = async () => {
+        while (queue.length) {
+            await uploadChunk(queue.shift());
+            doneChunks++;
+            onProgress?.(doneChunks / session.total_chunks);
+        }
+    };
+
+    try {
+        await Promise.all(Array.from({ length: Math.min(CHUNKED_UPLOAD_CONCURRENCY, queue.length) }, worker));
+        const result = await postSessionJson(`${UPLOAD_SESSION_URL}/${session.upload_id}/complete`, {});
+        localStorage.removeItem(resumeKey);
+        return result;
+    } catch (error) {
+        if (error.status === 404 || error.fatal) {
+            // 会话已失效，下次从头开始
+            localStorage.removeItem(resumeKey);
+        }
+        throw error;
+    }
+};
+
 // 上传分子文件到后端内存（新架构）
-export const uploadMolecularFileToBackend = async (file, molecularFolder, nodeId, customFileName = null) => {
+export const uploadMolecularFileToBackend = async (file, molecularFolder, nodeId, customFileName = null, onProgress = null) => {
+    if (file.size >= CHUNKED_UPLOAD_THRESHOLD) {
+        const displayName = customFileName || file.name;
+        logger.molecular(`Uploading large molecular file in chunks: ${displayName} (${file.size} bytes) -> node ${nodeId}`);
+        return uploadMolecularFileChunked(file, molecularFolder, nodeId, customFileName, onProgress);
+    }
+
     const formData = new FormData();
     formData.append('file', file);  // 分子文件
     formData.append('node_id', nodeId);  // 节点ID
@@ -443,6 +573,29 @@ export const uploadMolecularFileToBackend = async (file, molecularFolder, nodeId
     }
 };
 
+// 📦 批量上传多个分子文件或一个压缩包（zip/tar），files[i] / 压缩包第i个成员对应 nodeIds[i]
+export const uploadMolecularFilesBatch = async (files, molecularFolder, nodeIds) => {
+    const formData = new FormData();
+    formData.append('node_ids', JSON.stringify(nodeIds));
+    formData.append('folder', molecularFolder);
+    for (const file of files) {
+        formData.append('file', file);
+    }
+
+    logger.molecular(`Uploading ${files.length} molecular file(s) in one batch -> ${nodeIds.length} node(s)`);
+    const response = await fetch('/alchem_propbtn/api/upload_molecular_batch', {
+        method: 'POST',
+        body: formData
+    });
+    const result = await response.json();
+    if (!result.data) {
+        throw new Error(result.error || `Batch upload failed: ${response.status} ${response.statusText}`);
+    }
+    // 逐个文件的结果（部分失败时其余文件仍然已存储）
+    logger.success(`Batch upload finished: ${result.data.stored} stored, ${result.data.failed} failed`);
+    return result;
+};
+
 // 原有的文件系统上传（兼容性保留）
 export const uploadMolecularFile = async (file, molecularFolder) => {
     const formData = new FormData();
@@ -510,7 +663,10 @@ export const createMolecularUploadHandler = (molecularFolder, comboWidget, progr
             
             // 🚀 步骤1：上传到后端内存（快速访问）
             infoContainer.innerHTML = `🚀 正在上传到后端内存 ${analysis.icon} ${analysis.format} 文件...`;
-            const uploadResult = await uploadMolecularFileToBackend(file, molecularFolder, tabAwareNodeId);
+            const uploadResult = await uploadMolecularFileToBackend(
+                file, molecularFolder, tabAwareNodeId, null,
+                (fraction) => { progressBar.style.width = `${50 + Math.round(fraction * 20)}%`; }
+            );
             progressBar.style.width = '70%';
             
             // 🚀 后端内存上传完成，获取结果信息